@@ -4,25 +4,43 @@
 מערכת מעקב מחירים - Flask Application
 """
 
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, Response, g, jsonify, request, render_template
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 import os
+import time
 from datetime import datetime, timedelta
 import logging
 
+from utils.db_routing import RoutingSession, configure_replica, engine_options, read_only, refresh_pool_stats
+
 # הגדרות בסיסיות
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///price_tracker.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+app.config['DATABASE_REPLICA_URL'] = os.getenv('DATABASE_REPLICA_URL')
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-change-in-production')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
+app.config['SEARCH_CACHE_TTL'] = int(os.getenv('SEARCH_CACHE_TTL', 300))
+app.config['SEARCH_CACHE_STALE_TTL'] = int(os.getenv('SEARCH_CACHE_STALE_TTL', 3600))
+app.config['SEARCH_CACHE_MAX_ENTRIES'] = int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', 1000))
+app.config['STATS_MAX_AGE'] = int(os.getenv('STATS_MAX_AGE', 600))
+app.config['PRICE_HISTORY_RAW_DAYS'] = int(os.getenv('PRICE_HISTORY_RAW_DAYS', 7))
+app.config['PRICE_HISTORY_HOURLY_DAYS'] = int(os.getenv('PRICE_HISTORY_HOURLY_DAYS', 90))
+app.config['TRACK_BULK_MAX_ITEMS'] = int(os.getenv('TRACK_BULK_MAX_ITEMS', 1000))
+app.config['TRACK_MAX_DURATION_DAYS'] = int(os.getenv('TRACK_MAX_DURATION_DAYS', 90))
+app.config['PROFILER_TOKEN'] = os.getenv('PROFILER_TOKEN')
+app.config['PROFILER_SAMPLE_RATE'] = float(os.getenv('PROFILER_SAMPLE_RATE', 0))
+app.config['PROFILER_KEEP'] = int(os.getenv('PROFILER_KEEP', 20))
+app.config['PROFILER_DIR'] = os.getenv('PROFILER_DIR')
+app.config['PROFILER_ENGINE'] = os.getenv('PROFILER_ENGINE', 'cprofile')
 
 # הרחבות
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
 migrate = Migrate(app, db)
 jwt = JWTManager(app)
 CORS(app)
@@ -31,6 +49,32 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# מדדי Prometheus
+from utils.metrics import (
+    REQUEST_LATENCY, SEARCH_CACHE_HIT_RATIO, QUEUE_DEPTH,
+    instrument_engine, metrics_response, register_refresh
+)
+from utils.redis_client import get_redis
+from utils.profiler import RequestProfiler
+
+# read replica לנתיבי קריאה בלבד (אופציונלי)
+replica_engine = configure_replica(app.config['DATABASE_REPLICA_URL'])
+
+with app.app_context():
+    instrument_engine(db.engine)
+    if replica_engine is not None:
+        instrument_engine(replica_engine)
+    
+    # פרופיילינג לבקשות איטיות - כבוי כל עוד לא הוגדר טוקן או שיעור דגימה
+    profiler = RequestProfiler(
+        app, db.engine,
+        token=app.config['PROFILER_TOKEN'],
+        sample_rate=app.config['PROFILER_SAMPLE_RATE'],
+        keep=app.config['PROFILER_KEEP'],
+        directory=app.config['PROFILER_DIR'],
+        engine_name=app.config['PROFILER_ENGINE']
+    )
+
 # ייבוא מודלים
 from models.product import Product
 from models.user import User
@@ -38,8 +82,17 @@ from models.price_history import PriceHistory
 from models.alert import Alert
 
 # ייבוא services
-from services.price_monitor import PriceMonitorService
-from services.notification import NotificationService
+from services.search_cache import SearchCache
+from services.search_jobs import SearchJobQueue, STATUS_DONE, STATUS_FAILED
+from services.search_index import SearchIndex
+from services.stats_snapshot import StatsSnapshot
+from services.price_series import PriceSeries, RESOLUTION_RAW, RESOLUTION_HOUR, RESOLUTION_DAY
+from services.alert_sweeper import AlertSweeper
+from scrapers.rate_limit import circuit_states
+from services.notification_dispatcher import (
+    NotificationDispatcher, KIND_TRACKING_STARTED, KIND_TRACKING_STOPPED, KIND_TRACKING_STARTED_BULK,
+    QUEUE_KEY as NOTIFICATION_QUEUE_KEY
+)
 
 # ייבוא API routes
 from api.products import products_bp
@@ -51,12 +104,73 @@ app.register_blueprint(products_bp, url_prefix='/api/products')
 app.register_blueprint(users_bp, url_prefix='/api/users')
 app.register_blueprint(alerts_bp, url_prefix='/api/alerts')
 
+# מטמון תוצאות חיפוש
+search_cache = SearchCache(
+    ttl=app.config['SEARCH_CACHE_TTL'],
+    stale_ttl=app.config['SEARCH_CACHE_STALE_TTL'],
+    max_entries=app.config['SEARCH_CACHE_MAX_ENTRIES']
+)
+
+# תור scraping ברקע לחיפושים שלא נמצאו
+search_jobs = SearchJobQueue(app, db)
+
+# אינדקס טקסט מלא לשמות מוצרים
+search_index = SearchIndex(db, price_weight=float(os.getenv('SEARCH_PRICE_WEIGHT', 0.3)))
+
+# תמונת מצב של הסטטיסטיקות
+stats_snapshot = StatsSnapshot(db, max_age=app.config['STATS_MAX_AGE'])
+
+# היסטוריית מחירים בשכבות (גולמי / שעתי / יומי)
+price_series = PriceSeries(
+    db,
+    raw_days=app.config['PRICE_HISTORY_RAW_DAYS'],
+    hourly_days=app.config['PRICE_HISTORY_HOURLY_DAYS']
+)
+
+# תור הודעות - אימייל/SMS נשלחים מחוץ לבקשה
+notification_dispatcher = NotificationDispatcher(app, db)
+
+CELERY_QUEUES = [queue.strip() for queue in os.getenv('CELERY_QUEUES', 'celery').split(',') if queue.strip()]
+
+def refresh_gauges():
+    """עדכון gauges לפני כל חשיפה ב-/metrics"""
+    SEARCH_CACHE_HIT_RATIO.set(search_cache.stats()['hit_ratio'])
+    refresh_pool_stats(db.engine)
+    
+    client = get_redis()
+    if client is not None:
+        for queue in CELERY_QUEUES + [NOTIFICATION_QUEUE_KEY]:
+            QUEUE_DEPTH.labels(queue=queue).set(client.llen(queue))
+
+register_refresh(refresh_gauges)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def observe_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None and request.endpoint != 'metrics':
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.labels(
+            endpoint=endpoint, method=request.method, status=response.status_code
+        ).observe(time.perf_counter() - started)
+    return response
+
 @app.route('/')
 def index():
     """עמוד בית"""
     return render_template('index.html')
 
+@app.route('/metrics')
+def metrics():
+    """מדדי Prometheus"""
+    body, content_type = metrics_response()
+    return Response(body, content_type=content_type)
+
 @app.route('/api/health')
+@read_only
 def health_check():
     """בדיקת תקינות המערכת"""
     try:
@@ -71,10 +185,13 @@ def health_check():
         'status': 'healthy' if db_status == 'healthy' else 'unhealthy',
         'timestamp': datetime.utcnow().isoformat(),
         'database': db_status,
+        'search_cache': search_cache.stats(),
+        'scrapers': circuit_states(),
         'version': '1.0.0'
     })
 
 @app.route('/api/search', methods=['POST'])
+@read_only
 def search_products():
     """חיפוש מוצרים"""
     try:
@@ -90,26 +207,27 @@ def search_products():
         if not query:
             return jsonify({'error': 'Empty search query'}), 400
         
-        # חיפוש במסד הנתונים
-        results = Product.search(query, category, max_price)
+        # חיפוש דרך המטמון - טעינה מהמסד רק בהחטאה או ברענון רקע
+        results = search_cache.get_or_load(query, category, max_price, load_search_results)
         
-        # אם לא נמצא, הפעל scraping חדש
+        # אם לא נמצא, scraping חדש ברקע - מחזירים מזהה משימה מיד
         if not results:
-            monitor_service = PriceMonitorService()
-            scraping_results = monitor_service.search_new_product(query, category)
+            job = search_jobs.submit(query, category)
+            
+            if job['status'] != STATUS_DONE:
+                return jsonify({
+                    'success': True,
+                    'results': [],
+                    'count': 0,
+                    'job_id': job['id'],
+                    'status': job['status']
+                }), 202
             
-            if scraping_results:
-                # שמירת התוצאות החדשות
-                for result in scraping_results:
-                    product = Product.create_from_scraping(result)
-                    db.session.add(product)
-                
-                db.session.commit()
-                results = Product.search(query, category, max_price)
+            results = SearchCache.filter_price(job['results'], max_price)
         
         return jsonify({
             'success': True,
-            'results': [product.to_dict() for product in results],
+            'results': results,
             'count': len(results)
         })
         
@@ -117,6 +235,35 @@ def search_products():
         logger.error(f"Search error: {e}")
         return jsonify({'error': 'Search failed'}), 500
 
+@app.route('/api/search/<job_id>')
+def search_job_status(job_id):
+    """מצב משימת חיפוש ברקע"""
+    try:
+        job = search_jobs.get(job_id)
+        if not job:
+            return jsonify({'error': 'Search job not found'}), 404
+        
+        results = SearchCache.filter_price(job['results'], request.args.get('max_price'))
+        
+        return jsonify({
+            'success': job['status'] != STATUS_FAILED,
+            'job_id': job['id'],
+            'status': job['status'],
+            'results': results,
+            'count': len(results),
+            'stores': job.get('stores', {})
+        })
+        
+    except Exception as e:
+        logger.error(f"Search job status error: {e}")
+        return jsonify({'error': 'Failed to get search job'}), 500
+
+def load_search_results(query, category, max_price):
+    """חיפוש במסד הנתונים דרך אינדקס הטקסט המלא"""
+    with app.app_context():
+        results = search_index.search_products(query, category, max_price)
+        return [product.to_dict() for product in results]
+
 @app.route('/api/track', methods=['POST'])
 def start_tracking():
     """התחלת מעקב אחר מוצר"""
@@ -146,10 +293,10 @@ def start_tracking():
         
         db.session.add(alert)
         db.session.commit()
+        stats_snapshot.increment('active_alerts')
         
-        # שליחת אימייל/SMS אישור
-        notification_service = NotificationService()
-        notification_service.send_tracking_confirmation(user, alert)
+        # שליחת אימייל/SMS אישור - דרך התור
+        notification_dispatcher.enqueue(KIND_TRACKING_STARTED, user, alert)
         
         logger.info(f"Started tracking product {product_id} for user {user.email}")
         
@@ -163,6 +310,101 @@ def start_tracking():
         logger.error(f"Tracking start error: {e}")
         return jsonify({'error': 'Failed to start tracking'}), 500
 
+def is_positive_int(value):
+    """מספר שלם חיובי מ-JSON - True/False, 1.9 ומחרוזות נדחים"""
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+@app.route('/api/track/bulk', methods=['POST'])
+def start_tracking_bulk():
+    """התחלת מעקב אחר רשימת מוצרים בבקשה אחת"""
+    try:
+        data = request.get_json() or {}
+        
+        product_ids = data.get('product_ids')
+        user_email = data.get('email')
+        user_phone = data.get('phone')
+        alert_settings = data.get('alert_settings', {})
+        tracking_duration = data.get('tracking_duration', 7)  # ימים
+        
+        if not isinstance(product_ids, list) or not product_ids or not (user_email or user_phone):
+            return jsonify({'error': 'Missing required fields'}), 400
+        
+        if len(product_ids) > app.config['TRACK_BULK_MAX_ITEMS']:
+            return jsonify({'error': f"Too many products (max {app.config['TRACK_BULK_MAX_ITEMS']})"}), 400
+        
+        max_days = app.config['TRACK_MAX_DURATION_DAYS']
+        if not is_positive_int(tracking_duration) or tracking_duration > max_days:
+            return jsonify({'error': f"Invalid tracking_duration (1-{max_days} days)"}), 400
+        
+        # מזהה שאינו מספר שלם חיובי מדווח כמו מוצר שלא קיים; השאר - לפי הסדר, בלי כפילויות
+        malformed_ids = [product_id for product_id in product_ids if not is_positive_int(product_id)]
+        requested_ids = list(dict.fromkeys(
+            product_id for product_id in product_ids if is_positive_int(product_id)
+        ))
+        
+        # יצירת/עדכון משתמש - פעם אחת לכל הרשימה
+        user = User.get_or_create(email=user_email, phone=user_phone)
+        
+        # אימות כל המוצרים בשאילתה אחת
+        existing_ids = {
+            product_id for (product_id,) in
+            db.session.query(Product.id).filter(Product.id.in_(requested_ids)).all()
+        } if requested_ids else set()
+        # מוצרים שהמשתמש כבר עוקב אחריהם לא נוצרים שוב
+        tracked_ids = {
+            product_id for (product_id,) in
+            db.session.query(Alert.product_id).filter(
+                Alert.user_id == user.id,
+                Alert.product_id.in_(existing_ids),
+                Alert.is_active.is_(True)
+            ).all()
+        } if existing_ids else set()
+        
+        invalid_ids = malformed_ids + [product_id for product_id in requested_ids if product_id not in existing_ids]
+        new_ids = [product_id for product_id in requested_ids
+                   if product_id in existing_ids and product_id not in tracked_ids]
+        
+        # יצירת כל ה-alerts בפקודת insert אחת ובטרנזקציה אחת
+        expires_at = datetime.utcnow() + timedelta(days=tracking_duration)
+        rows = [
+            {
+                'user_id': user.id,
+                'product_id': product_id,
+                'settings': alert_settings,
+                'expires_at': expires_at,
+                'is_active': True
+            }
+            for product_id in new_ids
+        ]
+        
+        if rows:
+            db.session.bulk_insert_mappings(Alert, rows, return_defaults=True)
+            db.session.commit()
+            stats_snapshot.increment('active_alerts', len(rows))
+            
+            # אישור אחד לכל הרשימה - דרך התור
+            notification_dispatcher.enqueue_bulk(
+                KIND_TRACKING_STARTED_BULK, user,
+                alert_ids=[row['id'] for row in rows],
+                product_ids=new_ids
+            )
+        
+        logger.info(f"Started tracking {len(rows)} products for user {user.email}")
+        
+        return jsonify({
+            'success': True,
+            'alert_ids': [row['id'] for row in rows],
+            'created': len(rows),
+            'already_tracking': sorted(tracked_ids),
+            'invalid_product_ids': invalid_ids,
+            'message': 'Tracking started successfully'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Bulk tracking start error: {e}")
+        return jsonify({'error': 'Failed to start tracking'}), 500
+
 @app.route('/api/stop-tracking', methods=['POST'])
 def stop_tracking():
     """עצירת מעקב"""
@@ -177,15 +419,20 @@ def stop_tracking():
         if not alert:
             return jsonify({'error': 'Alert not found'}), 404
         
-        alert.is_active = False
-        alert.stopped_at = datetime.utcnow()
+        # עדכון מותנה - בקשה חוזרת או התראה שכבר הושבתה לא נספרות שוב
+        stopped = Alert.query.filter(Alert.id == alert.id, Alert.is_active.is_(True)).update(
+            {Alert.is_active: False, Alert.stopped_at: datetime.utcnow()},
+            synchronize_session=False
+        )
         db.session.commit()
         
-        # שליחת הודעת עצירה
-        notification_service = NotificationService()
-        notification_service.send_tracking_stopped(alert.user, alert)
-        
-        logger.info(f"Stopped tracking alert {alert_id}")
+        if stopped:
+            stats_snapshot.increment('active_alerts', -1)
+            
+            # שליחת הודעת עצירה - דרך התור
+            notification_dispatcher.enqueue(KIND_TRACKING_STOPPED, alert.user, alert)
+            
+            logger.info(f"Stopped tracking alert {alert_id}")
         
         return jsonify({
             'success': True,
@@ -197,17 +444,13 @@ def stop_tracking():
         return jsonify({'error': 'Failed to stop tracking'}), 500
 
 @app.route('/api/stats')
+@read_only
 def get_stats():
     """סטטיסטיקות המערכת"""
     try:
-        stats = {
-            'total_products': Product.query.count(),
-            'active_alerts': Alert.query.filter_by(is_active=True).count(),
-            'total_users': User.query.count(),
-            'price_updates_today': PriceHistory.query.filter(
-                PriceHistory.created_at >= datetime.utcnow().date()
-            ).count()
-        }
+        # ?exact=1 מחשב מחדש מהמסד במקום תמונת המצב
+        exact = request.args.get('exact', '').lower() in ('1', 'true')
+        stats = stats_snapshot.get(exact=exact)
         
         return jsonify(stats)
         
@@ -215,6 +458,30 @@ def get_stats():
         logger.error(f"Stats error: {e}")
         return jsonify({'error': 'Failed to get stats'}), 500
 
+@app.route('/api/price-history/<int:product_id>')
+def get_price_history(product_id):
+    """היסטוריית מחירים של מוצר ברזולוציה נבחרת"""
+    try:
+        resolution = request.args.get('resolution', RESOLUTION_HOUR)
+        if resolution not in (RESOLUTION_RAW, RESOLUTION_HOUR, RESOLUTION_DAY):
+            return jsonify({'error': 'Invalid resolution'}), 400
+        
+        days = request.args.get('days', type=int)
+        since = datetime.utcnow() - timedelta(days=days) if days else None
+        
+        points = price_series.history(product_id, resolution, since=since)
+        
+        return jsonify({
+            'product_id': product_id,
+            'resolution': resolution,
+            'points': points,
+            'count': len(points)
+        })
+        
+    except Exception as e:
+        logger.error(f"Price history error: {e}")
+        return jsonify({'error': 'Failed to get price history'}), 500
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Not found'}), 404
@@ -229,8 +496,19 @@ def create_tables():
     with app.app_context():
         db.create_all()
         logger.info("Database tables created")
+        
+        search_index.ensure_schema()
+        search_index.index_missing()
+        price_series.ensure_schema()
+        AlertSweeper(db).ensure_indexes()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """יצירת טבלאות ואינדקסים - פעם אחת לפני הפעלת gunicorn"""
+    create_tables()
 
 if __name__ == '__main__':
+    # שרת הפיתוח; בפרודקשן: gunicorn -c gunicorn.conf.py wsgi:app
     # יצירת טבלאות אם לא קיימות
     create_tables()
     
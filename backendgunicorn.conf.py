@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gunicorn config - הרצת ה-API בפרודקשן עם workers של gevent
+
+כל בקשה רצה ב-greenlet; קריאות חוסמות (מסד, Redis, SMTP, HTTP ל-Selenium
+Grid) משחררות את ה-worker לבקשות אחרות, כך ש-worker אחד מחזיק מאות
+בקשות איטיות במקביל במקום מספר ה-threads.
+
+שימוש:
+    gunicorn --chdir backend -c backend/gunicorn.conf.py wsgi:app
+
+משתני סביבה: PORT, GUNICORN_WORKERS, GUNICORN_WORKER_CLASS,
+GUNICORN_WORKER_CONNECTIONS, GUNICORN_TIMEOUT
+
+פרופיילינג (utils/profiler.py): תחת gevent נאספים זמני בקשה ושאילתות SQL
+בלבד. לפרופיל קוד מלא לכל בקשה מריצים instance נפרד עם workers של gthread
+(משתני הסביבה ואחריהם הפקודה):
+    GUNICORN_WORKER_CLASS=gthread GUNICORN_WORKERS=2 GUNICORN_THREADS=8 PROFILER_SAMPLE_RATE=0.05
+    gunicorn --chdir backend -c backend/gunicorn.conf.py wsgi:app
+"""
+
+import os
+import glob
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+
+# gevent: בקשות מקביליות רבות לכל worker; sync/gthread זמינים לניפוי תקלות
+# ולפרופיל קוד מלא של RequestProfiler
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.getenv('GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 500))
+threads = int(os.getenv('GUNICORN_THREADS', 4))  # רלוונטי ל-gthread בלבד
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# מחזור workers מונע זליגת זיכרון הדרגתית
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = 500
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    # קבצי מדדים מהרצה קודמת היו מתווספים למונים של ההרצה הנוכחית
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+
+
+def post_fork(server, worker):
+    if worker_class != 'gevent':
+        return
+
+    # psycopg2 הוא דרייבר C - בלי psycogreen שאילתה חוסמת את כל ה-worker
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        server.log.warning("psycogreen is not installed, PostgreSQL queries will block the gevent worker")
+        return
+    patch_psycopg()
+
+
+def child_exit(server, worker):
+    # ניקוי קבצי המדדים של worker שיצא (Prometheus multiprocess)
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        try:
+            from prometheus_client import multiprocess
+        except ImportError:
+            return
+        multiprocess.mark_process_dead(worker.pid)
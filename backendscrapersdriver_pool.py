@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WebDriver Pool - מאגר סשנים של Chrome לשימוש חוזר
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import (
+    InvalidSessionIdException, NoSuchElementException, NoSuchWindowException,
+    StaleElementReferenceException, TimeoutException, WebDriverException
+)
+
+from utils.metrics import set_driver_pool_stats
+
+logger = logging.getLogger(__name__)
+
+# שגיאות ברמת העמוד (אין תוצאות, אלמנט חסר) - הסשן עצמו תקין
+PAGE_LEVEL_EXCEPTIONS = (TimeoutException, NoSuchElementException, StaleElementReferenceException)
+
+# הסשן אבד - אין טעם לבדוק אותו
+SESSION_LOST_EXCEPTIONS = (InvalidSessionIdException, NoSuchWindowException)
+
+
+class DriverPoolTimeout(Exception):
+    """אין דרייבר פנוי במאגר בזמן ההמתנה שהוגדר"""
+
+
+class _PooledDriver:
+    """
+    דרייבר בודד במאגר יחד עם נתוני השימוש שלו
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+
+
+class WebDriverPool:
+    """
+    מאגר חסום של סשני WebDriver עם השאלה/החזרה.
+
+    - בדיקת תקינות לפני כל השאלה
+    - פינוי סשנים שלא היו בשימוש זמן רב
+    - מיחזור סשן אחרי מספר שימושים מוגדר
+    - עבודה מול Selenium Grid (selenium-hub) כאשר מוגדר remote_url
+    - page_load_timeout לכל סשן - driver.get על אתר שנתקע נכשל ב-TimeoutException
+    """
+
+    def __init__(self, options, max_size: int = 2, max_uses: int = 50,
+                 idle_timeout: float = 300, borrow_timeout: float = 30,
+                 remote_url: Optional[str] = None, page_load_timeout: float = 20):
+        self.options = options
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.idle_timeout = idle_timeout
+        self.borrow_timeout = borrow_timeout
+        self.remote_url = remote_url
+        self.page_load_timeout = page_load_timeout
+
+        self._idle = deque()
+        self._in_use = 0
+        self._total = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None):
+        """
+        השאלת דרייבר מהמאגר לשימוש בתוך בלוק with
+
+        שגיאות ברמת העמוד (timeout בהמתנה, אלמנט חסר) מועברות הלאה והדרייבר
+        חוזר למאגר. דרייבר נסגר רק כשהסשן אבד, או כשאחרי WebDriverException
+        אחרת הוא לא עונה לבדיקת תקינות.
+        """
+        pooled = self.acquire(timeout)
+        set_driver_pool_stats(self.stats())
+        broken = False
+        try:
+            yield pooled.driver
+        except PAGE_LEVEL_EXCEPTIONS:
+            raise
+        except SESSION_LOST_EXCEPTIONS:
+            broken = True
+            raise
+        except WebDriverException:
+            broken = not self._is_healthy(pooled)
+            raise
+        finally:
+            self.release(pooled, discard=broken)
+            set_driver_pool_stats(self.stats())
+
+    def acquire(self, timeout: Optional[float] = None) -> _PooledDriver:
+        """
+        השאלת דרייבר - סשן פנוי קיים, או חדש אם המאגר לא מלא
+        """
+        timeout = self.borrow_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            stale = []
+            pooled = None
+            create = False
+
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("WebDriver pool is closed")
+
+                stale = self._pop_expired_locked()
+
+                if self._idle:
+                    pooled = self._idle.pop()
+                    self._in_use += 1
+                elif self._total < self.max_size:
+                    self._total += 1
+                    self._in_use += 1
+                    create = True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise DriverPoolTimeout(
+                            f"No WebDriver available after {timeout}s "
+                            f"(pool size {self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            self._quit_all(stale)
+
+            if create:
+                try:
+                    return _PooledDriver(self._create_driver())
+                except Exception:
+                    self._forget(counted_in_use=True)
+                    raise
+
+            if self._is_healthy(pooled):
+                pooled.last_used = time.monotonic()
+                return pooled
+
+            logger.warning("Discarding unhealthy WebDriver session")
+            self._quit(pooled)
+            self._forget(counted_in_use=True)
+
+    def release(self, pooled: _PooledDriver, discard: bool = False):
+        """
+        החזרת דרייבר למאגר, או סגירתו אם הוא שבור / מוצה
+        """
+        pooled.uses += 1
+        pooled.last_used = time.monotonic()
+
+        if discard or self._closed or pooled.uses >= self.max_uses:
+            if not discard and pooled.uses >= self.max_uses:
+                logger.info(f"Recycling WebDriver session after {pooled.uses} uses")
+            self._quit(pooled)
+            self._forget(counted_in_use=True)
+            return
+
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    def evict_idle(self) -> int:
+        """
+        סגירת סשנים שלא היו בשימוש יותר מ-idle_timeout שניות
+        """
+        with self._cond:
+            stale = self._pop_expired_locked()
+        self._quit_all(stale)
+        return len(stale)
+
+    def close(self):
+        """סגירת כל הסשנים במאגר"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+            self._cond.notify_all()
+        self._quit_all(idle)
+
+    def stats(self) -> Dict:
+        """מצב המאגר"""
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'total': self._total,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'remote': bool(self.remote_url),
+            }
+
+    def _pop_expired_locked(self):
+        now = time.monotonic()
+        expired = [p for p in self._idle if now - p.last_used > self.idle_timeout]
+        for pooled in expired:
+            self._idle.remove(pooled)
+        self._total -= len(expired)
+        return expired
+
+    def _forget(self, counted_in_use: bool):
+        with self._cond:
+            self._total -= 1
+            if counted_in_use:
+                self._in_use -= 1
+            self._cond.notify()
+
+    def _create_driver(self):
+        if self.remote_url:
+            logger.info(f"Starting remote WebDriver session on {self.remote_url}")
+            driver = webdriver.Remote(command_executor=self.remote_url, options=self.options)
+        else:
+            logger.info("Starting local Chrome WebDriver session")
+            driver = webdriver.Chrome(options=self.options)
+
+        # ברירת המחדל של Chrome היא 300 שניות - אתר תקוע היה מחזיק את הדרייבר
+        driver.set_page_load_timeout(self.page_load_timeout)
+        return driver
+
+    @staticmethod
+    def _is_healthy(pooled: _PooledDriver) -> bool:
+        try:
+            pooled.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(pooled: _PooledDriver):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.debug(f"WebDriver quit failed: {e}")
+
+    def _quit_all(self, pooled_list):
+        for pooled in pooled_list:
+            self._quit(pooled)
+
+
+_shared_pool: Optional[WebDriverPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_driver_pool(options) -> WebDriverPool:
+    """
+    מאגר משותף לכל ה-scrapers בתהליך הנוכחי.
+
+    ההגדרות נקראות ממשתני סביבה:
+    SELENIUM_REMOTE_URL, DRIVER_POOL_SIZE, DRIVER_POOL_MAX_USES,
+    DRIVER_POOL_IDLE_TIMEOUT, DRIVER_POOL_BORROW_TIMEOUT, DRIVER_PAGE_LOAD_TIMEOUT
+    """
+    global _shared_pool
+
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = WebDriverPool(
+                options,
+                max_size=int(os.getenv('DRIVER_POOL_SIZE', 2)),
+                max_uses=int(os.getenv('DRIVER_POOL_MAX_USES', 50)),
+                idle_timeout=float(os.getenv('DRIVER_POOL_IDLE_TIMEOUT', 300)),
+                borrow_timeout=float(os.getenv('DRIVER_POOL_BORROW_TIMEOUT', 30)),
+                remote_url=os.getenv('SELENIUM_REMOTE_URL') or None,
+                page_load_timeout=float(os.getenv('DRIVER_PAGE_LOAD_TIMEOUT', 20)),
+            )
+            atexit.register(_shared_pool.close)
+
+        return _shared_pool
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP Client - סשן requests משותף ל-scrapers
+"""
+
+import os
+import json
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = float(os.getenv('SCRAPER_HTTP_TIMEOUT', 10))
+
+PAGE_STATE_KEY = 'page_state:'
+PAGE_STATE_TTL = int(os.getenv('PAGE_STATE_TTL', 7 * 24 * 3600))
+PAGE_STATE_LOCAL_SIZE = int(os.getenv('PAGE_STATE_LOCAL_SIZE', 50000))
+
+# מצב עמוד שמצורף לתוצאה ונשמר רק אחרי שהתוצאה נכתבה (commit_page_state)
+PAGE_STATE_FIELD = 'page_state'
+
+# מצב עמודים משותף לתהליך כאשר Redis אינו זמין
+_local_page_state = OrderedDict()
+_local_page_state_lock = threading.Lock()
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    סשן requests אחד לתהליך - שומר חיבורי keep-alive בין בקשות
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            pool_size = int(os.getenv('SCRAPER_HTTP_POOL_SIZE', 20))
+            retries = Retry(
+                total=2,
+                backoff_factor=0.3,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset(['GET', 'HEAD']),
+            )
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_size, max_retries=retries)
+
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+
+        return _session
+
+
+def fetch(url: str, headers: Optional[dict] = None, timeout: Optional[float] = None) -> requests.Response:
+    """
+    בקשת GET דרך הסשן המשותף
+    """
+    return get_http_session().get(url, headers=headers, timeout=timeout or DEFAULT_TIMEOUT)
+
+
+def conditional_fetch(url: str, headers: Optional[dict] = None,
+                      timeout: Optional[float] = None, save_validators: bool = True) -> requests.Response:
+    """
+    בקשת GET מותנית: נשלחים ה-ETag / Last-Modified מהבקשה הקודמת לאותו URL.
+    תשובה 304 פירושה שהעמוד לא השתנה; בתשובה 200 נשמרים הערכים החדשים,
+    אלא אם save_validators=False (הקורא שומר אותם כשהתוכן כבר עובד).
+    """
+    state = get_page_state(url)
+    request_headers = dict(headers or {})
+    if state.get('etag'):
+        request_headers['If-None-Match'] = state['etag']
+    if state.get('last_modified'):
+        request_headers['If-Modified-Since'] = state['last_modified']
+
+    response = fetch(url, headers=request_headers, timeout=timeout)
+
+    if response.status_code == 200 and save_validators:
+        validators = response_validators(response)
+        if validators != {key: state.get(key) for key in validators}:
+            save_page_state(url, **validators)
+
+    return response
+
+
+def response_validators(response: requests.Response) -> Dict:
+    """ה-ETag / Last-Modified של תשובה, לבקשה המותנית הבאה"""
+    return {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+
+
+def commit_page_state(url: str, result: Optional[Dict]):
+    """
+    שמירת מצב העמוד שצורף לתוצאה (PAGE_STATE_FIELD) - לקרוא רק אחרי
+    שהתוצאה נשמרה, אחרת הבדיקה הבאה תקבל 304 / טביעת אצבע זהה ותדלג
+    על מחיר שמעולם לא נכתב
+    """
+    fields = result.pop(PAGE_STATE_FIELD, None) if result else None
+    if fields:
+        save_page_state(url, **fields)
+
+
+def content_hash(fragment: str) -> str:
+    """טביעת אצבע של החלק הרלוונטי בעמוד"""
+    return hashlib.sha1(fragment.encode('utf-8')).hexdigest()
+
+
+def get_page_state(url: str) -> Dict:
+    """
+    המצב השמור עבור URL: etag, last_modified, content_hash ותוצאה אחרונה
+    """
+    client = get_redis()
+    if client is not None:
+        try:
+            raw = client.get(_page_state_key(url))
+            return json.loads(raw) if raw else {}
+        except Exception as e:
+            logger.debug(f"Page state read failed: {e}")
+
+    with _local_page_state_lock:
+        return dict(_local_page_state.get(url, {}))
+
+
+def save_page_state(url: str, **fields):
+    """עדכון שדות במצב השמור של URL"""
+    state = get_page_state(url)
+    state.update(fields)
+
+    client = get_redis()
+    if client is not None:
+        try:
+            client.set(_page_state_key(url), json.dumps(state, ensure_ascii=False), ex=PAGE_STATE_TTL)
+            return
+        except Exception as e:
+            logger.debug(f"Page state write failed: {e}")
+
+    with _local_page_state_lock:
+        _local_page_state[url] = state
+        _local_page_state.move_to_end(url)
+        while len(_local_page_state) > PAGE_STATE_LOCAL_SIZE:
+            _local_page_state.popitem(last=False)
+
+
+def _page_state_key(url: str) -> str:
+    return f"{PAGE_STATE_KEY}{hashlib.sha1(url.encode('utf-8')).hexdigest()}"
@@ -4,34 +4,109 @@
 KSP Scraper - חילוץ מחירים מאתר KSP
 """
 
+import os
 import time
 import re
+import json
 import logging
+import importlib.util
+import threading
+import weakref
+from collections import OrderedDict, defaultdict
 from typing import List, Dict, Optional
-from urllib.parse import urljoin, quote
-import requests
+from urllib.parse import urljoin, quote, urlparse
 from bs4 import BeautifulSoup
-from selenium import webdriver
+from requests.exceptions import Timeout as RequestsTimeout, ConnectionError as RequestsConnectionError
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+from utils.metrics import observe_scraper_phase
+from utils.hebrew_utils import normalize_hebrew_text, extract_price_from_text
+
 from .base_scraper import BaseScraper
-from ..utils.hebrew_utils import normalize_hebrew_text, extract_price_from_text
+from .driver_pool import get_driver_pool
+from .rate_limit import CircuitOpenError, RateLimitTimeout, get_domain_guard
+from .http_client import (
+    PAGE_STATE_FIELD, conditional_fetch, content_hash, fetch, get_page_state, response_validators, save_page_state
+)
 
 logger = logging.getLogger(__name__)
 
+# שיטות שליפת מחיר
+STRATEGY_STATIC = 'static'
+STRATEGY_SELENIUM = 'selenium'
+
+# אחרי כמה זמן לנסות שוב את המסלול הסטטי עבור URL שנזקק ל-Selenium
+STRATEGY_RETRY_SECONDS = 24 * 3600
+STRATEGY_MEMORY_SIZE = 50000
+
+# שיטות חילוץ תוצאות חיפוש: page_source - פענוח מקומי של ה-HTML בקריאה אחת לדרייבר,
+# dom - find_element לכל שדה בכל כרטיס (מספר round-trips לכל מוצר)
+EXTRACTION_PAGE_SOURCE = 'page_source'
+EXTRACTION_DOM = 'dom'
+
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+PRODUCT_CARD_SELECTOR = ".product-item, .item, .product"
+PRODUCT_NAME_SELECTOR = ".product-title, .item-name, h3, h4, .name, .title"
+PRODUCT_PRICE_SELECTOR = ".price, .current-price, .item-price, .cost"
+PRODUCT_AVAILABILITY_SELECTOR = ".availability, .stock-status, .in-stock, .out-of-stock"
+PRODUCT_DESCRIPTION_SELECTOR = ".product-description, .description, .details"
+
+# ניווט לחיפוש: form - דף הבית ותיבת החיפוש (ברירת המחדל),
+# direct - ישירות לתבנית ה-URL שב-KSP_SEARCH_URL (למשל https://.../search?q={query})
+NAVIGATION_DIRECT = 'direct'
+NAVIGATION_FORM = 'form'
+
+# זיהוי מוכנות דף התוצאות:
+# stable - מספר הכרטיסים הפסיק להשתנות, network_idle - אין בקשות רשת חדשות,
+# fixed - המתנה קבועה אחרי הופעת הכרטיס הראשון (ההתנהגות הקודמת)
+READY_STABLE = 'stable'
+READY_NETWORK_IDLE = 'network_idle'
+READY_FIXED = 'fixed'
+
+FIXED_SETTLE_SECONDS = 2
+READY_POLL_SECONDS = 0.25
+READY_STABLE_POLLS = 2
+RESULTS_TIMEOUT = 15
+
+# החלקים בעמוד מוצר שמשפיעים על המחיר והזמינות (JSON-LD, מטא-תגיות, אלמנטי מחיר/מלאי).
+# אם טביעת האצבע שלהם לא השתנתה מאז הבדיקה הקודמת - אין צורך לפענח את העמוד
+PRICE_FRAGMENT_PATTERN = re.compile(
+    r'<script[^>]*application/ld\+json[^>]*>.*?</script>'
+    r'|<meta[^>]*(?:itemprop=["\']price|product:price)[^>]*>'
+    r'|<[^>]+class=["\'][^"\']*(?:price|cost|availability|stock)[^"\']*["\'][^>]*>.{0,200}',
+    re.IGNORECASE | re.DOTALL
+)
+
+# חסימת משאבים אופציונלית (KSP_BLOCK_RESOURCES=images,fonts,css)
+BLOCKED_RESOURCE_PATTERNS = {
+    'images': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico'],
+    'fonts': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'css': ['*.css'],
+}
+
 class KSPScraper(BaseScraper):
     """
     Scraper עבור אתר KSP - ksp.co.il
     """
     
+    # זיכרון משותף לכל המופעים: URL -> (שיטה שעבדה, זמן)
+    _price_strategies = OrderedDict()
+    _price_strategies_lock = threading.Lock()
+    
+    # מדדי זמן לחיפוש, לפי ניווט/מוכנות
+    _search_timings = defaultdict(lambda: defaultdict(float))
+    _search_timings_lock = threading.Lock()
+    _blocking_applied = weakref.WeakSet()
+    
     def __init__(self):
         super().__init__()
         self.base_url = "https://ksp.co.il"
-        self.search_url = "https://ksp.co.il/web/cat/573..2"
+        self.search_url = os.getenv('KSP_SEARCH_URL')
         self.store_name = "KSP"
         self.store_logo = "K"
         
@@ -44,6 +119,32 @@ class KSPScraper(BaseScraper):
         self.chrome_options.add_argument('--window-size=1920,1080')
         self.chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
         
+        self.navigation_mode = os.getenv('KSP_NAVIGATION', NAVIGATION_DIRECT if self.search_url else NAVIGATION_FORM)
+        if self.navigation_mode == NAVIGATION_DIRECT and not self.search_url:
+            logger.warning("KSP_NAVIGATION=direct requires KSP_SEARCH_URL, using the search form")
+            self.navigation_mode = NAVIGATION_FORM
+        self.ready_strategy = os.getenv('KSP_READY_STRATEGY', READY_STABLE)
+        self.blocked_resources = [
+            kind.strip() for kind in os.getenv('KSP_BLOCK_RESOURCES', '').split(',')
+            if kind.strip() in BLOCKED_RESOURCE_PATTERNS
+        ]
+        if 'images' in self.blocked_resources:
+            self.chrome_options.add_experimental_option(
+                'prefs', {'profile.managed_default_content_settings.images': 2}
+            )
+        
+        # מאגר דרייברים משותף - במקום להפעיל Chrome חדש בכל קריאה
+        self.driver_pool = get_driver_pool(self.chrome_options)
+        
+        self.extraction_mode = os.getenv('KSP_EXTRACTION_MODE', EXTRACTION_PAGE_SOURCE)
+        
+        # הגבלת קצב משותפת ל-ksp.co.il ו-circuit breaker שנפתח אחרי timeouts רצופים
+        self.domain_guard = get_domain_guard(
+            urlparse(self.base_url).netloc,
+            probe=self.is_available,
+            failure_exceptions=(TimeoutException, RequestsTimeout, RequestsConnectionError)
+        )
+        
     def search_product(self, query: str, max_results: int = 20) -> List[Dict]:
         """
         חיפוש מוצר באתר KSP
@@ -58,16 +159,6 @@ class KSPScraper(BaseScraper):
         try:
             logger.info(f"Searching KSP for: {query}")
             
-            # נרמול הטקסט העברי
-            normalized_query = normalize_hebrew_text(query)
-            
-            # בניית URL חיפוש
-            search_params = {
-                'keyword': query,
-                'sort': 'price',
-                'order': 'asc'
-            }
-            
             # ביצוע החיפוש
             results = self._perform_search_with_selenium(query, max_results)
             
@@ -82,60 +173,262 @@ class KSPScraper(BaseScraper):
         """
         ביצוע חיפוש עם Selenium
         """
-        driver = None
         try:
-            driver = webdriver.Chrome(options=self.chrome_options)
-            driver.get(self.base_url)
-            
-            # המתנה לטעינת העמוד
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # חיפוש תיבת החיפוש
-            search_box = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder*='חיפוש'], input[name='keyword'], #search-input"))
-            )
+            # מעגל פתוח נכשל מיד - בלי להשאיל (או להפעיל) Chrome
+            self.domain_guard.check()
             
-            # הכנסת טקסט החיפוש
-            search_box.clear()
-            search_box.send_keys(query)
-            
-            # לחיצה על כפתור חיפוש
-            search_button = driver.find_element(By.CSS_SELECTOR, "button[type='submit'], .search-btn, #search-btn")
-            search_button.click()
-            
-            # המתנה לתוצאות
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".product-item, .item, .product"))
-            )
-            
-            time.sleep(2)  # המתנה נוספת לטעינה מלאה
-            
-            # חילוץ תוצאות
-            products = []
-            product_elements = driver.find_elements(By.CSS_SELECTOR, ".product-item, .item, .product")[:max_results]
-            
-            for element in product_elements:
-                try:
-                    product_data = self._extract_product_from_element(element, driver)
-                    if product_data:
-                        products.append(product_data)
-                except Exception as e:
-                    logger.warning(f"Failed to extract product from element: {e}")
-                    continue
-            
-            return products
+            started = time.monotonic()
+            with self.driver_pool.driver() as driver:
+                observe_scraper_phase(self.store_name, 'driver_start', time.monotonic() - started)
+                return self._search_with_driver(driver, query, max_results)
             
+        except CircuitOpenError as e:
+            logger.warning(f"KSP search skipped: {e}")
+            return []
         except TimeoutException:
             logger.error("KSP search timeout")
             return []
         except Exception as e:
             logger.error(f"KSP Selenium search failed: {e}")
             return []
-        finally:
-            if driver:
-                driver.quit()
+    
+    def _search_with_driver(self, driver, query: str, max_results: int) -> List[Dict]:
+        """
+        ביצוע החיפוש בפועל על דרייבר מהמאגר
+        """
+        timings = {}
+        started = time.monotonic()
+        self._apply_resource_blocking(driver)
+        
+        # הניווט (מוגבל ב-page load timeout של המאגר) וההמתנה לכרטיס הראשון
+        # נספרים ב-circuit breaker - אתר שנטען אבל לא מחזיר תוצאות תקוע באותה מידה
+        with self.domain_guard.guard():
+            if self.navigation_mode == NAVIGATION_DIRECT:
+                driver.get(self.search_url.format(query=quote(query)))
+            else:
+                self._submit_search_form(driver, query)
+            timings['navigate'] = time.monotonic() - started
+            
+            mark = time.monotonic()
+            WebDriverWait(driver, RESULTS_TIMEOUT, poll_frequency=READY_POLL_SECONDS).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, PRODUCT_CARD_SELECTOR))
+            )
+            timings['first_result'] = time.monotonic() - mark
+        
+        # דף מוכן לפי האסטרטגיה
+        mark = time.monotonic()
+        self._wait_until_ready(driver, max_results)
+        timings['settle'] = time.monotonic() - mark
+        
+        mark = time.monotonic()
+        products = self._extract_results(driver, max_results)
+        timings['extract'] = time.monotonic() - mark
+        timings['total'] = time.monotonic() - started
+        
+        self._record_search_timings(timings)
+        return products
+    
+    def _submit_search_form(self, driver, query: str):
+        """
+        חיפוש דרך דף הבית ותיבת החיפוש (ניווט form)
+        """
+        driver.get(self.base_url)
+        
+        # חיפוש תיבת החיפוש (מופיעה רק אחרי טעינת העמוד)
+        search_box = WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder*='חיפוש'], input[name='keyword'], #search-input"))
+        )
+        
+        # הכנסת טקסט החיפוש
+        search_box.clear()
+        search_box.send_keys(query)
+        
+        # לחיצה על כפתור חיפוש
+        search_button = driver.find_element(By.CSS_SELECTOR, "button[type='submit'], .search-btn, #search-btn")
+        search_button.click()
+    
+    def _wait_until_ready(self, driver, max_results: int):
+        """
+        המתנה עד שדף התוצאות מוכן לפי self.ready_strategy
+        """
+        if self.ready_strategy == READY_FIXED:
+            time.sleep(FIXED_SETTLE_SECONDS)
+            return
+        
+        if self.ready_strategy == READY_NETWORK_IDLE:
+            script = (
+                "return [document.readyState === 'complete', "
+                "performance.getEntriesByType('resource').length];"
+            )
+        else:
+            script = f"return [false, document.querySelectorAll({json.dumps(PRODUCT_CARD_SELECTOR)}).length];"
+        
+        # לעולם לא יותר מההמתנה הקבועה שהאסטרטגיות האלה מחליפות
+        deadline = time.monotonic() + FIXED_SETTLE_SECONDS
+        previous, stable_polls = None, 0
+        while time.monotonic() < deadline:
+            complete, count = driver.execute_script(script)
+            if self.ready_strategy == READY_STABLE and count >= max_results:
+                return
+            stable_polls = stable_polls + 1 if count == previous else 0
+            if stable_polls >= READY_STABLE_POLLS and (complete or self.ready_strategy == READY_STABLE):
+                return
+            previous = count
+            time.sleep(READY_POLL_SECONDS)
+        
+        logger.debug(f"KSP results page not settled, continuing ({self.ready_strategy})")
+    
+    def _apply_resource_blocking(self, driver):
+        """
+        חסימת גופנים / CSS דרך CDP - פעם אחת לכל דרייבר במאגר
+        (תמונות נחסמות כבר בהגדרות Chrome)
+        """
+        patterns = [
+            pattern for kind in self.blocked_resources if kind != 'images'
+            for pattern in BLOCKED_RESOURCE_PATTERNS[kind]
+        ]
+        if not patterns or driver in self._blocking_applied:
+            return
+        
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        except Exception as e:
+            # דרייבר מרוחק (Grid) אינו תומך ב-CDP
+            logger.debug(f"Resource blocking unavailable for this driver: {e}")
+        self._blocking_applied.add(driver)
+    
+    def _record_search_timings(self, timings: Dict[str, float]):
+        """
+        צבירת זמני החיפוש. החיסכון מחושב מול ההתנהגות הקודמת:
+        המתנה קבועה של FIXED_SETTLE_SECONDS אחרי הכרטיס הראשון.
+        """
+        saved = FIXED_SETTLE_SECONDS - timings['settle']
+        logger.info(
+            f"KSP search timings: " +
+            ", ".join(f"{phase}={seconds:.2f}s" for phase, seconds in timings.items()) +
+            f", settle_saved={saved:.2f}s"
+        )
+        
+        observe_scraper_phase(
+            self.store_name, 'page_load', timings['navigate'] + timings['first_result'] + timings['settle']
+        )
+        observe_scraper_phase(self.store_name, 'extraction', timings['extract'])
+        
+        with self._search_timings_lock:
+            bucket = self._search_timings[f"{self.navigation_mode}/{self.ready_strategy}"]
+            bucket['count'] += 1
+            bucket['settle_saved'] += saved
+            for phase, seconds in timings.items():
+                bucket[phase] += seconds
+    
+    @classmethod
+    def search_timing_stats(cls) -> Dict[str, Dict[str, float]]:
+        """
+        זמן ממוצע לכל שלב בחיפוש, לפי שילוב ניווט/מוכנות (למשל direct/stable).
+        השוואה בין השילובים מראה כמה שניות נחסכו בכל חיפוש.
+        """
+        stats = {}
+        with cls._search_timings_lock:
+            for mode, bucket in cls._search_timings.items():
+                stats[mode] = {
+                    phase: round(total / bucket['count'], 3)
+                    for phase, total in bucket.items() if phase != 'count'
+                }
+                stats[mode]['count'] = int(bucket['count'])
+        return stats
+    
+    def _extract_results(self, driver, max_results: int) -> List[Dict]:
+        """
+        חילוץ תוצאות מדף החיפוש שנטען
+        """
+        # קריאה אחת ל-page_source ופענוח מקומי
+        if self.extraction_mode == EXTRACTION_PAGE_SOURCE:
+            return self.extract_products_from_html(driver.page_source, max_results)
+        
+        products = []
+        product_elements = driver.find_elements(By.CSS_SELECTOR, PRODUCT_CARD_SELECTOR)[:max_results]
+        
+        for element in product_elements:
+            try:
+                product_data = self._extract_product_from_element(element, driver)
+                if product_data:
+                    products.append(product_data)
+            except Exception as e:
+                logger.warning(f"Failed to extract product from element: {e}")
+                continue
+        
+        return products
+    
+    def extract_products_from_html(self, html: str, max_results: int = 20) -> List[Dict]:
+        """
+        חילוץ כל כרטיסי המוצרים מ-HTML של דף תוצאות, ללא גישה לדרייבר.
+        מחזיר את אותו מבנה כמו _extract_product_from_element.
+        """
+        soup = BeautifulSoup(html, HTML_PARSER)
+        
+        products = []
+        for card in soup.select(PRODUCT_CARD_SELECTOR)[:max_results]:
+            try:
+                product_data = self._extract_product_from_card(card)
+                if product_data:
+                    products.append(product_data)
+            except Exception as e:
+                logger.warning(f"Failed to extract product from card: {e}")
+                continue
+        
+        return products
+    
+    def _extract_product_from_card(self, card) -> Optional[Dict]:
+        """
+        חילוץ נתוני מוצר מכרטיס ב-HTML שכבר נטען (BeautifulSoup)
+        """
+        name_element = card.select_one(PRODUCT_NAME_SELECTOR)
+        product_name = self._element_text(name_element)
+        if not product_name:
+            return None
+        
+        price_element = card.select_one(PRODUCT_PRICE_SELECTOR)
+        price = extract_price_from_text(self._element_text(price_element)) if price_element else None
+        if not price:
+            logger.warning(f"No price found for product: {product_name}")
+            return None
+        
+        link_element = card.select_one("a")
+        product_url = link_element.get('href') if link_element else None
+        if product_url and not product_url.startswith('http'):
+            product_url = urljoin(self.base_url, product_url)
+        
+        img_element = card.select_one("img")
+        image_url = (img_element.get('src') or img_element.get('data-src')) if img_element else None
+        if image_url and not image_url.startswith('http'):
+            image_url = urljoin(self.base_url, image_url)
+        
+        availability_element = card.select_one(PRODUCT_AVAILABILITY_SELECTOR)
+        availability = self._normalize_availability(self._element_text(availability_element))
+        
+        description_element = card.select_one(PRODUCT_DESCRIPTION_SELECTOR)
+        description = self._element_text(description_element)[:200]
+        
+        return {
+            'name': normalize_hebrew_text(product_name),
+            'price': price,
+            'store': self.store_name,
+            'store_logo': self.store_logo,
+            'url': product_url,
+            'image_url': image_url,
+            'availability': availability,
+            'description': description,
+            'currency': 'ILS',
+            'last_updated': time.time()
+        }
+    
+    @staticmethod
+    def _element_text(element) -> str:
+        """טקסט של אלמנט עם רווחים מנורמלים, כמו element.text של Selenium"""
+        if element is None:
+            return ""
+        return " ".join(element.get_text(" ").split())
     
     def _extract_product_from_element(self, element, driver) -> Optional[Dict]:
         """
@@ -143,16 +436,14 @@ class KSPScraper(BaseScraper):
         """
         try:
             # שם המוצר
-            name_element = element.find_element(By.CSS_SELECTOR, 
-                ".product-title, .item-name, h3, h4, .name, .title")
+            name_element = element.find_element(By.CSS_SELECTOR, PRODUCT_NAME_SELECTOR)
             product_name = name_element.text.strip()
             
             if not product_name:
                 return None
             
             # מחיר
-            price_element = element.find_element(By.CSS_SELECTOR, 
-                ".price, .current-price, .item-price, .cost")
+            price_element = element.find_element(By.CSS_SELECTOR, PRODUCT_PRICE_SELECTOR)
             price_text = price_element.text.strip()
             price = extract_price_from_text(price_text)
             
@@ -179,23 +470,15 @@ class KSPScraper(BaseScraper):
                 image_url = None
             
             # זמינות
-            availability = "במלאי"  # ברירת מחדל
             try:
-                availability_element = element.find_element(By.CSS_SELECTOR, 
-                    ".availability, .stock-status, .in-stock, .out-of-stock")
-                availability_text = availability_element.text.strip()
-                
-                if any(word in availability_text for word in ['אזל', 'לא זמין', 'out of stock']):
-                    availability = "אזל מהמלאי"
-                elif any(word in availability_text for word in ['הזמנה', 'order']):
-                    availability = "הזמנה מראש"
+                availability_element = element.find_element(By.CSS_SELECTOR, PRODUCT_AVAILABILITY_SELECTOR)
+                availability = self._normalize_availability(availability_element.text.strip())
             except NoSuchElementException:
-                pass
+                availability = self._normalize_availability("")
             
             # מידע נוסף על המוצר
             try:
-                description_element = element.find_element(By.CSS_SELECTOR, 
-                    ".product-description, .description, .details")
+                description_element = element.find_element(By.CSS_SELECTOR, PRODUCT_DESCRIPTION_SELECTOR)
                 description = description_element.text.strip()[:200]
             except NoSuchElementException:
                 description = ""
@@ -225,95 +508,325 @@ class KSPScraper(BaseScraper):
         קבלת פרטים מפורטים על מוצר מעמוד המוצר
         """
         try:
-            driver = webdriver.Chrome(options=self.chrome_options)
-            driver.get(product_url)
-            
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # חילוץ פרטים מפורטים
-            details = {}
-            
-            # שם מוצר מפורט
-            try:
-                name_element = driver.find_element(By.CSS_SELECTOR, 
-                    "h1, .product-title, .main-title")
-                details['full_name'] = name_element.text.strip()
-            except NoSuchElementException:
-                pass
+            self.domain_guard.check()
+            with self.driver_pool.driver() as driver:
+                with self.domain_guard.guard():
+                    driver.get(product_url)
+                    
+                    WebDriverWait(driver, 10).until(
+                        EC.presence_of_element_located((By.TAG_NAME, "body"))
+                    )
+                
+                # חילוץ פרטים מפורטים
+                details = {}
+                
+                # שם מוצר מפורט
+                try:
+                    name_element = driver.find_element(By.CSS_SELECTOR, 
+                        "h1, .product-title, .main-title")
+                    details['full_name'] = name_element.text.strip()
+                except NoSuchElementException:
+                    pass
+                
+                # מחיר מעודכן
+                try:
+                    price_element = driver.find_element(By.CSS_SELECTOR, 
+                        ".current-price, .price, .cost")
+                    details['current_price'] = extract_price_from_text(price_element.text)
+                except NoSuchElementException:
+                    pass
+                
+                # מחיר מקורי (אם יש הנחה)
+                try:
+                    original_price_element = driver.find_element(By.CSS_SELECTOR, 
+                        ".original-price, .old-price, .was-price")
+                    details['original_price'] = extract_price_from_text(original_price_element.text)
+                except NoSuchElementException:
+                    pass
+                
+                # מפרט טכני
+                try:
+                    specs_elements = driver.find_elements(By.CSS_SELECTOR, 
+                        ".specifications li, .specs li, .features li")
+                    details['specifications'] = [elem.text.strip() for elem in specs_elements]
+                except NoSuchElementException:
+                    details['specifications'] = []
+                
+                # דירוג
+                try:
+                    rating_element = driver.find_element(By.CSS_SELECTOR, 
+                        ".rating, .stars, .score")
+                    rating_text = rating_element.get_attribute('title') or rating_element.text
+                    rating_match = re.search(r'(\d+\.?\d*)', rating_text)
+                    if rating_match:
+                        details['rating'] = float(rating_match.group(1))
+                except (NoSuchElementException, ValueError):
+                    pass
+                
+                # מספר ביקורות
+                try:
+                    reviews_element = driver.find_element(By.CSS_SELECTOR, 
+                        ".reviews-count, .review-count")
+                    reviews_match = re.search(r'(\d+)', reviews_element.text)
+                    if reviews_match:
+                        details['review_count'] = int(reviews_match.group(1))
+                except (NoSuchElementException, ValueError):
+                    pass
+                
+                return details
             
-            # מחיר מעודכן
-            try:
-                price_element = driver.find_element(By.CSS_SELECTOR, 
-                    ".current-price, .price, .cost")
-                details['current_price'] = extract_price_from_text(price_element.text)
-            except NoSuchElementException:
-                pass
+        except Exception as e:
+            logger.error(f"Failed to get product details from {product_url}: {e}")
+            return None
+    
+    def check_price_update(self, product_url: str) -> Optional[float]:
+        """
+        בדיקת עדכון מחיר עבור מוצר ספציפי
+        """
+        result = self.check_price_and_availability(product_url)
+        return result.get('price') if result else None
+    
+    def check_price_and_availability(self, product_url: str) -> Optional[Dict]:
+        """
+        שליפת מחיר וזמינות בלבד - קודם HTTP סטטי, Selenium רק כגיבוי
+        
+        Args:
+            product_url: כתובת עמוד המוצר
             
-            # מחיר מקורי (אם יש הנחה)
-            try:
-                original_price_element = driver.find_element(By.CSS_SELECTOR, 
-                    ".original-price, .old-price, .was-price")
-                details['original_price'] = extract_price_from_text(original_price_element.text)
-            except NoSuchElementException:
-                pass
+        Returns:
+            {'price', 'availability', 'source'} או None
+        """
+        started = time.monotonic()
+        try:
+            strategy = self._get_price_strategy(product_url)
             
-            # מפרט טכני
-            try:
-                specs_elements = driver.find_elements(By.CSS_SELECTOR, 
-                    ".specifications li, .specs li, .features li")
-                details['specifications'] = [elem.text.strip() for elem in specs_elements]
-            except NoSuchElementException:
-                details['specifications'] = []
+            # מעגל פתוח / אין אסימון - דילוג, לא נפילה ל-Selenium
+            self.domain_guard.check()
             
-            # דירוג
-            try:
-                rating_element = driver.find_element(By.CSS_SELECTOR, 
-                    ".rating, .stars, .score")
-                rating_text = rating_element.get_attribute('title') or rating_element.text
-                rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                if rating_match:
-                    details['rating'] = float(rating_match.group(1))
-            except (NoSuchElementException, ValueError):
-                pass
+            if strategy != STRATEGY_SELENIUM:
+                result = self._fetch_price_static(product_url)
+                if result:
+                    self._remember_price_strategy(product_url, STRATEGY_STATIC)
+                    return result
             
-            # מספר ביקורות
-            try:
-                reviews_element = driver.find_element(By.CSS_SELECTOR, 
-                    ".reviews-count, .review-count")
-                reviews_match = re.search(r'(\d+)', reviews_element.text)
-                if reviews_match:
-                    details['review_count'] = int(reviews_match.group(1))
-            except (NoSuchElementException, ValueError):
-                pass
+            result = self._fetch_price_selenium(product_url)
+            if result:
+                self._remember_price_strategy(product_url, STRATEGY_SELENIUM)
+            return result
             
-            driver.quit()
-            return details
+        except (CircuitOpenError, RateLimitTimeout) as e:
+            logger.warning(f"Price check skipped for {product_url}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Failed to check price update for {product_url}: {e}")
+            return None
+        finally:
+            observe_scraper_phase(self.store_name, 'price_check', time.monotonic() - started)
+    
+    def _fetch_price_static(self, product_url: str) -> Optional[Dict]:
+        """
+        שליפת מחיר מה-HTML הסטטי של עמוד המוצר (ללא דפדפן).
+        
+        הבקשה מותנית (ETag / Last-Modified), וגם כשהעמוד נשלח מחדש - אם
+        חלקי המחיר בו זהים לבדיקה הקודמת, מוחזרת התוצאה הקודמת עם
+        unchanged=True בלי לפענח את העמוד.
+        
+        תוצאה חדשה נושאת את מצב העמוד ב-PAGE_STATE_FIELD; הקורא שומר אותו
+        (commit_page_state) רק אחרי שהמחיר נכתב למסד.
+        """
+        try:
+            with self.domain_guard.guard():
+                response = conditional_fetch(product_url, headers=self.headers, save_validators=False)
+            
+            if response.status_code == 304:
+                state = get_page_state(product_url)
+                if state.get('result'):
+                    return dict(state['result'], unchanged=True)
+                # אין תוצאה שמורה - בקשה רגילה, עם אסימון משלה ב-DomainGuard
+                with self.domain_guard.guard():
+                    response = fetch(product_url, headers=self.headers)
+            
+            if response.status_code != 200:
+                return None
             
+            validators = response_validators(response)
+            fingerprint = content_hash(self._price_fragment(response.text))
+            state = get_page_state(product_url)
+            if state.get('content_hash') == fingerprint and state.get('result'):
+                # התוצאה השמורה עדיין נכונה - אפשר לעדכן את ה-validators מיד
+                if validators != {key: state.get(key) for key in validators}:
+                    save_page_state(product_url, **validators)
+                return dict(state['result'], unchanged=True)
+            
+            result = self._parse_price_from_html(response.text)
+            if result:
+                result['source'] = STRATEGY_STATIC
+                result[PAGE_STATE_FIELD] = dict(validators, content_hash=fingerprint, result=dict(result))
+            return result
+            
+        except (CircuitOpenError, RateLimitTimeout):
+            raise
         except Exception as e:
-            logger.error(f"Failed to get product details from {product_url}: {e}")
-            if driver:
-                driver.quit()
+            logger.debug(f"Static price fetch failed for {product_url}: {e}")
             return None
     
-    def check_price_update(self, product_url: str) -> Optional[float]:
+    @staticmethod
+    def _price_fragment(html: str) -> str:
+        """החלקים הרלוונטיים למחיר בעמוד, או העמוד כולו אם לא נמצאו"""
+        fragment = "".join(PRICE_FRAGMENT_PATTERN.findall(html))
+        return fragment or html
+    
+    def _parse_price_from_html(self, html: str) -> Optional[Dict]:
         """
-        בדיקת עדכון מחיר עבור מוצר ספציפי
+        חילוץ מחיר וזמינות מ-HTML: JSON-LD, מטא-תגיות ואז סלקטורים
+        """
+        soup = BeautifulSoup(html, HTML_PARSER)
+        
+        # נתונים מובנים (schema.org) - הכי אמין כשקיים
+        for script in soup.find_all('script', type='application/ld+json'):
+            try:
+                offer = self._find_json_ld_offer(json.loads(script.string or ''))
+            except ValueError:
+                continue
+            if offer:
+                price = extract_price_from_text(str(offer.get('price', '')))
+                if price:
+                    schema_availability = str(offer.get('availability', ''))
+                    if 'OutOfStock' in schema_availability or 'SoldOut' in schema_availability:
+                        availability = "אזל מהמלאי"
+                    elif 'PreOrder' in schema_availability or 'BackOrder' in schema_availability:
+                        availability = "הזמנה מראש"
+                    else:
+                        availability = "במלאי"
+                    return {'price': price, 'availability': availability}
+        
+        # מטא-תגיות מחיר
+        meta = soup.select_one("meta[itemprop='price'], meta[property='product:price:amount']")
+        price = extract_price_from_text(meta.get('content', '')) if meta else None
+        
+        # סלקטורים זהים לאלה של Selenium
+        if not price:
+            price_element = soup.select_one(".current-price, .price, .cost")
+            price = extract_price_from_text(price_element.get_text()) if price_element else None
+        
+        if not price:
+            return None
+        
+        availability_element = soup.select_one(".availability, .stock-status, .in-stock, .out-of-stock")
+        return {
+            'price': price,
+            'availability': self._normalize_availability(
+                availability_element.get_text().strip() if availability_element else ""
+            ),
+        }
+    
+    def _find_json_ld_offer(self, data) -> Optional[Dict]:
+        """
+        איתור offer של מוצר בתוך מבנה JSON-LD
+        """
+        if isinstance(data, list):
+            for item in data:
+                offer = self._find_json_ld_offer(item)
+                if offer:
+                    return offer
+            return None
+        
+        if not isinstance(data, dict):
+            return None
+        
+        if '@graph' in data:
+            return self._find_json_ld_offer(data['@graph'])
+        
+        if data.get('@type') == 'Product':
+            offers = data.get('offers')
+            if isinstance(offers, list):
+                offers = offers[0] if offers else None
+            if isinstance(offers, dict):
+                if 'price' not in offers and 'lowPrice' in offers:
+                    return dict(offers, price=offers['lowPrice'])
+                return offers
+        
+        return None
+    
+    def _fetch_price_selenium(self, product_url: str) -> Optional[Dict]:
+        """
+        שליפת מחיר וזמינות עם Selenium - ללא מפרט, דירוג וביקורות
         """
         try:
-            details = self.get_product_details(product_url)
-            return details.get('current_price') if details else None
+            self.domain_guard.check()
+            with self.driver_pool.driver() as driver:
+                with self.domain_guard.guard():
+                    driver.get(product_url)
+                    
+                    WebDriverWait(driver, 10).until(
+                        EC.presence_of_element_located((By.TAG_NAME, "body"))
+                    )
+                
+                price_element = driver.find_element(By.CSS_SELECTOR, 
+                    ".current-price, .price, .cost")
+                price = extract_price_from_text(price_element.text)
+                if not price:
+                    return None
+                
+                try:
+                    availability_element = driver.find_element(By.CSS_SELECTOR, 
+                        ".availability, .stock-status, .in-stock, .out-of-stock")
+                    availability = self._normalize_availability(availability_element.text.strip())
+                except NoSuchElementException:
+                    availability = self._normalize_availability("")
+                
+                return {
+                    'price': price,
+                    'availability': availability,
+                    'source': STRATEGY_SELENIUM
+                }
+                
+        except NoSuchElementException:
+            logger.warning(f"No price element found in {product_url}")
+            return None
         except Exception as e:
-            logger.error(f"Failed to check price update for {product_url}: {e}")
+            logger.error(f"Selenium price fetch failed for {product_url}: {e}")
+            return None
+    
+    @staticmethod
+    def _normalize_availability(availability_text: str) -> str:
+        """
+        המרת טקסט זמינות לאחד מערכי הזמינות של המערכת
+        """
+        if any(word in availability_text for word in ['אזל', 'לא זמין', 'out of stock']):
+            return "אזל מהמלאי"
+        if any(word in availability_text for word in ['הזמנה', 'order']):
+            return "הזמנה מראש"
+        return "במלאי"  # ברירת מחדל
+    
+    @classmethod
+    def _get_price_strategy(cls, product_url: str) -> Optional[str]:
+        with cls._price_strategies_lock:
+            entry = cls._price_strategies.get(product_url)
+        
+        if not entry:
             return None
+        
+        strategy, recorded_at = entry
+        # מדי פעם נבדוק שוב אם המסלול הסטטי התחיל לעבוד
+        if strategy == STRATEGY_SELENIUM and time.time() - recorded_at > STRATEGY_RETRY_SECONDS:
+            return None
+        return strategy
+    
+    @classmethod
+    def _remember_price_strategy(cls, product_url: str, strategy: str):
+        with cls._price_strategies_lock:
+            cls._price_strategies[product_url] = (strategy, time.time())
+            cls._price_strategies.move_to_end(product_url)
+            while len(cls._price_strategies) > STRATEGY_MEMORY_SIZE:
+                cls._price_strategies.popitem(last=False)
     
     def is_available(self) -> bool:
         """
         בדיקה האם האתר זמין לScraping
         """
         try:
-            response = requests.get(self.base_url, timeout=10, headers=self.headers)
-            return response.status_code == 200
+            response = conditional_fetch(self.base_url, headers=self.headers)
+            return response.status_code in (200, 304)
         except Exception:
             return False
\ No newline at end of file
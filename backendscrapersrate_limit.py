@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rate Limit - הגבלת קצב לכל דומיין ו-circuit breaker, משותפים לכל ה-workers
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY = 'ratelimit:'
+CIRCUIT_KEY = 'circuit:'
+PROBE_KEY = 'circuit_probe:'
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+# token bucket אטומי ב-Redis: מחזיר 0 אם נלקח אסימון, אחרת כמה שניות לחכות
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+
+
+class CircuitOpenError(Exception):
+    """האתר מסומן כלא זמין - הבקשה נכשלת מיד בלי לפנות אליו"""
+
+
+class RateLimitTimeout(Exception):
+    """לא התפנה אסימון לדומיין בזמן ההמתנה שהוגדר"""
+
+
+class TokenBucket:
+    """
+    הגבלת קצב לכל דומיין: rate בקשות לשנייה עם פרץ של עד burst.
+    המצב נשמר ב-Redis כך שההגבלה חלה על כל תהליכי celery יחד;
+    ללא Redis ההגבלה היא לתהליך הנוכחי בלבד.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._local: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._script = None
+
+    def acquire(self, domain: str, timeout: float = 30):
+        """
+        המתנה לאסימון עבור הדומיין
+
+        Raises:
+            RateLimitTimeout: אם לא התפנה אסימון לפני timeout
+        """
+        if self.rate <= 0:
+            return
+
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._take(domain)
+            if wait <= 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimitTimeout(f"No request slot for {domain} within {timeout}s")
+            time.sleep(wait)
+
+    def _take(self, domain: str) -> float:
+        client = get_redis()
+        if client is not None:
+            try:
+                if self._script is None:
+                    self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+                return float(self._script(keys=[f"{BUCKET_KEY}{domain}"], args=[self.rate, self.burst]))
+            except Exception as e:
+                logger.warning(f"Shared rate limiter unavailable, limiting locally: {e}")
+
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._local.get(domain, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._local[domain] = (tokens - 1, now)
+                return 0.0
+            self._local[domain] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+
+class CircuitBreaker:
+    """
+    circuit breaker לדומיין: אחרי failure_threshold כישלונות רצופים (timeouts)
+    המעגל נפתח וכל בקשה נכשלת מיד. אחרי recovery_timeout תהליך אחד מריץ
+    בדיקת probe (למשל is_available); הצלחה סוגרת את המעגל, כישלון פותח
+    אותו לתקופה נוספת.
+    """
+
+    # מצב משותף לתהליך כאשר Redis אינו זמין
+    _local_states: Dict[str, Dict] = {}
+    _local_lock = threading.Lock()
+
+    def __init__(self, domain: str, failure_threshold: int = 5, recovery_timeout: float = 60,
+                 probe: Optional[Callable[[], bool]] = None):
+        self.domain = domain
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe = probe
+
+    def allow(self):
+        """
+        בדיקה לפני פנייה לאתר
+
+        Raises:
+            CircuitOpenError: המעגל פתוח (או שתהליך אחר בודק כעת התאוששות)
+        """
+        state = self.state()
+        if state['state'] == STATE_CLOSED:
+            return
+
+        if time.time() - state['opened_at'] < self.recovery_timeout:
+            raise CircuitOpenError(f"Circuit open for {self.domain}")
+
+        if not self._claim_probe():
+            raise CircuitOpenError(f"Circuit half-open for {self.domain}, recovery probe in progress")
+
+        self._write(state=STATE_HALF_OPEN)
+        try:
+            recovered = self.probe() if self.probe else True
+        except Exception:
+            recovered = False
+
+        if recovered:
+            logger.info(f"Circuit closed for {self.domain}, site recovered")
+            self._write(state=STATE_CLOSED, failures=0, opened_at=0)
+            return
+
+        self._write(state=STATE_OPEN, opened_at=time.time())
+        raise CircuitOpenError(f"Circuit open for {self.domain}, recovery probe failed")
+
+    def record_success(self):
+        state = self.state()
+        if state['state'] != STATE_CLOSED or state['failures']:
+            self._write(state=STATE_CLOSED, failures=0, opened_at=0)
+
+    def record_failure(self):
+        failures = self._increment_failures()
+        if failures >= self.failure_threshold and self.state()['state'] != STATE_OPEN:
+            logger.warning(f"Circuit opened for {self.domain} after {failures} consecutive failures")
+            self._write(state=STATE_OPEN, opened_at=time.time())
+
+    def state(self) -> Dict:
+        """מצב המעגל: {'state', 'failures', 'opened_at'}"""
+        client = get_redis()
+        if client is not None:
+            try:
+                raw = client.hgetall(f"{CIRCUIT_KEY}{self.domain}")
+                return _parse_state({name.decode(): value.decode() for name, value in raw.items()})
+            except Exception as e:
+                logger.debug(f"Circuit state read failed: {e}")
+
+        with self._local_lock:
+            return _parse_state(self._local_states.get(self.domain, {}))
+
+    def _write(self, **fields):
+        client = get_redis()
+        if client is not None:
+            try:
+                client.hset(f"{CIRCUIT_KEY}{self.domain}", mapping=fields)
+                return
+            except Exception as e:
+                logger.debug(f"Circuit state write failed: {e}")
+
+        with self._local_lock:
+            self._local_states.setdefault(self.domain, {}).update(fields)
+
+    def _increment_failures(self) -> int:
+        client = get_redis()
+        if client is not None:
+            try:
+                return int(client.hincrby(f"{CIRCUIT_KEY}{self.domain}", 'failures', 1))
+            except Exception as e:
+                logger.debug(f"Circuit failure count failed: {e}")
+
+        with self._local_lock:
+            state = self._local_states.setdefault(self.domain, {})
+            state['failures'] = int(state.get('failures', 0)) + 1
+            return state['failures']
+
+    def _claim_probe(self) -> bool:
+        """רק תהליך אחד בודק התאוששות בכל פעם"""
+        client = get_redis()
+        if client is not None:
+            try:
+                return bool(client.set(
+                    f"{PROBE_KEY}{self.domain}", 1, nx=True, ex=max(int(self.recovery_timeout), 1)
+                ))
+            except Exception as e:
+                logger.debug(f"Circuit probe lock failed: {e}")
+
+        with self._local_lock:
+            state = self._local_states.setdefault(self.domain, {})
+            if time.time() - float(state.get('probe_at', 0)) < self.recovery_timeout:
+                return False
+            state['probe_at'] = time.time()
+            return True
+
+
+class DomainGuard:
+    """
+    הגבלת קצב + circuit breaker סביב כל פנייה לדומיין של scraper
+    """
+
+    def __init__(self, domain: str, limiter: TokenBucket, breaker: CircuitBreaker,
+                 failure_exceptions: Tuple[type, ...] = (), acquire_timeout: float = 30):
+        self.domain = domain
+        self.limiter = limiter
+        self.breaker = breaker
+        self.failure_exceptions = failure_exceptions
+        self.acquire_timeout = acquire_timeout
+
+    @contextmanager
+    def guard(self):
+        """
+        Raises:
+            CircuitOpenError: האתר מסומן כלא זמין
+            RateLimitTimeout: אין אסימון פנוי לדומיין
+        """
+        self.breaker.allow()
+        self.limiter.acquire(self.domain, self.acquire_timeout)
+        try:
+            yield
+        except self.failure_exceptions:
+            self.breaker.record_failure()
+            raise
+        else:
+            self.breaker.record_success()
+
+    def check(self):
+        """
+        בדיקת המעגל בלבד - לפני משאבים יקרים (השאלת דרייבר), בלי אסימון
+
+        Raises:
+            CircuitOpenError: האתר מסומן כלא זמין
+        """
+        self.breaker.allow()
+
+    def state(self) -> Dict:
+        return self.breaker.state()
+
+
+_shared_limiter: Optional[TokenBucket] = None
+_shared_lock = threading.Lock()
+
+
+def get_domain_guard(domain: str, probe: Optional[Callable[[], bool]] = None,
+                     failure_exceptions: Tuple[type, ...] = ()) -> DomainGuard:
+    """
+    DomainGuard לדומיין, עם limiter משותף לתהליך.
+
+    ההגדרות נקראות ממשתני סביבה:
+    SCRAPER_RATE_PER_SECOND, SCRAPER_RATE_BURST,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RECOVERY_SECONDS
+    """
+    global _shared_limiter
+
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = TokenBucket(
+                rate=float(os.getenv('SCRAPER_RATE_PER_SECOND', 2)),
+                burst=int(os.getenv('SCRAPER_RATE_BURST', 5)),
+            )
+
+    breaker = CircuitBreaker(
+        domain,
+        failure_threshold=int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5)),
+        recovery_timeout=float(os.getenv('CIRCUIT_RECOVERY_SECONDS', 60)),
+        probe=probe,
+    )
+    return DomainGuard(domain, _shared_limiter, breaker, failure_exceptions)
+
+
+def circuit_states() -> Dict[str, Dict]:
+    """מצב כל המעגלים הידועים, לפי דומיין (עבור /api/health)"""
+    client = get_redis()
+    if client is not None:
+        try:
+            states = {}
+            for key in client.scan_iter(match=f"{CIRCUIT_KEY}*"):
+                raw = client.hgetall(key)
+                domain = key.decode()[len(CIRCUIT_KEY):]
+                states[domain] = _parse_state({name.decode(): value.decode() for name, value in raw.items()})
+            return states
+        except Exception as e:
+            logger.debug(f"Circuit states read failed: {e}")
+
+    with CircuitBreaker._local_lock:
+        return {domain: _parse_state(state) for domain, state in CircuitBreaker._local_states.items()}
+
+
+def _parse_state(raw: Dict) -> Dict:
+    return {
+        'state': raw.get('state', STATE_CLOSED),
+        'failures': int(raw.get('failures', 0)),
+        'opened_at': float(raw.get('opened_at', 0)),
+    }
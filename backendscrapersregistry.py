@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scraper Registry - גילוי כל ה-scrapers וחיפוש מקבילי בכל החנויות
+"""
+
+import os
+import time
+import inspect
+import logging
+import pkgutil
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterator, List, Optional
+
+from .base_scraper import BaseScraper
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = 'ok'
+STATUS_TIMEOUT = 'timeout'
+STATUS_ERROR = 'error'
+
+
+def discover_scraper_classes() -> List[type]:
+    """
+    ייבוא כל המודולים בחבילת scrapers והחזרת כל תתי-המחלקות
+    (הלא אבסטרקטיות) של BaseScraper
+
+    Raises:
+        ImportError: מודול scraper שנכשל בייבוא - חנות חסרה אינה מצב תקין
+    """
+    package = importlib.import_module(__package__)
+    for module in pkgutil.iter_modules(package.__path__):
+        try:
+            importlib.import_module(f"{__package__}.{module.name}")
+        except Exception as e:
+            logger.error(f"Failed to import scraper module {module.name}: {e}")
+            raise ImportError(f"Failed to import scraper module {module.name}: {e}") from e
+
+    classes = []
+    pending = list(BaseScraper.__subclasses__())
+    while pending:
+        cls = pending.pop(0)
+        pending.extend(cls.__subclasses__())
+        if not inspect.isabstract(cls) and cls not in classes:
+            classes.append(cls)
+    return classes
+
+
+class ScraperRegistry:
+    """
+    מופע אחד של כל scraper, לפי שם החנות.
+
+    search_stream מריץ search_product בכל החנויות במקביל ומחזיר כל חנות
+    ברגע שסיימה, כך שחנות איטית לא מעכבת את האחרות. לכל חנות תקציב
+    זמן משלה; חנות שחרגה ממנו מדווחת כ-timeout (ה-thread שלה ממשיך
+    ברקע עד שה-scraper מסיים).
+    """
+
+    def __init__(self, scrapers: Optional[Dict[str, BaseScraper]] = None,
+                 default_timeout: float = 30, timeouts: Optional[Dict[str, float]] = None,
+                 max_workers: Optional[int] = None):
+        self.scrapers = scrapers if scrapers is not None else self._instantiate(discover_scraper_classes())
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or max(len(self.scrapers), 1) * 2,
+            thread_name_prefix='store-search'
+        )
+
+    def stores(self) -> List[str]:
+        return list(self.scrapers)
+
+    def get(self, store: str) -> Optional[BaseScraper]:
+        return self.scrapers.get(store)
+
+    def timeout_for(self, store: str) -> float:
+        return self.timeouts.get(store, self.default_timeout)
+
+    def search_stream(self, query: str, max_results: int = 20,
+                      stores: Optional[List[str]] = None) -> Iterator[Dict]:
+        """
+        חיפוש מקבילי בכל החנויות
+
+        Args:
+            query: מחרוזת חיפוש
+            max_results: מספר תוצאות מקסימלי לכל חנות
+            stores: הגבלה לחנויות מסוימות (ברירת מחדל - כולן)
+
+        Yields:
+            לכל חנות, לפי סדר הסיום:
+            {'store', 'status', 'results', 'elapsed_ms', 'error'}
+        """
+        started = time.monotonic()
+        pending = {}
+        for store in stores or self.stores():
+            scraper = self.scrapers.get(store)
+            if scraper is None:
+                continue
+            future = self._executor.submit(self._timed_search, scraper, query, max_results)
+            pending[future] = (store, started + self.timeout_for(store))
+
+        while pending:
+            now = time.monotonic()
+            next_deadline = min(deadline for _, deadline in pending.values())
+            done, _ = wait(pending, timeout=max(next_deadline - now, 0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                store, _ = pending.pop(future)
+                try:
+                    results, elapsed = future.result()
+                    yield self._outcome(store, STATUS_OK, results, elapsed)
+                except Exception as e:
+                    logger.error(f"{store} search failed for '{query}': {e}")
+                    yield self._outcome(store, STATUS_ERROR, [], time.monotonic() - started, str(e))
+
+            now = time.monotonic()
+            for future, (store, deadline) in list(pending.items()):
+                if deadline <= now:
+                    pending.pop(future)
+                    future.cancel()
+                    logger.warning(f"{store} search timed out after {self.timeout_for(store)}s for '{query}'")
+                    yield self._outcome(store, STATUS_TIMEOUT, [], now - started, 'timeout')
+
+    def search_all(self, query: str, max_results: int = 20,
+                   stores: Optional[List[str]] = None) -> Dict:
+        """
+        חיפוש מקבילי בכל החנויות, עם המתנה לכולן (או לתקציב הזמן שלהן)
+
+        Returns:
+            {'results': כל התוצאות, 'stores': {store: {'status', 'count', 'elapsed_ms'}}}
+        """
+        results = []
+        report = {}
+        for outcome in self.search_stream(query, max_results, stores):
+            results.extend(outcome['results'])
+            report[outcome['store']] = {
+                'status': outcome['status'],
+                'count': len(outcome['results']),
+                'elapsed_ms': outcome['elapsed_ms'],
+            }
+        return {'results': results, 'stores': report}
+
+    @staticmethod
+    def _timed_search(scraper: BaseScraper, query: str, max_results: int):
+        started = time.monotonic()
+        results = scraper.search_product(query, max_results) or []
+        return results, time.monotonic() - started
+
+    @staticmethod
+    def _outcome(store: str, status: str, results: List[Dict], elapsed: float,
+                 error: Optional[str] = None) -> Dict:
+        return {
+            'store': store,
+            'status': status,
+            'results': results,
+            'elapsed_ms': int(elapsed * 1000),
+            'error': error,
+        }
+
+    @staticmethod
+    def _instantiate(classes: List[type]) -> Dict[str, BaseScraper]:
+        scrapers = {}
+        for cls in classes:
+            try:
+                scraper = cls()
+            except Exception as e:
+                logger.error(f"Failed to create scraper {cls.__name__}: {e}")
+                continue
+            scrapers[getattr(scraper, 'store_name', cls.__name__)] = scraper
+        logger.info(f"Registered scrapers: {', '.join(scrapers) or 'none'}")
+        return scrapers
+
+
+_shared_registry: Optional[ScraperRegistry] = None
+_shared_registry_lock = threading.Lock()
+
+
+def get_scraper_registry() -> ScraperRegistry:
+    """
+    Registry משותף לתהליך הנוכחי.
+
+    תקציב הזמן נקרא ממשתני סביבה: SCRAPER_SEARCH_TIMEOUT לכל החנויות,
+    ו-SCRAPER_SEARCH_TIMEOUT_<STORE> לחנות מסוימת (למשל SCRAPER_SEARCH_TIMEOUT_KSP)
+
+    Raises:
+        RuntimeError: אף scraper לא נרשם (חיפוש ועדכון מחירים היו הופכים לפעולות ריקות)
+    """
+    global _shared_registry
+
+    with _shared_registry_lock:
+        if _shared_registry is None:
+            registry = ScraperRegistry(default_timeout=float(os.getenv('SCRAPER_SEARCH_TIMEOUT', 30)))
+            if not registry.stores():
+                raise RuntimeError("No scrapers registered, check the scraper modules and their dependencies")
+            for store in registry.stores():
+                override = os.getenv(f"SCRAPER_SEARCH_TIMEOUT_{store.upper()}")
+                if override:
+                    registry.timeouts[store] = float(override)
+            _shared_registry = registry
+
+        return _shared_registry
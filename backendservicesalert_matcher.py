@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Alert Matcher - בדיקת כל ההתראות הפעילות מול batch של מחירים חדשים במעבר וקטורי אחד
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from flask import current_app
+from sqlalchemy.orm import joinedload
+
+from models.alert import Alert
+from services.notification_dispatcher import NotificationDispatcher, KIND_PRICE_ALERT
+
+logger = logging.getLogger(__name__)
+
+REASON_TARGET_PRICE = 'target_price'
+REASON_PERCENT_DROP = 'percent_drop'
+REASON_PRICE_CHANGE = 'price_change'
+
+
+def _setting_float(settings: Dict, *names) -> float:
+    for name in names:
+        value = settings.get(name)
+        if value not in (None, ''):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return np.nan
+    return np.nan
+
+
+class AlertMatcher:
+    """
+    ההתראות הפעילות נטענות פעם אחת למערכים עמודתיים (ממוינים לפי מוצר):
+    מזהה מוצר, מחיר יעד, אחוז ירידה ותפוגה. כל batch של מחירים נבדק
+    מול כל ההתראות במעבר NumPy אחד, ורק ההתאמות נכנסות לתור ההודעות.
+
+    הגדרות נתמכות ב-alert.settings:
+    target_price - התראה כשהמחיר יורד אל מתחת / שווה למחיר היעד
+    percent_drop - התראה על ירידה של לפחות X אחוז מהמחיר הקודם
+    instant_alerts - התראה על כל שינוי מחיר
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.alert_ids = np.empty(0, dtype=np.int64)
+        self.product_ids = np.empty(0, dtype=np.int64)
+        self.target_prices = np.empty(0, dtype=np.float64)
+        self.percent_drops = np.empty(0, dtype=np.float64)
+        self.instant = np.empty(0, dtype=bool)
+        self.expires_at = np.empty(0, dtype=np.float64)
+
+    def load(self) -> 'AlertMatcher':
+        """טעינת כל ההתראות הפעילות למערכים"""
+        now = datetime.utcnow()
+        rows = (
+            self.db.session.query(Alert.id, Alert.product_id, Alert.settings, Alert.expires_at)
+            .filter(Alert.is_active.is_(True))
+            .filter((Alert.expires_at.is_(None)) | (Alert.expires_at > now))
+            .order_by(Alert.product_id)
+            .all()
+        )
+        return self.load_rows(rows)
+
+    def load_rows(self, rows) -> 'AlertMatcher':
+        """
+        בניית המערכים משורות (id, product_id, settings, expires_at) ממוינות לפי מוצר
+        """
+        count = len(rows)
+        self.alert_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+        self.product_ids = np.fromiter((row[1] for row in rows), dtype=np.int64, count=count)
+        self.target_prices = np.fromiter(
+            (_setting_float(row[2] or {}, 'target_price', 'targetPrice') for row in rows),
+            dtype=np.float64, count=count
+        )
+        self.percent_drops = np.fromiter(
+            (_setting_float(row[2] or {}, 'percent_drop', 'percentDrop') for row in rows),
+            dtype=np.float64, count=count
+        )
+        self.instant = np.fromiter(
+            (bool((row[2] or {}).get('instant_alerts', (row[2] or {}).get('instantAlerts', False))) for row in rows),
+            dtype=bool, count=count
+        )
+        self.expires_at = np.fromiter(
+            (row[3].timestamp() if row[3] else np.inf for row in rows),
+            dtype=np.float64, count=count
+        )
+
+        logger.info(f"Loaded {count} active alerts for matching")
+        return self
+
+    def match(self, product_ids, new_prices, old_prices, now: Optional[datetime] = None) -> List[Dict]:
+        """
+        בדיקת batch של מחירים מול כל ההתראות
+
+        Args:
+            product_ids: מזהי המוצרים שהתעדכנו
+            new_prices: המחירים החדשים
+            old_prices: המחירים הקודמים (None כשאין)
+
+        Returns:
+            התאמות בלבד: {'alert_id', 'product_id', 'old_price', 'new_price', 'reason'}
+        """
+        if not len(self.alert_ids) or not len(product_ids):
+            return []
+
+        batch_products = np.asarray(product_ids, dtype=np.int64)
+        order = np.argsort(batch_products)
+        batch_products = batch_products[order]
+        batch_new = np.asarray(new_prices, dtype=np.float64)[order]
+        batch_old = np.array(
+            [np.nan if price is None else price for price in old_prices], dtype=np.float64
+        )[order]
+
+        # מיפוי כל התראה למחיר של המוצר שלה ב-batch (אם קיים)
+        position = np.searchsorted(batch_products, self.product_ids)
+        position = np.minimum(position, len(batch_products) - 1)
+        present = batch_products[position] == self.product_ids
+
+        new = batch_new[position]
+        old = batch_old[position]
+        timestamp = (now or datetime.utcnow()).timestamp()
+        live = present & (self.expires_at > timestamp)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            changed = new != old
+            # חציית מחיר היעד - לא שולחים שוב כל עוד המחיר נשאר מתחתיו
+            target_hit = (new <= self.target_prices) & ~(old <= self.target_prices)
+            drop_percent = (old - new) / old * 100
+            percent_hit = drop_percent >= self.percent_drops
+
+        fire_target = live & target_hit
+        fire_percent = live & percent_hit & ~fire_target
+        fire_change = live & changed & self.instant & ~fire_target & ~fire_percent
+
+        matches = []
+        for mask, reason in ((fire_target, REASON_TARGET_PRICE),
+                             (fire_percent, REASON_PERCENT_DROP),
+                             (fire_change, REASON_PRICE_CHANGE)):
+            for index in np.flatnonzero(mask):
+                matches.append({
+                    'alert_id': int(self.alert_ids[index]),
+                    'product_id': int(self.product_ids[index]),
+                    'old_price': None if np.isnan(old[index]) else float(old[index]),
+                    'new_price': float(new[index]),
+                    'reason': reason,
+                })
+        return matches
+
+    def notify(self, matches: List[Dict]) -> int:
+        """הכנסת התראות לתור עבור ההתאמות בלבד - טעינת כל ההתראות בשאילתה אחת"""
+        if not matches:
+            return 0
+
+        alerts = {
+            alert.id: alert
+            for alert in Alert.query.options(joinedload(Alert.user))
+            .filter(Alert.id.in_([match['alert_id'] for match in matches])).all()
+        }
+
+        dispatcher = NotificationDispatcher(current_app._get_current_object(), self.db)
+        queued = 0
+        for match in matches:
+            alert = alerts.get(match['alert_id'])
+            if not alert:
+                continue
+            dispatcher.enqueue(
+                KIND_PRICE_ALERT, alert.user, alert,
+                old_price=match['old_price'], new_price=match['new_price'], reason=match['reason']
+            )
+            queued += 1
+
+        logger.info(f"Queued {queued} price alerts")
+        return queued
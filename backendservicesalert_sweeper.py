@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Alert Sweeper - השבתת התראות שפג תוקפן, במנות
+"""
+
+import logging
+from datetime import datetime
+
+from sqlalchemy import text
+
+from models.alert import Alert
+from services.stats_snapshot import StatsSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+class AlertSweeper:
+    """
+    השבתה מרוכזת של התראות פעילות שעבר ה-expires_at שלהן,
+    כך שקבוצת ההתראות הפעילות תישאר ביחס להתראות החיות בלבד
+    """
+
+    def __init__(self, db, chunk_size: int = 1000):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def ensure_indexes(self):
+        """אינדקס חלקי על התראות פעילות לפי מוצר"""
+        table = Alert.__table__.name
+        dialect = self.db.engine.dialect.name
+
+        if dialect == 'sqlite':
+            predicate = 'is_active IS 1'
+        elif dialect == 'postgresql':
+            predicate = 'is_active'
+        else:
+            logger.warning(f"Partial indexes not supported on {dialect}")
+            return
+
+        self.db.session.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_active_product "
+            f"ON {table} (product_id, expires_at) WHERE {predicate}"
+        ))
+        self.db.session.commit()
+
+    def sweep(self) -> int:
+        """
+        השבתת כל ההתראות שפג תוקפן
+
+        Returns:
+            מספר ההתראות שהושבתו
+        """
+        total = 0
+
+        while True:
+            now = datetime.utcnow()
+            expired_ids = [
+                alert_id for (alert_id,) in
+                self.db.session.query(Alert.id)
+                .filter(Alert.is_active.is_(True), Alert.expires_at <= now)
+                .limit(self.chunk_size)
+                .all()
+            ]
+            if not expired_ids:
+                break
+
+            # התנאי על is_active חוזר ב-UPDATE - התראה שנעצרה בין ה-SELECT
+            # לעדכון (stop_tracking) לא תיספר פעמיים
+            deactivated = Alert.query.filter(
+                Alert.id.in_(expired_ids), Alert.is_active.is_(True)
+            ).update(
+                {Alert.is_active: False, Alert.stopped_at: now},
+                synchronize_session=False
+            )
+            self.db.session.commit()
+            total += deactivated
+
+            if len(expired_ids) < self.chunk_size:
+                break
+
+        if total:
+            StatsSnapshot(self.db).increment('active_alerts', -total)
+            logger.info(f"Deactivated {total} expired alerts")
+        return total
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Notification Dispatcher - שליחת הודעות מחוץ לבקשת ה-HTTP, ב-batches
+
+ההודעות נכנסות לתור (Redis, או תור בזיכרון התהליך), ונשלחות ע"י
+celery beat: כל ההודעות של אותו משתמש מאוחדות להודעת digest אחת, דרך
+חיבור SMTP אחד שנשמר לכל worker. משתמש עם טלפון מקבל בנוסף SMS דרך
+NotificationService, כמו קודם. כל ערוץ נשלח ונשלח שוב (backoff) בנפרד.
+
+לבדיקה מקומית:
+    python -m aiosmtpd -n -l localhost:1025
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_USE_TLS=false
+"""
+
+import os
+import json
+import time
+import uuid
+import smtplib
+import logging
+import threading
+from collections import defaultdict, deque
+from email.message import EmailMessage
+from typing import Dict, List, Optional
+
+from models.product import Product
+from models.user import User
+from models.alert import Alert
+from services.notification import NotificationService
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = 'notifications:queue'
+PROCESSING_KEY = 'notifications:processing'
+DISPATCH_LOCK_KEY = 'notifications:dispatch-lock'
+RETRY_KEY = 'notifications:retry'
+DEAD_KEY = 'notifications:dead'
+
+KIND_TRACKING_STARTED = 'tracking_started'
+KIND_TRACKING_STARTED_BULK = 'tracking_started_bulk'
+KIND_TRACKING_STOPPED = 'tracking_stopped'
+KIND_PRICE_ALERT = 'price_alert'
+
+CHANNEL_EMAIL = 'email'
+CHANNEL_SMS = 'sms'
+
+
+class SMTPConnection:
+    """
+    חיבור SMTP שנשמר פתוח בין שליחות, ונפתח מחדש רק כשהוא נופל
+    """
+
+    def __init__(self, host: str, port: int, use_tls: bool = True,
+                 username: Optional[str] = None, password: Optional[str] = None, timeout: float = 10):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def send(self, message: EmailMessage):
+        with self._lock:
+            try:
+                self._connection().send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                # החיבור נסגר ע"י השרת - ניסיון אחד עם חיבור חדש
+                self._conn = None
+                self._connection().send_message(message)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.quit()
+                except Exception:
+                    pass
+                self._conn = None
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._conn is not None:
+            try:
+                if self._conn.noop()[0] == 250:
+                    return self._conn
+            except smtplib.SMTPException:
+                pass
+            self._conn = None
+
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            conn.starttls()
+        if self.username:
+            conn.login(self.username, self.password)
+        self._conn = conn
+        return conn
+
+
+_smtp_connection: Optional[SMTPConnection] = None
+_smtp_lock = threading.Lock()
+
+
+def get_smtp_connection() -> SMTPConnection:
+    """חיבור SMTP אחד לכל תהליך worker"""
+    global _smtp_connection
+
+    with _smtp_lock:
+        if _smtp_connection is None:
+            _smtp_connection = SMTPConnection(
+                host=os.getenv('SMTP_HOST', 'localhost'),
+                port=int(os.getenv('SMTP_PORT', 587)),
+                use_tls=os.getenv('SMTP_USE_TLS', 'true').lower() == 'true',
+                username=os.getenv('SMTP_USER') or None,
+                password=os.getenv('SMTP_PASSWORD') or None,
+            )
+        return _smtp_connection
+
+
+class NotificationDispatcher:
+    """
+    תור הודעות עם שליחה מרוכזת, digest לכל משתמש ו-retry עם backoff
+    """
+
+    # תור מקומי משותף כאשר Redis אינו זמין
+    _local_queue = deque()
+    _local_retry = []
+    _local_lock = threading.Lock()
+    _flusher = None
+
+    def __init__(self, app, db, batch_size: int = 500, max_attempts: int = 5,
+                 base_delay: float = 30, flush_interval: float = 5, lock_ttl: int = 300):
+        self.app = app
+        self.db = db
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.flush_interval = flush_interval
+        self.lock_ttl = lock_ttl
+        self.sender = os.getenv('NOTIFY_FROM', 'alerts@pricetracker.co.il')
+
+    def enqueue(self, kind: str, user, alert, **details):
+        """
+        הכנסת הודעה לתור - לא שולח דבר בתוך הבקשה
+
+        Args:
+            kind: סוג ההודעה (tracking_started / tracking_stopped / price_alert)
+            user: המשתמש
+            alert: ההתראה
+            details: שדות נוספים (למשל old_price, new_price)
+        """
+        item = {
+            'kind': kind,
+            'user_id': user.id,
+            'email': user.email,
+            'phone': getattr(user, 'phone', None),
+            'alert_id': alert.id,
+            'product_id': alert.product_id,
+            'attempts': 0,
+            'created_at': time.time(),
+        }
+        item.update(details)
+        self._push([item])
+
+    def enqueue_bulk(self, kind: str, user, alert_ids: List[int], product_ids: List[int]):
+        """
+        הודעה אחת עבור רשימת התראות (למשל אישור מעקב מרוכז)
+
+        Args:
+            kind: סוג ההודעה (tracking_started_bulk)
+            user: המשתמש
+            alert_ids: מזהי ההתראות שנוצרו
+            product_ids: מזהי המוצרים, באותו סדר
+        """
+        self._push([{
+            'kind': kind,
+            'user_id': user.id,
+            'email': user.email,
+            'phone': getattr(user, 'phone', None),
+            'alert_id': alert_ids[0],
+            'product_id': product_ids[0],
+            'alert_ids': list(alert_ids),
+            'product_ids': list(product_ids),
+            'attempts': 0,
+            'created_at': time.time(),
+        }])
+
+    def dispatch(self) -> Dict:
+        """
+        שליחת batch אחד מהתור
+
+        ב-Redis ה-batch עובר לרשימת processing ונמחק ממנה רק אחרי שכל ההודעות
+        נשלחו או נקבעו לניסיון חוזר. dispatch אחד רץ בכל רגע (נעילה), ולכן
+        פריטים שנשארו ב-processing הם של הרצה שנפלה - הם חוזרים לראש התור.
+        מסירה היא at-least-once: נפילה באמצע שליחה עלולה לשלוח הודעה פעמיים.
+
+        Returns:
+            סיכום: כמה הודעות נשלחו, נדחו לניסיון חוזר או נכשלו סופית
+        """
+        summary = {'items': 0, 'messages': 0, 'retried': 0, 'dead': 0}
+        client = get_redis()
+        token = uuid.uuid4().hex
+        if client is not None and not client.set(DISPATCH_LOCK_KEY, token, nx=True, ex=self.lock_ttl):
+            return summary
+
+        try:
+            self._promote_due_retries()
+            items = self._pop_batch()
+            summary['items'] = len(items)
+            if items:
+                self._deliver(items, summary)
+            self._ack_batch()
+        finally:
+            if client is not None and client.get(DISPATCH_LOCK_KEY) == token.encode():
+                client.delete(DISPATCH_LOCK_KEY)
+
+        if items:
+            logger.info(f"Notification dispatch: {summary}")
+        return summary
+
+    def _deliver(self, items: List[Dict], summary: Dict):
+        with self.app.app_context():
+            product_names = self._product_names(
+                {product_id for item in items for product_id in item.get('product_ids', [item['product_id']])}
+            )
+
+            # פריט לכל ערוץ, כדי שכישלון בערוץ אחד לא ישלח שוב את השני
+            groups = defaultdict(list)
+            for item in items:
+                for channel in self._channels(item):
+                    recipient = item['email'] if channel == CHANNEL_EMAIL else item['user_id']
+                    groups[(channel, recipient)].append(dict(item, channel=channel))
+
+            for (channel, recipient), group in groups.items():
+                failed = group
+                try:
+                    if channel == CHANNEL_SMS:
+                        # SMS נשלח פריט-פריט - חוזרים רק על מה שנכשל
+                        failed = self._send_sms(group)
+                        summary['messages'] += len(group) - len(failed)
+                    else:
+                        get_smtp_connection().send(self._compose_digest(recipient, group, product_names))
+                        summary['messages'] += 1
+                        failed = []
+                except Exception as e:
+                    logger.warning(f"Notification delivery ({channel}) to {recipient} failed: {e}")
+
+                if failed:
+                    retried, dead = self._schedule_retry(failed)
+                    summary['retried'] += retried
+                    summary['dead'] += dead
+
+    def drain(self, max_batches: int = 20) -> Dict:
+        """שליחת batches עד שהתור מתרוקן (או עד max_batches)"""
+        total = {'items': 0, 'messages': 0, 'retried': 0, 'dead': 0}
+        for _ in range(max_batches):
+            summary = self.dispatch()
+            for key in total:
+                total[key] += summary[key]
+            if summary['items'] < self.batch_size:
+                break
+        return total
+
+    @staticmethod
+    def _channels(item: Dict) -> List[str]:
+        """ערוצי המסירה של פריט - ניסיון חוזר נשאר בערוץ שנכשל"""
+        if item.get('channel'):
+            return [item['channel']]
+
+        channels = []
+        if item.get('email'):
+            channels.append(CHANNEL_EMAIL)
+        # ללא אימייל - NotificationService הוא הערוץ היחיד, כמו קודם
+        if item.get('phone') or not item.get('email'):
+            channels.append(CHANNEL_SMS)
+        return channels
+
+    def _compose_digest(self, recipient: str, items: List[Dict], product_names: Dict[int, str]) -> EmailMessage:
+        lines = []
+        for item in items:
+            name = product_names.get(item['product_id'], f"מוצר #{item['product_id']}")
+            if item['kind'] == KIND_TRACKING_STARTED:
+                lines.append(f"✅ התחלנו לעקוב אחר {name}")
+            elif item['kind'] == KIND_TRACKING_STARTED_BULK:
+                names = [product_names.get(product_id, f"מוצר #{product_id}") for product_id in item['product_ids']]
+                lines.append(f"✅ התחלנו לעקוב אחר {len(names)} מוצרים:")
+                lines.extend(f"   • {product_name}" for product_name in names)
+            elif item['kind'] == KIND_TRACKING_STOPPED:
+                lines.append(f"⏹️ המעקב אחר {name} הופסק")
+            elif item['kind'] == KIND_PRICE_ALERT:
+                old_price = item.get('old_price')
+                change = f"מ-₪{old_price:,.0f} " if old_price else ""
+                lines.append(f"🔔 המחיר של {name} השתנה {change}ל-₪{item['new_price']:,.0f}")
+
+        message = EmailMessage()
+        message['Subject'] = (
+            f"מעקב מחירים - {len(items)} עדכונים" if len(items) > 1 else "מעקב מחירים - עדכון"
+        )
+        message['From'] = self.sender
+        message['To'] = recipient
+        message.set_content("\n".join(lines), charset='utf-8')
+        return message
+
+    def _send_sms(self, items: List[Dict]) -> List[Dict]:
+        """
+        ערוץ ה-SMS - שליחה דרך NotificationService, פריט-פריט
+
+        Returns:
+            הפריטים שנכשלו - רק הם נשלחים שוב
+        """
+        users, alerts = self._sms_targets(items)
+        notification_service = NotificationService()
+
+        failed = []
+        for item in items:
+            user, alert = users.get(item['user_id']), alerts.get(item['alert_id'])
+            if not user or not alert:
+                continue
+            try:
+                if item['kind'] in (KIND_TRACKING_STARTED, KIND_TRACKING_STARTED_BULK):
+                    # במעקב מרוכז - אישור אחד בלבד (על ההתראה הראשונה)
+                    notification_service.send_tracking_confirmation(user, alert)
+                elif item['kind'] == KIND_TRACKING_STOPPED:
+                    notification_service.send_tracking_stopped(user, alert)
+                elif item['kind'] == KIND_PRICE_ALERT:
+                    notification_service.send_price_alert(user, alert, item.get('old_price'), item['new_price'])
+            except Exception as e:
+                logger.warning(f"SMS notification for alert {item['alert_id']} failed: {e}")
+                failed.append(item)
+        return failed
+
+    @staticmethod
+    def _sms_targets(items: List[Dict]):
+        users = {user.id: user for user in User.query.filter(User.id.in_({i['user_id'] for i in items})).all()}
+        alerts = {alert.id: alert for alert in Alert.query.filter(Alert.id.in_({i['alert_id'] for i in items})).all()}
+        return users, alerts
+
+    def _product_names(self, product_ids) -> Dict[int, str]:
+        if not product_ids:
+            return {}
+        return dict(
+            self.db.session.query(Product.id, Product.name).filter(Product.id.in_(product_ids)).all()
+        )
+
+    def _schedule_retry(self, items: List[Dict]):
+        retry, dead = [], []
+        for item in items:
+            item['attempts'] += 1
+            if item['attempts'] >= self.max_attempts:
+                dead.append(item)
+            else:
+                item['not_before'] = time.time() + self.base_delay * (2 ** (item['attempts'] - 1))
+                retry.append(item)
+
+        client = get_redis()
+        if client is not None:
+            pipeline = client.pipeline()
+            for item in retry:
+                pipeline.zadd(RETRY_KEY, {json.dumps(item, ensure_ascii=False): item['not_before']})
+            for item in dead:
+                pipeline.rpush(DEAD_KEY, json.dumps(item, ensure_ascii=False))
+            pipeline.execute()
+        else:
+            with self._local_lock:
+                self._local_retry.extend(retry)
+
+        if dead:
+            logger.error(f"Dropping {len(dead)} notifications after {self.max_attempts} attempts")
+        return len(retry), len(dead)
+
+    def _push(self, items: List[Dict]):
+        client = get_redis()
+        if client is not None:
+            try:
+                client.rpush(QUEUE_KEY, *[json.dumps(item, ensure_ascii=False) for item in items])
+                return
+            except Exception as e:
+                logger.warning(f"Notification queue unavailable, using local queue: {e}")
+
+        with self._local_lock:
+            self._local_queue.extend(items)
+        self._ensure_local_flusher()
+
+    def _pop_batch(self) -> List[Dict]:
+        client = get_redis()
+        if client is not None:
+            # שאריות של dispatch שנפל באמצע - חוזרות לראש התור, לפני הודעות חדשות
+            while client.lmove(PROCESSING_KEY, QUEUE_KEY, 'RIGHT', 'LEFT') is not None:
+                pass
+
+            pipeline = client.pipeline()
+            for _ in range(self.batch_size):
+                pipeline.lmove(QUEUE_KEY, PROCESSING_KEY, 'LEFT', 'RIGHT')
+            items = [json.loads(raw) for raw in pipeline.execute() if raw is not None]
+        else:
+            items = []
+
+        with self._local_lock:
+            while self._local_queue and len(items) < self.batch_size:
+                items.append(self._local_queue.popleft())
+        return items
+
+    def _ack_batch(self):
+        """ה-batch טופל (נשלח או נקבע לניסיון חוזר) - מחיקתו מרשימת ה-processing"""
+        client = get_redis()
+        if client is not None:
+            client.delete(PROCESSING_KEY)
+
+    def _promote_due_retries(self):
+        now = time.time()
+        client = get_redis()
+        if client is not None:
+            due = client.zrangebyscore(RETRY_KEY, 0, now)
+            if due:
+                pipeline = client.pipeline()
+                pipeline.zrem(RETRY_KEY, *due)
+                pipeline.rpush(QUEUE_KEY, *due)
+                pipeline.execute()
+
+        with self._local_lock:
+            due = [item for item in self._local_retry if item['not_before'] <= now]
+            if due:
+                self._local_retry[:] = [item for item in self._local_retry if item['not_before'] > now]
+                self._local_queue.extend(due)
+
+    def _ensure_local_flusher(self):
+        """ללא Redis אין celery - שליחה מהתור המקומי ב-thread רקע"""
+        with self._local_lock:
+            if NotificationDispatcher._flusher is not None:
+                return
+
+            def flush_forever():
+                while True:
+                    time.sleep(self.flush_interval)
+                    try:
+                        self.drain()
+                    except Exception as e:
+                        logger.error(f"Local notification flush failed: {e}")
+
+            NotificationDispatcher._flusher = threading.Thread(
+                target=flush_forever, name='notification-flusher', daemon=True
+            )
+            NotificationDispatcher._flusher.start()
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Price Series - אחסון היסטוריית מחירים בשכבות: נקודות גולמיות,
+סיכומים שעתיים וסיכומים יומיים (min/max/last)
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import (
+    Column, DateTime, Float, Integer, MetaData, String, Table, and_, delete, func, or_, select
+)
+
+from models.price_history import PriceHistory
+
+logger = logging.getLogger(__name__)
+
+RESOLUTION_RAW = 'raw'
+RESOLUTION_HOUR = 'hour'
+RESOLUTION_DAY = 'day'
+
+_metadata = MetaData()
+
+price_rollups = Table(
+    'price_history_rollups', _metadata,
+    Column('product_id', Integer, primary_key=True),
+    Column('resolution', String(8), primary_key=True),
+    Column('bucket_start', DateTime, primary_key=True),
+    Column('min_price', Float, nullable=False),
+    Column('max_price', Float, nullable=False),
+    Column('last_price', Float, nullable=False),
+    Column('samples', Integer, nullable=False, default=0),
+)
+
+
+def floor_time(value: datetime, resolution: str) -> datetime:
+    """תחילת הדלי (שעה/יום) שאליו שייך הזמן"""
+    if resolution == RESOLUTION_DAY:
+        return value.replace(hour=0, minute=0, second=0, microsecond=0)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def bucket_size(resolution: str) -> timedelta:
+    return timedelta(days=1) if resolution == RESOLUTION_DAY else timedelta(hours=1)
+
+
+def last_recorded_prices(db, product_ids) -> Dict[int, Optional[float]]:
+    """
+    המחיר האחרון שנרשם בהיסטוריה לכל מוצר - הנקודה הגולמית האחרונה, ואם
+    הנקודות כבר נמחקו (שמירה בשכבות) ה-last של הדלי המסוכם האחרון.
+
+    Product.price אינו מתאים להשוואה: חיפושים מעדכנים אותו בלי לכתוב היסטוריה.
+    """
+    if not product_ids:
+        return {}
+    product_ids = list(product_ids)
+
+    latest = (
+        db.session.query(PriceHistory.product_id, func.max(PriceHistory.created_at).label('created_at'))
+        .filter(PriceHistory.product_id.in_(product_ids))
+        .group_by(PriceHistory.product_id)
+        .subquery()
+    )
+    prices = dict(
+        db.session.query(PriceHistory.product_id, PriceHistory.price)
+        .join(latest, and_(PriceHistory.product_id == latest.c.product_id,
+                           PriceHistory.created_at == latest.c.created_at))
+        .all()
+    )
+
+    missing = [product_id for product_id in product_ids if product_id not in prices]
+    if missing:
+        c = price_rollups.c
+        latest_bucket = (
+            select(c.product_id, func.max(c.bucket_start).label('bucket_start'))
+            .where(c.product_id.in_(missing))
+            .group_by(c.product_id)
+            .subquery()
+        )
+        rows = db.session.execute(
+            select(c.product_id, c.last_price)
+            .join(latest_bucket, and_(c.product_id == latest_bucket.c.product_id,
+                                      c.bucket_start == latest_bucket.c.bucket_start))
+        )
+        prices.update({product_id: last_price for product_id, last_price in rows})
+
+    return {product_id: prices.get(product_id) for product_id in product_ids}
+
+
+def filter_changed_prices(rows: List[Dict], previous: Dict[int, Optional[float]]) -> List[Dict]:
+    """
+    השארת שורות PriceHistory רק כאשר המחיר השתנה מהמחיר האחרון שנרשם
+    למוצר (run-length: מחיר זהה ברצף לא נשמר שוב)
+    """
+    return [row for row in rows if previous.get(row['product_id']) != row['price']]
+
+
+class PriceSeries:
+    """
+    מדיניות שמירה בשכבות עבור PriceHistory:
+
+    - נקודות גולמיות (רק שינויי מחיר) עבור raw_days אחרונים
+    - סיכומים שעתיים עבור hourly_days אחרונים
+    - סיכומים יומיים ללא הגבלה
+    """
+
+    def __init__(self, db, raw_days: int = 7, hourly_days: int = 90):
+        self.db = db
+        self.raw_days = raw_days
+        self.hourly_days = hourly_days
+
+    def ensure_schema(self):
+        """יצירת טבלת הסיכומים אם אינה קיימת"""
+        _metadata.create_all(bind=self.db.engine, tables=[price_rollups], checkfirst=True)
+
+    def rollup(self, now: Optional[datetime] = None) -> Dict:
+        """
+        סיכום נקודות גולמיות לשעות ושעות לימים (רק דליים שנסגרו),
+        ואז מחיקת נתונים שעברו את חלון השמירה
+        """
+        now = now or datetime.utcnow()
+        summary = {
+            'hourly': self._rollup_raw(floor_time(now, RESOLUTION_HOUR)),
+            'daily': self._rollup_hourly(floor_time(now, RESOLUTION_DAY)),
+        }
+        summary.update(self._apply_retention(now))
+
+        logger.info(f"Price history rollup: {summary}")
+        return summary
+
+    def history(self, product_id: int, resolution: str = RESOLUTION_HOUR,
+                since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict]:
+        """
+        היסטוריית מחירים של מוצר ברזולוציה נבחרת
+
+        Args:
+            product_id: מזהה מוצר
+            resolution: raw / hour / day
+            since, until: טווח זמן (אופציונלי)
+
+        Returns:
+            רשימת נקודות {'timestamp', 'min', 'max', 'last'} לפי סדר זמן
+        """
+        until = until or datetime.utcnow()
+
+        if resolution == RESOLUTION_RAW:
+            return [
+                {'timestamp': created_at.isoformat(), 'min': price, 'max': price, 'last': price}
+                for created_at, price in self._raw_points(product_id, since, until)
+            ]
+
+        return [
+            {'timestamp': point['bucket_start'].isoformat(), 'min': point['min'],
+             'max': point['max'], 'last': point['last']}
+            for point in self._series(product_id, resolution, since, until)
+        ]
+
+    def _series(self, product_id: int, resolution: str,
+                since: Optional[datetime], until: datetime) -> List[Dict]:
+        """
+        דליים שמורים, ואחריהם זנב שעדיין לא סוכם - נבנה מהשכבה העדינה יותר.
+        המחיר נמשך קדימה לדליים ללא שינוי, כמו בסיכומים השמורים.
+        """
+        points = self._stored_buckets(product_id, resolution, since, until)
+        covered_until = points[-1]['bucket_start'] + bucket_size(resolution) if points else since
+
+        if resolution == RESOLUTION_DAY:
+            tail = self._series(product_id, RESOLUTION_HOUR, covered_until, until)
+        else:
+            tail = [
+                {'bucket_start': created_at, 'min': price, 'max': price, 'last': price}
+                for created_at, price in self._raw_points(product_id, covered_until, until)
+            ]
+        points.extend(tail)
+
+        start = since or (points[0]['bucket_start'] if points else None)
+        if start is None:
+            return []
+        start = floor_time(start, resolution)
+
+        previous = self._price_before(product_id, start)
+        buckets = self._aggregate(
+            ((product_id, point['bucket_start'], point['min'], point['max'], point['last'], 0) for point in points),
+            resolution, start, until,
+            {product_id: previous} if previous is not None else {}
+        )
+        return [
+            {'bucket_start': bucket['bucket_start'], 'min': bucket['min_price'],
+             'max': bucket['max_price'], 'last': bucket['last_price']}
+            for bucket in buckets
+        ]
+
+    def _rollup_raw(self, closed_until: datetime) -> int:
+        start = self._watermark(RESOLUTION_HOUR)
+        if start is None:
+            start = self.db.session.query(func.min(PriceHistory.created_at)).scalar()
+            if start is None:
+                return 0
+            start = floor_time(start, RESOLUTION_HOUR)
+
+        written = 0
+        carried = self._carried_prices(RESOLUTION_HOUR, start)
+        # עיבוד ביממות כדי שהרצה ראשונה על טבלה גדולה לא תטען הכול לזיכרון
+        while start < closed_until:
+            end = min(start + timedelta(days=1), closed_until)
+            rows = (
+                self.db.session.query(PriceHistory.product_id, PriceHistory.created_at, PriceHistory.price)
+                .filter(PriceHistory.created_at >= start, PriceHistory.created_at < end)
+                .order_by(PriceHistory.product_id, PriceHistory.created_at)
+                .yield_per(5000)
+            )
+            buckets = self._aggregate(
+                ((product_id, created_at, price, price, price, 1) for product_id, created_at, price in rows),
+                RESOLUTION_HOUR, start, end, carried
+            )
+            written += self._replace_buckets(RESOLUTION_HOUR, start, end, buckets)
+            carried.update((bucket['product_id'], bucket['last_price']) for bucket in buckets)
+            start = end
+
+        return written
+
+    def _rollup_hourly(self, closed_until: datetime) -> int:
+        start = self._watermark(RESOLUTION_DAY)
+        if start is None:
+            start = self.db.session.query(func.min(price_rollups.c.bucket_start)).filter(
+                price_rollups.c.resolution == RESOLUTION_HOUR
+            ).scalar()
+            if start is None:
+                return 0
+            start = floor_time(start, RESOLUTION_DAY)
+
+        c = price_rollups.c
+        written = 0
+        carried = self._carried_prices(RESOLUTION_DAY, start)
+        while start < closed_until:
+            end = min(start + timedelta(days=1), closed_until)
+            rows = self.db.session.execute(
+                select(c.product_id, c.bucket_start, c.min_price, c.max_price, c.last_price, c.samples)
+                .where(c.resolution == RESOLUTION_HOUR, c.bucket_start >= start, c.bucket_start < end)
+                .order_by(c.product_id, c.bucket_start)
+            )
+            buckets = self._aggregate(rows, RESOLUTION_DAY, start, end, carried)
+            written += self._replace_buckets(RESOLUTION_DAY, start, end, buckets)
+            carried.update((bucket['product_id'], bucket['last_price']) for bucket in buckets)
+            start = end
+
+        return written
+
+    def _apply_retention(self, now: datetime) -> Dict:
+        c = price_rollups.c
+        hourly_watermark = self._watermark(RESOLUTION_HOUR)
+        daily_watermark = self._watermark(RESOLUTION_DAY)
+
+        # לא מוחקים נקודות שעדיין לא סוכמו
+        raw_cutoff = now - timedelta(days=self.raw_days)
+        raw_cutoff = min(raw_cutoff, hourly_watermark) if hourly_watermark else None
+        hourly_cutoff = now - timedelta(days=self.hourly_days)
+        hourly_cutoff = min(hourly_cutoff, daily_watermark) if daily_watermark else None
+
+        removed = {'raw_removed': 0, 'hourly_removed': 0}
+        if raw_cutoff:
+            removed['raw_removed'] = PriceHistory.query.filter(
+                PriceHistory.created_at < raw_cutoff
+            ).delete(synchronize_session=False)
+        if hourly_cutoff:
+            removed['hourly_removed'] = self.db.session.execute(
+                delete(price_rollups).where(c.resolution == RESOLUTION_HOUR, c.bucket_start < hourly_cutoff)
+            ).rowcount
+
+        self.db.session.commit()
+        return removed
+
+    @staticmethod
+    def _aggregate(rows, resolution: str, start: datetime, end: datetime,
+                   carried: Optional[Dict[int, float]] = None) -> List[Dict]:
+        """
+        צבירת שורות (product_id, time, min, max, last, samples) ממוינות לפי מוצר וזמן
+        לדליים בטווח [start, end).
+
+        PriceHistory שומר רק שינויי מחיר, ולכן כל דלי מתחיל במחיר שנמשך מלפניו
+        (carried - המחיר האחרון של כל מוצר לפני start), ודלי ללא שינויים מקבל
+        את המחיר הזה עם samples=0.
+        """
+        carried = carried or {}
+        changes = {}
+        for row in rows:
+            changes.setdefault(row[0], []).append(row)
+
+        size = bucket_size(resolution)
+        buckets = []
+        for product_id in sorted(set(carried) | set(changes)):
+            price = carried.get(product_id)
+            pending = changes.get(product_id, [])
+            index = 0
+            bucket_start = start
+            while bucket_start < end:
+                bucket_end = bucket_start + size
+                bucket = None
+                if price is not None:
+                    bucket = {
+                        'product_id': product_id, 'resolution': resolution, 'bucket_start': bucket_start,
+                        'min_price': price, 'max_price': price, 'last_price': price, 'samples': 0,
+                    }
+
+                while index < len(pending) and pending[index][1] < bucket_end:
+                    _, _, min_price, max_price, last_price, samples = pending[index]
+                    index += 1
+                    if bucket is None:
+                        bucket = {
+                            'product_id': product_id, 'resolution': resolution, 'bucket_start': bucket_start,
+                            'min_price': min_price, 'max_price': max_price,
+                            'last_price': last_price, 'samples': samples,
+                        }
+                    else:
+                        bucket['min_price'] = min(bucket['min_price'], min_price)
+                        bucket['max_price'] = max(bucket['max_price'], max_price)
+                        bucket['last_price'] = last_price
+                        bucket['samples'] += samples
+                    price = last_price
+
+                if bucket is not None:
+                    buckets.append(bucket)
+                bucket_start = bucket_end
+        return buckets
+
+    def _carried_prices(self, resolution: str, start: datetime) -> Dict[int, float]:
+        """
+        המחיר האחרון של כל מוצר לפני start: ה-last של הדלי הקודם, ובסיכום
+        השעתי הנקודה הגולמית האחרונה לפני start (קיימת גם בהרצה הראשונה)
+        """
+        c = price_rollups.c
+        carried = dict(self.db.session.execute(
+            select(c.product_id, c.last_price)
+            .where(c.resolution == resolution, c.bucket_start == start - bucket_size(resolution))
+        ).all())
+
+        if resolution == RESOLUTION_HOUR:
+            latest = (
+                self.db.session.query(PriceHistory.product_id, func.max(PriceHistory.created_at).label('created_at'))
+                .filter(PriceHistory.created_at < start)
+                .group_by(PriceHistory.product_id)
+                .subquery()
+            )
+            carried.update(
+                self.db.session.query(PriceHistory.product_id, PriceHistory.price)
+                .join(latest, and_(PriceHistory.product_id == latest.c.product_id,
+                                   PriceHistory.created_at == latest.c.created_at))
+                .all()
+            )
+        else:
+            carried.update(self.db.session.execute(
+                select(c.product_id, c.last_price)
+                .where(c.resolution == RESOLUTION_HOUR, c.bucket_start == start - bucket_size(RESOLUTION_HOUR))
+            ).all())
+
+        return carried
+
+    def _price_before(self, product_id: int, before: datetime) -> Optional[float]:
+        """המחיר האחרון של מוצר לפני זמן נתון - מהנקודות הגולמיות, ואם נמחקו מהסיכומים"""
+        price = (
+            self.db.session.query(PriceHistory.price)
+            .filter(PriceHistory.product_id == product_id, PriceHistory.created_at < before)
+            .order_by(PriceHistory.created_at.desc())
+            .limit(1)
+            .scalar()
+        )
+        if price is not None:
+            return price
+
+        c = price_rollups.c
+        return self.db.session.execute(
+            select(c.last_price)
+            .where(c.product_id == product_id, or_(
+                and_(c.resolution == RESOLUTION_HOUR, c.bucket_start <= before - bucket_size(RESOLUTION_HOUR)),
+                and_(c.resolution == RESOLUTION_DAY, c.bucket_start <= before - bucket_size(RESOLUTION_DAY)),
+            ))
+            .order_by(c.bucket_start.desc())
+            .limit(1)
+        ).scalar()
+
+    def _replace_buckets(self, resolution: str, start: datetime, end: datetime, buckets: List[Dict]) -> int:
+        """החלפת הדליים בטווח - הרצה חוזרת אינה יוצרת כפילויות"""
+        c = price_rollups.c
+        self.db.session.execute(
+            delete(price_rollups).where(c.resolution == resolution, c.bucket_start >= start, c.bucket_start < end)
+        )
+        if buckets:
+            self.db.session.execute(price_rollups.insert(), buckets)
+        self.db.session.commit()
+        return len(buckets)
+
+    def _watermark(self, resolution: str) -> Optional[datetime]:
+        """סוף הדלי האחרון שכבר סוכם ברזולוציה זו"""
+        last = self.db.session.query(func.max(price_rollups.c.bucket_start)).filter(
+            price_rollups.c.resolution == resolution
+        ).scalar()
+        return last + bucket_size(resolution) if last else None
+
+    def _raw_points(self, product_id: int, since: Optional[datetime], until: datetime):
+        query = self.db.session.query(PriceHistory.created_at, PriceHistory.price).filter(
+            PriceHistory.product_id == product_id, PriceHistory.created_at < until
+        )
+        if since:
+            query = query.filter(PriceHistory.created_at >= since)
+        return query.order_by(PriceHistory.created_at).all()
+
+    def _stored_buckets(self, product_id: int, resolution: str,
+                        since: Optional[datetime], until: datetime) -> List[Dict]:
+        c = price_rollups.c
+        conditions = [c.product_id == product_id, c.resolution == resolution, c.bucket_start < until]
+        if since:
+            conditions.append(c.bucket_start >= floor_time(since, resolution))
+
+        rows = self.db.session.execute(
+            select(c.bucket_start, c.min_price, c.max_price, c.last_price)
+            .where(and_(*conditions))
+            .order_by(c.bucket_start)
+        )
+        return [
+            {'bucket_start': bucket_start, 'min': min_price, 'max': max_price, 'last': last_price}
+            for bucket_start, min_price, max_price, last_price in rows
+        ]
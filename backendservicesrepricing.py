@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Re-pricing Engine - עדכון מחירים מרוכז לכל המוצרים במעקב פעיל
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from models.product import Product
+from models.alert import Alert
+from models.price_history import PriceHistory
+from scrapers.registry import get_scraper_registry
+from scrapers.http_client import commit_page_state
+from services.stats_snapshot import StatsSnapshot
+from services.price_series import filter_changed_prices, last_recorded_prices
+from services.alert_matcher import AlertMatcher
+
+logger = logging.getLogger(__name__)
+
+
+class RepricingEngine:
+    """
+    עדכון מחירים לכל ה-URLs שיש עליהם התראה פעילה.
+
+    כל URL נשלף פעם אחת בלבד, גם אם משתמשים רבים עוקבים אחריו.
+    ה-URLs מחולקים ל-batches, כל batch נשלף במקביל ונכתב
+    ל-PriceHistory בהכנסה מרוכזת אחת.
+    הגבלת הקצב לכל חנות נעשית ב-scraper עצמו (DomainGuard, משותף לכל ה-workers).
+    """
+
+    def __init__(self, db, scrapers: Optional[Dict] = None, batch_size: Optional[int] = None,
+                 max_workers: Optional[int] = None):
+        self.db = db
+        self.scrapers = scrapers or get_scraper_registry().scrapers
+        self.batch_size = batch_size or int(os.getenv('REPRICING_BATCH_SIZE', 200))
+        self.max_workers = max_workers or int(os.getenv('REPRICING_MAX_WORKERS', 8))
+        self.alert_matcher = None
+
+    def collect_targets(self) -> Dict[str, Dict]:
+        """
+        כל ה-URLs של מוצרים עם התראה פעילה, ללא כפילויות
+
+        Returns:
+            URL -> {'store', 'product_ids'}
+        """
+        rows = (
+            self.db.session.query(Product.id, Product.url, Product.store)
+            .join(Alert, Alert.product_id == Product.id)
+            .filter(Alert.is_active.is_(True), Product.url.isnot(None))
+            .distinct()
+            .all()
+        )
+
+        targets = {}
+        for product_id, url, store in rows:
+            target = targets.setdefault(url, {'store': store, 'product_ids': []})
+            target['product_ids'].append(product_id)
+
+        return targets
+
+    def run(self) -> Dict:
+        """
+        הרצת סבב עדכון מחירים מלא
+
+        Returns:
+            סיכום הסבב
+        """
+        started = time.monotonic()
+        targets = self.collect_targets()
+        urls = list(targets)
+
+        summary = {'urls': len(urls), 'changed': 0, 'unchanged': 0, 'failed': 0, 'batches': 0}
+
+        # ההתראות הפעילות נטענות פעם אחת לכל הסבב
+        self.alert_matcher = AlertMatcher(self.db).load()
+
+        for batch in chunked(urls, self.batch_size):
+            prices = self.fetch_batch({url: targets[url] for url in batch})
+
+            # עמודים שלא השתנו מאז הבדיקה הקודמת (304 / אותה טביעת אצבע) לא נכתבים
+            unchanged = [url for url, result in prices.items() if result.get('unchanged')]
+            summary['unchanged'] += len(unchanged)
+            summary['failed'] += len(batch) - len(prices)
+
+            summary['changed'] += self.write_batch(
+                {url: result for url, result in prices.items() if not result.get('unchanged')}, targets
+            )
+            summary['batches'] += 1
+
+        summary['duration_seconds'] = round(time.monotonic() - started, 2)
+        logger.info(f"Re-pricing finished: {summary}")
+        return summary
+
+    def fetch_batch(self, batch: Dict[str, Dict]) -> Dict[str, Dict]:
+        """
+        שליפה מקבילית של מחירים עבור batch אחד
+
+        Returns:
+            URL -> {'price', 'availability', ...} רק עבור URLs שהצליחו
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                url: executor.submit(self._fetch_one, url, target['store'])
+                for url, target in batch.items()
+            }
+
+        results = {url: future.result() for url, future in futures.items()}
+        return {url: result for url, result in results.items() if result}
+
+    def write_batch(self, prices: Dict[str, Dict], targets: Dict[str, Dict]) -> int:
+        """
+        כתיבת מחירי batch ל-PriceHistory ועדכון מחיר המוצר - טרנזקציה אחת.
+        נשמרים רק מחירים שהשתנו מהמחיר האחרון שנרשם בהיסטוריה.
+        מצב העמודים (ETag / טביעת אצבע) נשמר רק אחרי שהכתיבה הצליחה.
+        """
+        if not prices:
+            return 0
+
+        now = datetime.utcnow()
+        history_rows = [
+            {'product_id': product_id, 'price': result['price'], 'created_at': now}
+            for url, result in prices.items()
+            for product_id in targets[url]['product_ids']
+        ]
+
+        previous = last_recorded_prices(self.db, {row['product_id'] for row in history_rows})
+        history_rows = filter_changed_prices(history_rows, previous)
+
+        if history_rows:
+            product_rows = [{'id': row['product_id'], 'price': row['price']} for row in history_rows]
+
+            try:
+                self.db.session.bulk_insert_mappings(PriceHistory, history_rows)
+                self.db.session.bulk_update_mappings(Product, product_rows)
+                self.db.session.commit()
+            except Exception as e:
+                self.db.session.rollback()
+                logger.error(f"Failed to write re-pricing batch: {e}")
+                return 0
+
+            StatsSnapshot(self.db).increment('price_updates_today', len(history_rows))
+
+        for url, result in prices.items():
+            commit_page_state(url, result)
+
+        if not history_rows:
+            return 0
+
+        if self.alert_matcher is not None:
+            matches = self.alert_matcher.match(
+                [row['product_id'] for row in history_rows],
+                [row['price'] for row in history_rows],
+                [previous.get(row['product_id']) for row in history_rows]
+            )
+            self.alert_matcher.notify(matches)
+
+        return len(history_rows)
+
+    def _fetch_one(self, url: str, store: str) -> Optional[Dict]:
+        scraper = self.scrapers.get(store)
+        if not scraper:
+            logger.warning(f"No scraper registered for store {store}")
+            return None
+
+        try:
+            return scraper.check_price_and_availability(url)
+        except Exception as e:
+            logger.error(f"Re-pricing fetch failed for {url}: {e}")
+            return None
+
+
+def chunked(items: List, size: int):
+    """חלוקת רשימה לקבוצות בגודל קבוע"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Search Cache - מטמון תוצאות חיפוש עם TTL ורענון ברקע (stale-while-revalidate)
+"""
+
+import json
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from utils.hebrew_utils import normalize_hebrew_text
+from utils.redis_client import get_redis, reset_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'search_cache:'
+STATS_KEY = 'search_cache:stats'
+
+
+def normalize_query(query: str) -> str:
+    """נרמול שאילתה למפתח מטמון - עברית, רישיות ורווחים"""
+    return ' '.join(normalize_hebrew_text(query).lower().split())
+
+
+class LRUStore:
+    """
+    מטמון LRU בזיכרון התהליך - גיבוי כאשר Redis לא זמין
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Dict, expire_seconds: int):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class SearchCache:
+    """
+    מטמון לתוצאות /api/search.
+
+    מפתח: (שאילתה מנורמלת, קטגוריה, דלי מחיר מקסימלי).
+    רשומה טרייה מוחזרת כמו שהיא; רשומה ישנה (עד stale_ttl אחרי ה-TTL)
+    מוחזרת מיד ומרועננת ברקע; אחרת התוצאות נטענות באופן סינכרוני.
+    תוצאה ריקה נשמרת ל-empty_ttl בלבד ואינה מוגשת כישנה - אחרת כל בקשה
+    לשאילתה שלא נמצאה הייתה מוגשת ריקה ושולחת scraping חדש במשך stale_ttl.
+    """
+
+    def __init__(self, ttl: int = 300, stale_ttl: int = 3600, empty_ttl: int = 60,
+                 price_bucket: int = 100, max_entries: int = 1000):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.empty_ttl = empty_ttl
+        self.price_bucket = price_bucket
+        self.local = LRUStore(max_entries)
+
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'errors': 0}
+
+    def get_or_load(self, query: str, category: str, max_price,
+                    loader: Callable[[str, str, Optional[float]], List[Dict]]) -> List[Dict]:
+        """
+        תוצאות חיפוש מהמטמון, או מה-loader כאשר אין רשומה שמישה
+
+        Args:
+            query: מחרוזת החיפוש
+            category: קטגוריה (אופציונלי)
+            max_price: מחיר מקסימלי (אופציונלי)
+            loader: פונקציה (query, category, bucket_price) שמחזירה רשימת מוצרים כ-dict
+
+        Returns:
+            רשימת מוצרים מסוננת לפי max_price
+        """
+        bucket_price = self.price_bucket_for(max_price)
+        key = self.make_key(query, category, bucket_price)
+        entry = self._read(key)
+        now = time.time()
+
+        if entry is not None:
+            age = now - entry['created_at']
+            fresh_for = self.ttl if entry['results'] else self.empty_ttl
+
+            if age < fresh_for:
+                self._count('hits')
+                return self.filter_price(entry['results'], max_price)
+
+            if entry['results'] and age < fresh_for + self.stale_ttl:
+                self._count('stale_hits')
+                self._refresh_in_background(key, query, category, bucket_price, loader)
+                return self.filter_price(entry['results'], max_price)
+
+        self._count('misses')
+        results = loader(query, category, bucket_price)
+        self._write(key, results)
+        return self.filter_price(results, max_price)
+
+    def make_key(self, query: str, category: str, bucket_price: Optional[float]) -> str:
+        bucket = '' if bucket_price is None else str(int(bucket_price))
+        return f"{KEY_PREFIX}{normalize_query(query)}|{(category or '').strip().lower()}|{bucket}"
+
+    def price_bucket_for(self, max_price) -> Optional[float]:
+        """עיגול המחיר המקסימלי כלפי מעלה לדלי, כדי ששאילתות קרובות ישתפו רשומה"""
+        if max_price in (None, ''):
+            return None
+        try:
+            max_price = float(max_price)
+        except (TypeError, ValueError):
+            return None
+        return math.ceil(max_price / self.price_bucket) * self.price_bucket
+
+    def stats(self) -> Dict:
+        """מוני פגיעות/החטאות - מצטברים ב-Redis כשזמין"""
+        with self._lock:
+            stats = dict(self._counters)
+
+        client = get_redis()
+        if client is not None:
+            try:
+                shared = client.hgetall(STATS_KEY)
+                stats = {name.decode(): int(value) for name, value in shared.items()}
+            except Exception:
+                pass
+
+        lookups = stats.get('hits', 0) + stats.get('stale_hits', 0) + stats.get('misses', 0)
+        stats['hit_ratio'] = round((lookups - stats.get('misses', 0)) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def _refresh_in_background(self, key: str, query: str, category: str,
+                               bucket_price: Optional[float], loader: Callable):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        # נעילה משותפת כדי שרק worker אחד ירענן את אותה רשומה
+        client = get_redis()
+        if client is not None:
+            try:
+                if not client.set(f"{key}:refreshing", 1, nx=True, ex=60):
+                    with self._lock:
+                        self._refreshing.discard(key)
+                    return
+            except Exception:
+                pass
+
+        def refresh():
+            try:
+                self._write(key, loader(query, category, bucket_price))
+                self._count('refreshes')
+            except Exception as e:
+                self._count('errors')
+                logger.error(f"Background search refresh failed for '{query}': {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _read(self, key: str) -> Optional[Dict]:
+        client = get_redis()
+        if client is not None:
+            try:
+                raw = client.get(key)
+                return json.loads(raw) if raw else None
+            except Exception as e:
+                logger.warning(f"Search cache read failed: {e}")
+                reset_redis()
+        return self.local.get(key)
+
+    def _write(self, key: str, results: List[Dict]):
+        entry = {'created_at': time.time(), 'results': results}
+        expire_seconds = self.ttl + self.stale_ttl if results else self.empty_ttl
+
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(key, json.dumps(entry, ensure_ascii=False, default=str), ex=expire_seconds)
+                return
+            except Exception as e:
+                logger.warning(f"Search cache write failed: {e}")
+                reset_redis()
+        self.local.set(key, entry, expire_seconds)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+        client = get_redis()
+        if client is not None:
+            try:
+                client.hincrby(STATS_KEY, name, 1)
+            except Exception:
+                pass
+
+    @staticmethod
+    def filter_price(results: List[Dict], max_price) -> List[Dict]:
+        """סינון תוצאות לפי מחיר מקסימלי"""
+        if max_price in (None, ''):
+            return results
+        try:
+            max_price = float(max_price)
+        except (TypeError, ValueError):
+            return results
+        return [product for product in results if product.get('price') is None or product['price'] <= max_price]
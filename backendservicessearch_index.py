@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Search Index - אינדקס טקסט מלא לשמות מוצרים מנורמלים
+
+SQLite: טבלת FTS5. PostgreSQL: tsvector + trigram (pg_trgm).
+"""
+
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from models.product import Product
+from utils.hebrew_utils import normalize_hebrew_text
+
+logger = logging.getLogger(__name__)
+
+INDEX_TABLE = 'product_search'
+
+
+class SearchIndex:
+    """
+    אינדקס חיפוש לשמות מוצרים אחרי נרמול עברית.
+
+    הדירוג משלב רלוונטיות טקסטואלית עם מחיר (זול יותר = גבוה יותר),
+    לפי price_weight. סינון קטגוריה ומחיר נשען על אינדקס (category, price).
+    """
+
+    def __init__(self, db, price_weight: float = 0.3, candidate_factor: int = 4):
+        self.db = db
+        self.price_weight = price_weight
+        self.candidate_factor = candidate_factor
+
+    @property
+    def dialect(self) -> str:
+        return self.db.engine.dialect.name
+
+    @property
+    def products_table(self) -> str:
+        return Product.__table__.name
+
+    def ensure_schema(self):
+        """יצירת טבלת האינדקס והאינדקסים המשלימים אם אינם קיימים"""
+        products = self.products_table
+
+        if self.dialect == 'sqlite':
+            statements = [
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} "
+                f"USING fts5(normalized_name, tokenize='unicode61 remove_diacritics 2')",
+            ]
+        elif self.dialect == 'postgresql':
+            statements = [
+                "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+                f"CREATE TABLE IF NOT EXISTS {INDEX_TABLE} ("
+                f"product_id INTEGER PRIMARY KEY REFERENCES {products}(id) ON DELETE CASCADE, "
+                f"normalized_name TEXT NOT NULL, "
+                f"document tsvector GENERATED ALWAYS AS (to_tsvector('simple', normalized_name)) STORED)",
+                f"CREATE INDEX IF NOT EXISTS ix_{INDEX_TABLE}_document ON {INDEX_TABLE} USING GIN (document)",
+                f"CREATE INDEX IF NOT EXISTS ix_{INDEX_TABLE}_trgm ON {INDEX_TABLE} "
+                f"USING GIN (normalized_name gin_trgm_ops)",
+            ]
+        else:
+            logger.warning(f"Search index not supported on {self.dialect}, using Product.search")
+            return
+
+        statements.append(
+            f"CREATE INDEX IF NOT EXISTS ix_{products}_category_price ON {products} (category, price)"
+        )
+
+        for statement in statements:
+            self.db.session.execute(text(statement))
+        self.db.session.commit()
+        logger.info("Search index schema ready")
+
+    def index_products(self, rows: Iterable[Tuple[int, str]]) -> int:
+        """
+        הוספה/עדכון של מוצרים באינדקס
+
+        Args:
+            rows: זוגות (product_id, שם המוצר)
+        """
+        params = [
+            {'product_id': product_id, 'normalized_name': normalize_hebrew_text(name or '').lower()}
+            for product_id, name in rows
+        ]
+        if not params:
+            return 0
+
+        if self.dialect == 'sqlite':
+            self.db.session.execute(
+                text(f"DELETE FROM {INDEX_TABLE} WHERE rowid = :product_id"), params
+            )
+            self.db.session.execute(
+                text(f"INSERT INTO {INDEX_TABLE} (rowid, normalized_name) VALUES (:product_id, :normalized_name)"),
+                params
+            )
+        else:
+            self.db.session.execute(
+                text(f"INSERT INTO {INDEX_TABLE} (product_id, normalized_name) "
+                     f"VALUES (:product_id, :normalized_name) "
+                     f"ON CONFLICT (product_id) DO UPDATE SET normalized_name = EXCLUDED.normalized_name"),
+                params
+            )
+
+        self.db.session.commit()
+        return len(params)
+
+    def index_missing(self, batch_size: int = 1000) -> int:
+        """
+        אינדוקס מוצרים שעדיין אינם באינדקס (למשל אחרי הכנסה מרוכזת)
+        """
+        key = 'rowid' if self.dialect == 'sqlite' else 'product_id'
+        query = text(
+            f"SELECT p.id, p.name FROM {self.products_table} p "
+            f"LEFT JOIN {INDEX_TABLE} s ON s.{key} = p.id "
+            f"WHERE s.{key} IS NULL LIMIT :limit"
+        )
+
+        total = 0
+        while True:
+            rows = self.db.session.execute(query, {'limit': batch_size}).fetchall()
+            if not rows:
+                break
+            total += self.index_products(rows)
+            if len(rows) < batch_size:
+                break
+
+        if total:
+            logger.info(f"Indexed {total} new products for search")
+        return total
+
+    def search(self, query: str, category: str = '', max_price=None, limit: int = 50) -> Optional[List[int]]:
+        """
+        חיפוש מוצרים באינדקס
+
+        Returns:
+            מזהי מוצרים לפי דירוג, או None אם האינדקס אינו זמין
+        """
+        normalized = normalize_hebrew_text(query).lower().strip()
+        if not normalized:
+            return []
+
+        params = {
+            'category': category or '',
+            'max_price': float(max_price) if max_price not in (None, '') else None,
+            'limit': limit * self.candidate_factor,
+        }
+        filters = (
+            "AND (:category = '' OR p.category = :category) "
+            "AND (:max_price IS NULL OR p.price <= :max_price) "
+        )
+        products = self.products_table
+
+        if self.dialect == 'sqlite':
+            params['match'] = self._fts_match_expression(normalized)
+            sql = (
+                f"SELECT p.id, -bm25({INDEX_TABLE}) AS relevance, p.price "
+                f"FROM {INDEX_TABLE} JOIN {products} p ON p.id = {INDEX_TABLE}.rowid "
+                f"WHERE {INDEX_TABLE} MATCH :match {filters}"
+                f"ORDER BY bm25({INDEX_TABLE}) LIMIT :limit"
+            )
+        elif self.dialect == 'postgresql':
+            params['query'] = normalized
+            sql = (
+                f"SELECT p.id, ts_rank(s.document, plainto_tsquery('simple', :query)) "
+                f"+ similarity(s.normalized_name, :query) AS relevance, p.price "
+                f"FROM {INDEX_TABLE} s JOIN {products} p ON p.id = s.product_id "
+                f"WHERE (s.document @@ plainto_tsquery('simple', :query) OR s.normalized_name % :query) "
+                f"{filters}"
+                f"ORDER BY relevance DESC LIMIT :limit"
+            )
+        else:
+            return None
+
+        try:
+            candidates = self.db.session.execute(text(sql), params).fetchall()
+        except Exception as e:
+            self.db.session.rollback()
+            logger.warning(f"Search index query failed, falling back: {e}")
+            return None
+
+        return self._rank(candidates)[:limit]
+
+    def search_products(self, query: str, category: str = '', max_price=None, limit: int = 50) -> List:
+        """
+        מוצרים לפי דירוג האינדקס, או Product.search כשהאינדקס אינו זמין
+        """
+        product_ids = self.search(query, category, max_price, limit)
+        if product_ids is None:
+            return Product.search(query, category, max_price)
+        if not product_ids:
+            return []
+
+        by_id = {product.id: product for product in Product.query.filter(Product.id.in_(product_ids)).all()}
+        return [by_id[product_id] for product_id in product_ids if product_id in by_id]
+
+    def _rank(self, candidates) -> List[int]:
+        """שילוב רלוונטיות ומחיר לציון אחד (0..1)"""
+        if not candidates:
+            return []
+
+        relevances = [row[1] or 0 for row in candidates]
+        prices = [row[2] for row in candidates if row[2] is not None]
+        top_relevance = max(relevances) or 1
+        min_price = min(prices) if prices else 0
+        price_range = (max(prices) - min_price) if prices else 0
+
+        def score(row):
+            relevance = (row[1] or 0) / top_relevance
+            if row[2] is None or not price_range:
+                price_score = 0.5
+            else:
+                price_score = 1 - (row[2] - min_price) / price_range
+            return (1 - self.price_weight) * relevance + self.price_weight * price_score
+
+        return [row[0] for row in sorted(candidates, key=score, reverse=True)]
+
+    @staticmethod
+    def _fts_match_expression(normalized: str) -> str:
+        """כל מילה בשאילתה כמחרוזת מצוטטת עם התאמת קידומת"""
+        terms = [term.replace('"', '""') for term in normalized.split()]
+        return ' '.join(f'"{term}"*' for term in terms)
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Search Jobs - scraping ברקע עבור חיפושים שלא נמצאו במסד הנתונים
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from celery import current_app
+
+# אפליקציית Celery מוגדרת ב-price_monitor; בלי הייבוא current_app הוא אפליקציית
+# ברירת המחדל (amqp://localhost) ו-send_task לא מגיע ל-worker
+from services import price_monitor  # noqa: F401
+from models.product import Product
+from scrapers.registry import get_scraper_registry
+from services.search_cache import normalize_query
+from services.search_index import SearchIndex
+from services.stats_snapshot import StatsSnapshot
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+celery_app = current_app._get_current_object()
+
+JOB_KEY = 'search_job:'
+DEDUP_KEY = 'search_job_key:'
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+def persist_scraped_products(db, scraping_results: List[Dict]) -> List[Tuple[int, str]]:
+    """
+    שמירת תוצאות scraping - הכנסה מרוכזת של מוצרים חדשים ועדכון מרוכז
+    של מחירי מוצרים שכבר קיימים (לפי URL), בטרנזקציה אחת
+
+    Returns:
+        זוגות (product_id, שם המוצר) של המוצרים שנוספו או עודכנו,
+        לאינדוקס ממוקד במקום סריקת כל טבלת המוצרים
+    """
+    if not scraping_results:
+        return []
+
+    urls = [result['url'] for result in scraping_results if result.get('url')]
+    existing = {}
+    if urls:
+        existing = dict(
+            db.session.query(Product.url, Product.id).filter(Product.url.in_(urls)).all()
+        )
+
+    new_products = []
+    price_updates = []
+    seen_urls = set()
+    for result in scraping_results:
+        url = result.get('url')
+        if url:
+            # אותו מוצר יכול להופיע פעמיים באותן תוצאות
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+
+        if url in existing:
+            price_updates.append({'id': existing[url], 'price': result['price']})
+        else:
+            new_products.append(Product.create_from_scraping(result))
+
+    try:
+        db.session.bulk_save_objects(new_products)
+        db.session.bulk_update_mappings(Product, price_updates)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    StatsSnapshot(db).increment('total_products', len(new_products))
+
+    # bulk_save_objects לא מחזיר מזהים - שליפה לפי URL של מה שנשמר
+    if not urls:
+        return []
+    return db.session.query(Product.id, Product.name).filter(Product.url.in_(urls)).all()
+
+
+class SearchJobQueue:
+    """
+    תור משימות scraping עם מזהה משימה.
+
+    חיפושים זהים (שאילתה מנורמלת + קטגוריה) שמגיעים במקביל מקבלים את אותה
+    משימה. מצב המשימות נשמר ב-Redis, או בזיכרון התהליך כשאינו זמין.
+    """
+
+    def __init__(self, app, db, job_ttl: int = 3600, dedup_ttl: int = 60):
+        self.app = app
+        self.db = db
+        self.job_ttl = job_ttl
+        self.dedup_ttl = dedup_ttl
+        self.mode = os.getenv('SEARCH_JOBS_MODE', 'celery')
+
+        self._local_jobs = {}
+        self._local_keys = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(self, query: str, category: str) -> Dict:
+        """
+        יצירת משימת scraping, או החזרת המשימה הקיימת עבור אותו חיפוש
+
+        Returns:
+            רשומת המשימה
+        """
+        job_id = uuid.uuid4().hex
+
+        existing_id = self._claim(self._dedup_key(query, category), job_id)
+        if existing_id:
+            job = self.get(existing_id)
+            if job:
+                return job
+
+        job = {
+            'id': job_id,
+            'query': query,
+            'category': category,
+            'status': STATUS_QUEUED,
+            'created_at': time.time(),
+            'results': [],
+            'stores': {},
+        }
+        self._save(job)
+        self._dispatch(job_id)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """רשומת משימה לפי מזהה"""
+        client = get_redis()
+        if client is not None:
+            raw = client.get(f"{JOB_KEY}{job_id}")
+            return json.loads(raw) if raw else None
+
+        with self._lock:
+            job = self._local_jobs.get(job_id)
+            return dict(job) if job else None
+
+    def execute(self, job_id: str):
+        """
+        הרצת משימה - scraping בכל החנויות במקביל, שמירה מרוכזת ועדכון המצב.
+        תוצאות חלקיות נשמרות במשימה ברגע שכל חנות מסיימת.
+        """
+        job = self.get(job_id)
+        if not job or job['status'] != STATUS_QUEUED:
+            return
+
+        job['status'] = STATUS_RUNNING
+        self._save(job)
+
+        with self.app.app_context():
+            try:
+                search_index = SearchIndex(self.db)
+
+                for outcome in get_scraper_registry().search_stream(job['query']):
+                    job.setdefault('stores', {})[outcome['store']] = {
+                        'status': outcome['status'],
+                        'count': len(outcome['results']),
+                        'elapsed_ms': outcome['elapsed_ms'],
+                    }
+                    if outcome['results']:
+                        touched = persist_scraped_products(self.db, outcome['results'])
+                        search_index.index_products(touched)
+                        results = search_index.search_products(job['query'], job['category'])
+                        job['results'] = [product.to_dict() for product in results]
+                    self._save(job)
+
+                job['status'] = STATUS_DONE
+            except Exception as e:
+                logger.error(f"Search job {job_id} failed: {e}")
+                job['status'] = STATUS_FAILED
+                job['error'] = 'Search failed'
+
+        job['finished_at'] = time.time()
+        self._save(job)
+        self._release(job)
+
+    def _dispatch(self, job_id: str):
+        if self.mode == 'celery':
+            try:
+                celery_app.send_task('tasks.run_search_job', args=[job_id])
+                return
+            except Exception as e:
+                logger.warning(f"Celery unavailable, running search job {job_id} locally: {e}")
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('SEARCH_JOBS_LOCAL_WORKERS', 2)),
+                    thread_name_prefix='search-job'
+                )
+        self._executor.submit(self.execute, job_id)
+
+    @staticmethod
+    def _dedup_key(query: str, category: str) -> str:
+        return f"{DEDUP_KEY}{normalize_query(query)}|{(category or '').strip().lower()}"
+
+    def _claim(self, dedup_key: str, job_id: str) -> Optional[str]:
+        """
+        רישום המשימה עבור החיפוש; מחזיר מזהה משימה קיימת אם יש כזו
+        """
+        client = get_redis()
+        if client is not None:
+            if client.set(dedup_key, job_id, nx=True, ex=self.job_ttl):
+                return None
+            existing = client.get(dedup_key)
+            return existing.decode() if existing else None
+
+        with self._lock:
+            existing, expires_at = self._local_keys.get(dedup_key, (None, 0))
+            if existing and expires_at > time.time():
+                return existing
+            self._local_keys[dedup_key] = (job_id, time.time() + self.job_ttl)
+            return None
+
+    def _release(self, job: Dict):
+        """
+        קיצור חיי מפתח האיחוד אחרי סיום - חיפוש חוזר בקרוב יקבל את התוצאה,
+        ואחר כך תיווצר משימה חדשה
+        """
+        dedup_key = self._dedup_key(job['query'], job['category'])
+
+        client = get_redis()
+        if client is not None:
+            client.expire(dedup_key, self.dedup_ttl)
+            return
+
+        with self._lock:
+            if dedup_key in self._local_keys:
+                self._local_keys[dedup_key] = (job['id'], time.time() + self.dedup_ttl)
+
+    def _save(self, job: Dict):
+        client = get_redis()
+        if client is not None:
+            client.set(f"{JOB_KEY}{job['id']}", json.dumps(job, ensure_ascii=False, default=str), ex=self.job_ttl)
+            return
+
+        with self._lock:
+            self._local_jobs[job['id']] = dict(job)
+            # ניקוי משימות ישנות
+            cutoff = time.time() - self.job_ttl
+            for stale_id in [jid for jid, j in self._local_jobs.items() if j['created_at'] < cutoff]:
+                del self._local_jobs[stale_id]
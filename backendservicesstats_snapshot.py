@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stats Snapshot - תמונת מצב מתוחזקת של סטטיסטיקות המערכת עבור /api/stats
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from models.product import Product
+from models.user import User
+from models.alert import Alert
+from models.price_history import PriceHistory
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = 'stats:snapshot'
+COUNTER_FIELDS = ('total_products', 'active_alerts', 'total_users', 'price_updates_today')
+
+# תמונת מצב משותפת לתהליך כאשר Redis אינו זמין
+_local_snapshot: Dict = {}
+_local_lock = threading.Lock()
+
+
+class StatsSnapshot:
+    """
+    מונים שמתעדכנים באופן מצטבר בכל כתיבה, ומחושבים מחדש במדויק
+    ע"י celery beat. הקריאה מגיעה מ-Redis (או מזיכרון התהליך) ולא מהמסד.
+
+    total_users אינו מתעדכן באופן מצטבר: משתמשים נוצרים גם ב-User.get_or_create
+    בלי לדעת אם נוצרה שורה חדשה, ולכן המונה מפגר עד הרענון הבא (עד max_age).
+    """
+
+    def __init__(self, db, max_age: int = 600):
+        self.db = db
+        self.max_age = max_age
+
+    def get(self, exact: bool = False) -> Dict:
+        """
+        סטטיסטיקות עם חותמת זמן עדכון
+
+        Args:
+            exact: חישוב מחדש מהמסד במקום תמונת המצב
+        """
+        snapshot = None if exact else self._read()
+
+        if snapshot is not None:
+            age = time.time() - snapshot['computed_at']
+            # היום התחלף או שהמונים לא רועננו זמן רב מדי
+            if snapshot.get('day') != self._today() or age > self.max_age:
+                snapshot = None
+
+        if snapshot is None:
+            snapshot = self.refresh()
+
+        stats = {field: int(snapshot.get(field, 0)) for field in COUNTER_FIELDS}
+        stats['updated_at'] = datetime.utcfromtimestamp(snapshot['computed_at']).isoformat()
+        stats['stale_seconds'] = int(time.time() - snapshot['computed_at'])
+        return stats
+
+    def refresh(self) -> Dict:
+        """חישוב מדויק מהמסד ושמירה כתמונת המצב הנוכחית"""
+        snapshot = {
+            'total_products': Product.query.count(),
+            'active_alerts': Alert.query.filter(Alert.is_active.is_(True)).count(),
+            'total_users': User.query.count(),
+            'price_updates_today': PriceHistory.query.filter(
+                PriceHistory.created_at >= datetime.utcnow().date()
+            ).count(),
+            'computed_at': time.time(),
+            'day': self._today(),
+        }
+        self._write(snapshot)
+        return snapshot
+
+    def increment(self, field: str, amount: int = 1):
+        """
+        עדכון מצטבר של מונה אחרי כתיבה - רק אם כבר קיימת תמונת מצב
+        """
+        if not amount:
+            return
+
+        client = get_redis()
+        if client is not None:
+            try:
+                if client.exists(SNAPSHOT_KEY):
+                    client.hincrby(SNAPSHOT_KEY, field, amount)
+                return
+            except Exception as e:
+                logger.warning(f"Stats counter update failed: {e}")
+
+        with _local_lock:
+            if _local_snapshot:
+                _local_snapshot[field] = _local_snapshot.get(field, 0) + amount
+
+    def _read(self) -> Optional[Dict]:
+        client = get_redis()
+        if client is not None:
+            try:
+                raw = client.hgetall(SNAPSHOT_KEY)
+                if not raw:
+                    return None
+                snapshot = {name.decode(): value.decode() for name, value in raw.items()}
+                snapshot['computed_at'] = float(snapshot['computed_at'])
+                return snapshot
+            except Exception as e:
+                logger.warning(f"Stats snapshot read failed: {e}")
+
+        with _local_lock:
+            return dict(_local_snapshot) if _local_snapshot else None
+
+    def _write(self, snapshot: Dict):
+        client = get_redis()
+        if client is not None:
+            try:
+                pipeline = client.pipeline()
+                pipeline.delete(SNAPSHOT_KEY)
+                pipeline.hset(SNAPSHOT_KEY, mapping=snapshot)
+                pipeline.execute()
+                return
+            except Exception as e:
+                logger.warning(f"Stats snapshot write failed: {e}")
+
+        with _local_lock:
+            _local_snapshot.clear()
+            _local_snapshot.update(snapshot)
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.utcnow().date().isoformat()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Celery Tasks - משימות רקע ותזמונים של המערכת
+
+נטען ע"י ה-worker וה-scheduler:
+    celery --workdir=backend -A services.tasks worker
+    celery --workdir=backend -A services.tasks beat
+"""
+
+import os
+import logging
+
+from celery import current_app, shared_task
+from celery.schedules import crontab
+from celery.signals import worker_ready
+
+# אפליקציית Celery הקיימת מוגדרת ב-price_monitor; הייבוא מגדיר אותה כנוכחית
+from services import price_monitor  # noqa: F401
+from app import app as flask_app, db
+from services.repricing import RepricingEngine
+from services.search_jobs import SearchJobQueue
+from services.search_index import SearchIndex
+from services.stats_snapshot import StatsSnapshot
+from services.price_series import PriceSeries
+from services.alert_sweeper import AlertSweeper
+from services.notification_dispatcher import NotificationDispatcher
+from utils.metrics import start_metrics_server
+
+logger = logging.getLogger(__name__)
+
+celery = current_app._get_current_object()
+
+
+@worker_ready.connect
+def expose_worker_metrics(**kwargs):
+    """מדדי scraping / מאגר דרייברים של ה-worker, עבור Prometheus"""
+    port = int(os.getenv('WORKER_METRICS_PORT', 0))
+    if port:
+        start_metrics_server(port)
+
+
+@shared_task(name='tasks.reprice_active_alerts')
+def reprice_active_alerts():
+    """עדכון מחירים לכל המוצרים עם התראה פעילה"""
+    with flask_app.app_context():
+        return RepricingEngine(db).run()
+
+
+@shared_task(name='tasks.run_search_job')
+def run_search_job(job_id):
+    """scraping עבור חיפוש שלא נמצא במסד הנתונים"""
+    SearchJobQueue(flask_app, db).execute(job_id)
+
+
+@shared_task(name='tasks.index_new_products')
+def index_new_products():
+    """אינדוקס מוצרים חדשים לחיפוש"""
+    with flask_app.app_context():
+        return SearchIndex(db).index_missing()
+
+
+@shared_task(name='tasks.refresh_stats')
+def refresh_stats():
+    """חישוב מדויק של תמונת המצב של /api/stats"""
+    with flask_app.app_context():
+        return StatsSnapshot(db).refresh()
+
+
+@shared_task(name='tasks.rollup_price_history')
+def rollup_price_history():
+    """סיכום היסטוריית מחירים לשעות/ימים ומחיקת נקודות ישנות"""
+    with flask_app.app_context():
+        return PriceSeries(
+            db,
+            raw_days=flask_app.config['PRICE_HISTORY_RAW_DAYS'],
+            hourly_days=flask_app.config['PRICE_HISTORY_HOURLY_DAYS']
+        ).rollup()
+
+
+@shared_task(name='tasks.expire_alerts')
+def expire_alerts():
+    """השבתת התראות שפג תוקפן"""
+    with flask_app.app_context():
+        return AlertSweeper(db).sweep()
+
+
+@shared_task(name='tasks.dispatch_notifications')
+def dispatch_notifications():
+    """שליחת ההודעות שבתור - digest לכל משתמש"""
+    return NotificationDispatcher(flask_app, db).drain()
+
+
+celery.conf.beat_schedule.update({
+    'reprice-active-alerts': {
+        'task': 'tasks.reprice_active_alerts',
+        'schedule': crontab(minute=0),
+    },
+    'index-new-products': {
+        'task': 'tasks.index_new_products',
+        'schedule': crontab(minute='*/10'),
+    },
+    'refresh-stats': {
+        'task': 'tasks.refresh_stats',
+        'schedule': crontab(minute='*/5'),
+    },
+    'rollup-price-history': {
+        'task': 'tasks.rollup_price_history',
+        'schedule': crontab(minute=5),
+    },
+    'expire-alerts': {
+        'task': 'tasks.expire_alerts',
+        'schedule': crontab(minute='*/15'),
+    },
+    'dispatch-notifications': {
+        'task': 'tasks.dispatch_notifications',
+        'schedule': 30.0,
+    },
+})
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+הגדרות משותפות לבדיקות - backend/ הוא שורש הייבוא, כמו ב-API וב-worker
+"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+COPY_MONITOR_PATH = os.path.join(BACKEND_DIR, '..', 'copy-monitor.py')
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture
+def fixture_html():
+    """קריאת קובץ HTML מתיקיית fixtures"""
+    def load(name):
+        with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+            return f.read()
+    return load
+
+
+def run_in_backend(code, tmp_path):
+    """הרצת קוד בתהליך נפרד מתוך backend/, כמו ש-gunicorn וה-worker נטענים"""
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', f"sqlite:///{tmp_path / 'smoke.db'}")
+    return subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+
+
+def load_copy_monitor():
+    """copy-monitor.py אינו חבילה (יש מקף בשם) - טעינה לפי נתיב"""
+    spec = importlib.util.spec_from_file_location('copy_monitor', COPY_MONITOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
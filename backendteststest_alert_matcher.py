@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+AlertMatcher - המעבר הווקטורי מחזיר את אותן התאמות כמו בדיקה של כל התראה בנפרד
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from services.alert_matcher import (
+    REASON_PERCENT_DROP, REASON_PRICE_CHANGE, REASON_TARGET_PRICE, AlertMatcher
+)
+
+NOW = datetime(2024, 5, 1, 12, 0)
+
+
+def _setting(settings, *names):
+    for name in names:
+        if settings.get(name) not in (None, ''):
+            return float(settings[name])
+    return None
+
+
+def row_by_row(alerts, product_ids, new_prices, old_prices, now):
+    """בדיקה של כל התראה בנפרד - הגדרת הכללים"""
+    batch = {product_id: (new, old) for product_id, new, old in zip(product_ids, new_prices, old_prices)}
+    matches = []
+    for alert_id, product_id, settings, expires_at in alerts:
+        if product_id not in batch or (expires_at is not None and expires_at <= now):
+            continue
+        new, old = batch[product_id]
+        target = _setting(settings, 'target_price', 'targetPrice')
+        percent = _setting(settings, 'percent_drop', 'percentDrop')
+        instant = bool(settings.get('instant_alerts', settings.get('instantAlerts', False)))
+
+        if target is not None and new <= target and not (old is not None and old <= target):
+            reason = REASON_TARGET_PRICE
+        elif percent is not None and old and (old - new) / old * 100 >= percent:
+            reason = REASON_PERCENT_DROP
+        elif instant and new != old:
+            reason = REASON_PRICE_CHANGE
+        else:
+            continue
+        matches.append({'alert_id': alert_id, 'product_id': product_id,
+                        'old_price': old, 'new_price': new, 'reason': reason})
+    return matches
+
+
+def _matcher(alerts):
+    return AlertMatcher(db=None).load_rows(sorted(alerts, key=lambda alert: alert[1]))
+
+
+def _sorted(matches):
+    return sorted(matches, key=lambda match: match['alert_id'])
+
+
+def test_rules():
+    alerts = [
+        (1, 10, {'target_price': 900}, None),
+        (2, 10, {'target_price': 1000}, None),             # כבר מתחת ליעד - לא שוב
+        (3, 11, {'percent_drop': 10}, None),
+        (4, 11, {'percentDrop': 30}, None),
+        (5, 12, {'instant_alerts': True}, None),
+        (6, 12, {}, None),
+        (7, 12, {'instant_alerts': True}, NOW - timedelta(days=1)),  # פג תוקף
+        (8, 13, {'targetPrice': '50'}, None),              # מוצר שלא ב-batch
+        (9, 14, {'target_price': 200, 'instant_alerts': True}, None),
+    ]
+
+    matches = _matcher(alerts).match([10, 11, 12, 14], [850.0, 85.0, 21.0, 150.0],
+                                     [950.0, 100.0, 20.0, None], now=NOW)
+
+    assert {(match['alert_id'], match['reason']) for match in matches} == {
+        (1, REASON_TARGET_PRICE),
+        (3, REASON_PERCENT_DROP),
+        (5, REASON_PRICE_CHANGE),
+        (9, REASON_TARGET_PRICE),
+    }
+    assert [match for match in matches if match['alert_id'] == 9][0]['old_price'] is None
+
+
+def test_vectorized_matches_row_by_row():
+    rng = random.Random(1234)
+    products = list(range(1, 60))
+    alerts = []
+    for alert_id in range(1, 500):
+        settings = {}
+        if rng.random() < 0.5:
+            settings['target_price'] = rng.choice([50, 100, 150, 200])
+        if rng.random() < 0.4:
+            settings['percent_drop'] = rng.choice([5, 10, 25])
+        if rng.random() < 0.3:
+            settings['instant_alerts'] = True
+        expires_at = NOW + timedelta(days=rng.choice([-1, 1, 7])) if rng.random() < 0.3 else None
+        alerts.append((alert_id, rng.choice(products), settings, expires_at))
+
+    batch_products = rng.sample(products, 40)
+    old_prices = [rng.choice([None, 0.0, 80.0, 120.0, 160.0, 210.0]) for _ in batch_products]
+    new_prices = [
+        (old if old else 150.0) * rng.choice([0.5, 0.8, 0.95, 1.0, 1.1]) for old in old_prices
+    ]
+
+    expected = row_by_row(alerts, batch_products, new_prices, old_prices, NOW)
+    actual = _matcher(alerts).match(batch_products, new_prices, old_prices, now=NOW)
+
+    assert expected
+    assert _sorted(actual) == _sorted(expected)
+
+
+def test_no_alerts_or_no_prices():
+    assert AlertMatcher(db=None).match([1], [10.0], [20.0]) == []
+    assert _matcher([(1, 1, {'instant_alerts': True}, None)]).match([], [], []) == []
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+copy-monitor.py - אוטומט Aho-Corasick, טביעות MinHash ומפתח הדיווח
+"""
+
+import random
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('bs4')
+
+from conftest import load_copy_monitor
+
+copy_monitor = load_copy_monitor()
+
+
+def _automaton(patterns):
+    automaton = copy_monitor.AhoCorasick()
+    for pattern in patterns:
+        automaton.add(pattern, pattern)
+    return automaton.build()
+
+
+def _naive_matches(patterns, text):
+    """כל מופע של כל ביטוי, לפי מיקום הסיום - הסדר שבו האוטומט מדווח"""
+    matches = []
+    for end in range(1, len(text) + 1):
+        for pattern in patterns:
+            if text.endswith(pattern, 0, end):
+                matches.append((end, pattern))
+    return matches
+
+
+def _automaton_matches(automaton, text):
+    matches = []
+    state = 0
+    for end, char in enumerate(text, start=1):
+        found, state = automaton.search(char, state)
+        matches.extend((end, pattern) for pattern in found)
+    return matches
+
+
+def test_aho_corasick_overlapping_patterns():
+    automaton = _automaton(['he', 'she', 'his', 'hers'])
+
+    found, _ = automaton.search('ushers')
+
+    assert sorted(found) == ['he', 'hers', 'she']
+
+
+def test_aho_corasick_hebrew_signatures():
+    automaton = _automaton(['מעקב מחירים', 'המחיר הטוב ביותר עבורך', 'PT_ORIGINAL_2025'])
+
+    found, _ = automaton.search('<title>מעקב מחירים - המחיר הטוב ביותר עבורך</title><!-- PT_ORIGINAL_2025 -->')
+
+    assert sorted(found) == sorted(['מעקב מחירים', 'המחיר הטוב ביותר עבורך', 'PT_ORIGINAL_2025'])
+
+
+def test_aho_corasick_no_match():
+    found, state = _automaton(['abc']).search('ababab')
+
+    assert found == []
+    assert state != 0  # 'ab' - תחילת ביטוי שנמשכת למקטע הבא
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_aho_corasick_matches_naive_search(seed):
+    rng = random.Random(seed)
+    alphabet = 'abc'
+    patterns = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 5))) for _ in range(rng.randint(1, 8))]
+    text = ''.join(rng.choice(alphabet) for _ in range(200))
+
+    automaton = _automaton(patterns)
+
+    assert sorted(_automaton_matches(automaton, text)) == sorted(_naive_matches(patterns, text))
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_aho_corasick_chunked_search_matches_whole_text(seed):
+    rng = random.Random(seed)
+    patterns = ['abcab', 'bca', 'cc', 'abab']
+    text = ''.join(rng.choice('abc') for _ in range(300))
+    automaton = _automaton(patterns)
+
+    whole, _ = automaton.search(text)
+
+    chunked, state, position = [], 0, 0
+    while position < len(text):
+        size = rng.randint(1, 7)
+        found, state = automaton.search(text[position:position + size], state)
+        chunked.extend(found)
+        position += size
+
+    assert sorted(chunked) == sorted(whole)
+
+
+def test_aho_corasick_match_across_chunk_boundary():
+    automaton = _automaton(['PT_ORIGINAL_2025'])
+
+    first, state = automaton.search('<!-- PT_ORIG')
+    second, _ = automaton.search('INAL_2025 -->', state)
+
+    assert first == []
+    assert second == ['PT_ORIGINAL_2025']
+
+
+def test_minhash_identical_and_disjoint_texts():
+    hasher = copy_monitor.MinHasher()
+    text = 'מעקב מחירים חכם עבור מוצרי אלקטרוניקה בכל החנויות המובילות בישראל ' * 3
+
+    signature = hasher.signature(text)
+
+    assert hasher.similarity(signature, hasher.signature(text)) == 1.0
+    other = hasher.signature('completely unrelated english words about gardening tools and weather forecasts')
+    assert hasher.similarity(signature, other) < 0.1
+
+
+def test_minhash_estimates_small_edits_as_similar():
+    hasher = copy_monitor.MinHasher(num_perm=128)
+    words = [f"מילה{index}" for index in range(300)]
+    edited = words[:140] + ['שינוי', 'קטן'] + words[145:]
+
+    similarity = hasher.similarity(hasher.signature(' '.join(words)), hasher.signature(' '.join(edited)))
+
+    assert 0.75 < similarity < 1.0
+
+
+def test_minhash_is_deterministic_per_seed():
+    text = 'the same page text hashed by two monitor processes'
+
+    assert copy_monitor.MinHasher(seed=7).signature(text) == copy_monitor.MinHasher(seed=7).signature(text)
+
+
+def test_minhash_empty_text():
+    hasher = copy_monitor.MinHasher()
+
+    assert hasher.signature('  ,, ') is None
+    assert hasher.similarity(None, hasher.signature('some text here')) == 0.0
+
+
+def test_report_key_ignores_near_duplicate_score():
+    key = copy_monitor.CopyDetectionMonitor.report_key
+
+    first = key('copy.example', ['Code: PriceTracker', 'Near-duplicate: index.html (64%)'])
+    second = key('copy.example', ['Near-duplicate: index.html (71%)', 'Code: PriceTracker'])
+
+    assert first == second
+    assert first != key('copy.example', ['Code: PriceTracker', 'Near-duplicate: results.html (64%)'])
+    assert first != key('other.example', ['Code: PriceTracker', 'Near-duplicate: index.html (64%)'])
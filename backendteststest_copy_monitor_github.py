@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+GitHubClient וחיפוש ההעתקות ב-GitHub מול API מקומי (http.server) - בקשות
+מותנות ותשובות 304, כיבוד ה-rate limit, ומניעת כפילויות דרך CopyStateStore
+"""
+
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('bs4')
+
+from conftest import load_copy_monitor
+
+copy_monitor = load_copy_monitor()
+
+COPIED_README = """# מעקב מחירים
+המחיר הטוב ביותר עבורך - demo at rlsite.github.io
+"""
+
+SUSPECT_REPO = {'full_name': 'copier/price-tracker', 'html_url': 'https://github.com/copier/price-tracker'}
+ORIGINAL_REPO = {'full_name': 'rlsite/PriceTracker', 'html_url': copy_monitor.ORIGINAL_REPO_URL}
+
+
+class FakeGitHubAPI:
+    """
+    משאבים לפי נתיב, כל אחד עם ETag; תשובה 304 כש-If-None-Match תואם.
+    rate_limits - כותרות/סטטוס לתשובות הבאות, לפי הסדר
+    """
+
+    def __init__(self):
+        self.resources = {}
+        self.rate_limits = []
+        self.requests = []
+
+    def publish(self, path, body, etag):
+        self.resources[path] = (etag, json.dumps(body))
+
+    def publish_readme(self, content, sha):
+        self.publish(
+            f"/repos/{SUSPECT_REPO['full_name']}/readme",
+            {'sha': sha, 'content': base64.b64encode(content.encode('utf-8')).decode('ascii')},
+            f'"{sha}"'
+        )
+
+    def handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlparse(self.path).path
+                api.requests.append((path, self.headers.get('If-None-Match')))
+
+                status, headers = 200, {}
+                if api.rate_limits:
+                    status, headers = api.rate_limits.pop(0)
+
+                etag, body = api.resources.get(path, (None, None))
+                if status == 200 and body is None:
+                    status = 404
+                elif status == 200 and self.headers.get('If-None-Match') == etag:
+                    status = 304
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if status == 200:
+                    payload = body.encode('utf-8')
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                else:
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def github_api(monkeypatch):
+    api = FakeGitHubAPI()
+    api.publish('/search/repositories', {'items': [SUSPECT_REPO, ORIGINAL_REPO]}, '"search-1"')
+    api.publish_readme(COPIED_README, 'sha-1')
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), api.handler())
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    monkeypatch.setenv('GITHUB_API_URL', f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.delenv('GITHUB_TOKEN', raising=False)
+    yield api
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def state_path(tmp_path, monkeypatch):
+    # מסד המצב וקבצי ה-DMCA בתיקייה זמנית
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / 'state.db')
+    monkeypatch.setenv('COPY_MONITOR_STATE', path)
+    return path
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(copy_monitor.time, 'sleep', calls.append)
+    return calls
+
+
+def _client(state_path, **kwargs):
+    return copy_monitor.GitHubClient(copy_monitor.CopyStateStore(state_path), **kwargs)
+
+
+def test_conditional_request_uses_cached_body_on_304(github_api, state_path):
+    params = {'q': 'PriceTracker Hebrew'}
+
+    first = _client(state_path).get_json('/search/repositories', params)
+    # לקוח חדש על אותו קובץ מצב - ה-ETag נשמר בין ריצות
+    second = _client(state_path).get_json('/search/repositories', params)
+
+    assert second == first == {'items': [SUSPECT_REPO, ORIGINAL_REPO]}
+    assert github_api.requests == [('/search/repositories', None), ('/search/repositories', '"search-1"')]
+
+
+def test_changed_resource_replaces_cached_body(github_api, state_path):
+    client = _client(state_path)
+    client.get_json('/search/repositories')
+
+    github_api.publish('/search/repositories', {'items': [SUSPECT_REPO]}, '"search-2"')
+
+    assert client.get_json('/search/repositories') == {'items': [SUSPECT_REPO]}
+    assert client.get_json('/search/repositories') == {'items': [SUSPECT_REPO]}
+    assert [etag for _, etag in github_api.requests] == [None, '"search-1"', '"search-2"']
+
+
+def test_retry_after_waits_before_next_request(github_api, state_path, sleeps):
+    github_api.rate_limits.append((429, {'Retry-After': '7'}))
+    client = _client(state_path)
+
+    assert client.get_json('/search/repositories') is None
+    assert sleeps == [7.0]
+    assert client.get_json('/search/repositories') == {'items': [SUSPECT_REPO, ORIGINAL_REPO]}
+
+
+def test_exhausted_quota_waits_until_reset(github_api, state_path, sleeps):
+    reset = time.time() + 30
+    github_api.rate_limits.append((200, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(int(reset))}))
+
+    assert _client(state_path).get_json('/search/repositories') == {'items': [SUSPECT_REPO, ORIGINAL_REPO]}
+    [wait] = sleeps
+    assert 25 < wait <= 32
+
+
+def test_long_rate_limit_skips_requests_until_reset(github_api, state_path, sleeps):
+    github_api.rate_limits.append((403, {'Retry-After': '3600'}))
+    client = _client(state_path, max_rate_limit_wait=60)
+
+    assert client.get_json('/search/repositories') is None
+    assert client.get_json('/search/repositories') is None
+
+    # בלי המתנה, והבקשה השנייה לא יצאה בכלל
+    assert sleeps == []
+    assert len(github_api.requests) == 1
+    assert client.rate_limited_until > time.time() + 3500
+
+
+def _search(capsys):
+    """סבב חיפוש עם מוניטור חדש (כמו ריצה חדשה); מחזיר את מספר הדיווחים"""
+    copy_monitor.CopyDetectionMonitor().search_github_for_copies()
+    return capsys.readouterr().out.count('GITHUB COPY DETECTED')
+
+
+def test_state_store_dedups_reports_across_runs(github_api, state_path, capsys, monkeypatch, tmp_path):
+    analyzed = []
+    calculate_similarity = copy_monitor.CopyDetectionMonitor.calculate_similarity
+
+    def recording_similarity(self, content):
+        analyzed.append(content)
+        return calculate_similarity(self, content)
+
+    monkeypatch.setattr(copy_monitor.CopyDetectionMonitor, 'calculate_similarity', recording_similarity)
+
+    # שלושת החיפושים מחזירים את אותו repo - נותח ודווח פעם אחת
+    assert _search(capsys) == 1
+    assert len(analyzed) == 1
+    assert len(list(tmp_path.glob('dmca_*.txt'))) == 1
+    assert copy_monitor.CopyStateStore(state_path).get_repo(SUSPECT_REPO['full_name'])['reported_sha'] == 'sha-1'
+
+    # ריצה נוספת: הכול 304, אותו README - בלי ניתוח ובלי דיווח
+    github_api.requests.clear()
+    assert _search(capsys) == 0
+    assert analyzed == [COPIED_README]
+    assert all(etag is not None for _, etag in github_api.requests)
+
+    # README חדש ב-repo - נבדק ומדווח שוב
+    github_api.publish_readme(COPIED_README + '\nמעודכן', 'sha-2')
+    assert _search(capsys) == 1
+    assert len(analyzed) == 2
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+הסריקה המקבילית של copy-monitor.py מול שרתים מקומיים (aiohttp) - מגבלת
+המקביליות, השהיה לכל שרת, timeout והזיהויים שמתקבלים
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('bs4')
+pytest.importorskip('aiohttp')
+
+from aiohttp import web
+
+from conftest import load_copy_monitor
+
+copy_monitor = load_copy_monitor()
+
+COPY_PAGE = """<html><head><title>מעקב מחירים - המחיר הטוב ביותר</title></head>
+<body><h1>המחיר הטוב ביותר עבורך</h1><script src="anti-copy.js"></script>
+<!-- PriceTracker PT_ORIGINAL_2025 --></body></html>"""
+
+CLEAN_PAGE = """<html><head><title>Garden tools</title></head>
+<body><p>Rakes, shovels and watering cans for every season.</p></body></html>"""
+
+
+class ServerStats:
+    """בקשות שבטיפול כרגע, השיא שלהן, וזמני ההתחלה לכל שרת"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.starts = []
+
+    def enter(self, request):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        self.starts.append((request.host, time.monotonic()))
+
+    def leave(self):
+        self.in_flight -= 1
+
+
+def _app(stats):
+    async def page(request):
+        stats.enter(request)
+        try:
+            await asyncio.sleep(float(request.query.get('delay', 0)))
+            body = COPY_PAGE if request.match_info['name'] == 'copy' else CLEAN_PAGE
+            return web.Response(text=body, content_type='text/html', charset='utf-8')
+        finally:
+            stats.leave()
+
+    async def split(request):
+        """
+        חתימות שמתפצלות בין מקטעים - אחת באמצע תו עברי (UTF-8),
+        ואחת אחרי יותר מ-16KB של מילוי
+        """
+        stats.enter(request)
+        try:
+            response = web.StreamResponse()
+            response.content_type = 'text/html'
+            response.charset = 'utf-8'
+            await response.prepare(request)
+
+            phrase = 'מעקב מחירים'.encode('utf-8')
+            await response.write(b'<html><body>' + b' ' * 20000 + b'<!-- PT_ORIG')
+            await asyncio.sleep(0.05)
+            await response.write(b'INAL_2025 --><h1>' + phrase[:5])
+            await asyncio.sleep(0.05)
+            await response.write(phrase[5:] + b'</h1></body></html>')
+            await response.write_eof()
+            return response
+        finally:
+            stats.leave()
+
+    app = web.Application()
+    app.router.add_get('/split', split)
+    app.router.add_get('/{name}', page)
+    return app
+
+
+async def _serve(stats, hosts=1):
+    """
+    שרת אחד על כמה פורטים - כל פורט הוא "שרת" נפרד מבחינת ההשהיה לכל שרת
+
+    Returns:
+        (runner, רשימת כתובות הבסיס)
+    """
+    runner = web.AppRunner(_app(stats), handler_cancellation=True)
+    await runner.setup()
+    urls = []
+    for _ in range(hosts):
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        urls.append(f"http://127.0.0.1:{port}")
+    return runner, urls
+
+
+def _scan(monitor, stats, build_domains, hosts=1):
+    """
+    Returns:
+        (כתובות הבסיס של השרתים, תוצאות הסריקה)
+    """
+    async def scenario():
+        runner, urls = await _serve(stats, hosts)
+        try:
+            return urls, await monitor.scan_domains_async(build_domains(urls))
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(scenario())
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    # מסד המצב וקובץ הדיווחים בתיקייה זמנית
+    monkeypatch.setenv('COPY_MONITOR_STATE', str(tmp_path / 'state.db'))
+    monkeypatch.chdir(tmp_path)
+    monitor = copy_monitor.CopyDetectionMonitor()
+    monitor.politeness_delay = 0
+    return monitor
+
+
+def _reports(tmp_path):
+    log = tmp_path / 'copy_detection.log'
+    if not log.exists():
+        return []
+    return [json.loads(line) for line in log.read_text(encoding='utf-8').splitlines()]
+
+
+def test_scan_detections(monitor, tmp_path, monkeypatch):
+    stats = ServerStats()
+    chunks = []
+    scan = monitor.matcher.scan
+
+    def recording_scan(text, state=0):
+        chunks.append(text)
+        return scan(text, state)
+
+    monkeypatch.setattr(monitor.matcher, 'scan', recording_scan)
+
+    urls, results = _scan(monitor, stats, lambda urls: [f"{urls[0]}/copy", f"{urls[1]}/clean", f"{urls[2]}/split"], hosts=3)
+
+    copy_url, clean_url, split_url = f"{urls[0]}/copy", f"{urls[1]}/clean", f"{urls[2]}/split"
+    score, patterns = results[copy_url]
+    assert score > copy_monitor.HIGH_SEVERITY_THRESHOLD
+    assert {'Code: PriceTracker', 'Code: PT_ORIGINAL_2025', 'Text: מעקב מחירים'} <= set(patterns)
+
+    assert results[clean_url] == (0, [])
+
+    # החתימות שהתפצלו בין המקטעים נמצאות
+    assert any(chunk.endswith('PT_ORIG') for chunk in chunks)
+    score, patterns = results[split_url]
+    assert set(patterns) == {'Code: PT_ORIGINAL_2025', 'Text: מעקב מחירים'}
+    assert score == copy_monitor.CODE_PATTERN_SCORE + copy_monitor.TEXT_PHRASE_SCORE
+
+    assert sorted(report['domain'] for report in _reports(tmp_path)) == sorted([copy_url, split_url])
+
+
+def test_scan_respects_concurrency_limit(monitor):
+    stats = ServerStats()
+    monitor.scan_concurrency = 2
+
+    _, results = _scan(monitor, stats, lambda urls: [f"{url}/clean?delay=0.2" for url in urls], hosts=6)
+
+    assert len(results) == 6
+    assert stats.peak == 2
+
+
+def test_scan_is_polite_per_host(monitor):
+    stats = ServerStats()
+    monitor.politeness_delay = 0.2
+
+    _scan(monitor, stats, lambda urls: [f"{urls[0]}/clean?page={index}" for index in range(3)])
+
+    # בקשה אחת בכל פעם לאותו שרת, עם השהיה ביניהן
+    assert stats.peak == 1
+    starts = [started for _, started in stats.starts]
+    assert all(later - earlier >= 0.19 for earlier, later in zip(starts, starts[1:]))
+
+
+def test_scan_timeout_does_not_block_other_domains(monitor, tmp_path):
+    stats = ServerStats()
+    monitor.request_timeout = 0.3
+
+    started = time.monotonic()
+    urls, results = _scan(monitor, stats, lambda urls: [f"{urls[0]}/copy?delay=5", f"{urls[1]}/copy"], hosts=2)
+    elapsed = time.monotonic() - started
+
+    slow_url, fast_url = f"{urls[0]}/copy?delay=5", f"{urls[1]}/copy"
+    assert results[slow_url] == (0, [])
+    assert results[fast_url][0] > copy_monitor.REPORT_THRESHOLD
+    assert elapsed < 3
+    assert [report['domain'] for report in _reports(tmp_path)] == [fast_url]
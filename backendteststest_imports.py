@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות עשן - ייבוא נקודות הכניסה בדיוק כפי שה-API וה-worker טוענים אותן
+"""
+
+import pytest
+
+from conftest import run_in_backend
+
+
+def _import_from_backend(module, tmp_path):
+    return run_in_backend(f"import {module}", tmp_path)
+
+
+@pytest.mark.parametrize('module', ['services.tasks', 'wsgi', 'scrapers.registry'])
+def test_entry_point_imports(module, tmp_path):
+    # celery --workdir=backend -A services.tasks / gunicorn --chdir backend wsgi:app
+    result = _import_from_backend(module, tmp_path)
+    assert result.returncode == 0, result.stderr
+
+
+def test_scraper_registry_is_not_empty(tmp_path):
+    result = _import_from_backend(
+        'scrapers.registry as r; assert r.discover_scraper_classes(), "no scrapers"', tmp_path
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+KSPScraper - המסלולים המהירים (פענוח page_source, מחיר מ-HTML סטטי)
+מחזירים את אותן תוצאות כמו המסלולים הקודמים מבוססי Selenium
+"""
+
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip('bs4')
+pytest.importorskip('selenium')
+
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import NoSuchElementException
+
+from scrapers.ksp_scraper import HTML_PARSER, PRODUCT_CARD_SELECTOR, KSPScraper, STRATEGY_STATIC
+from utils.hebrew_utils import normalize_hebrew_text
+
+PRODUCT_PAGES = [
+    'ksp_product_jsonld.html',
+    'ksp_product_out_of_stock.html',
+    'ksp_product_selectors.html',
+    'ksp_product_meta.html',
+]
+
+
+class FakeElement:
+    """WebElement מעל BeautifulSoup - find_element / text / get_attribute כמו ב-Selenium"""
+
+    def __init__(self, tag):
+        self.tag = tag
+
+    @property
+    def text(self):
+        return " ".join(self.tag.get_text(" ").split())
+
+    def find_element(self, by, selector):
+        found = self.tag.select_one(selector)
+        if found is None:
+            raise NoSuchElementException(selector)
+        return FakeElement(found)
+
+    def find_elements(self, by, selector):
+        return [FakeElement(tag) for tag in self.tag.select(selector)]
+
+    def get_attribute(self, name):
+        return self.tag.get(name)
+
+
+class FakeDriver(FakeElement):
+    def __init__(self, html):
+        super().__init__(BeautifulSoup(html, HTML_PARSER))
+        self.page_source = html
+
+    def get(self, url):
+        pass
+
+
+class FakePool:
+    def __init__(self, driver):
+        self._driver = driver
+
+    @contextmanager
+    def driver(self, timeout=None):
+        yield self._driver
+
+
+class OpenGuard:
+    def check(self):
+        pass
+
+    @contextmanager
+    def guard(self):
+        yield
+
+
+@pytest.fixture
+def scraper():
+    scraper = KSPScraper()
+    scraper.domain_guard = OpenGuard()
+    return scraper
+
+
+def _without_timestamp(products):
+    return [{key: value for key, value in product.items() if key != 'last_updated'} for product in products]
+
+
+def _selenium_search_results(scraper, html, max_results):
+    """המסלול הישן: find_element לכל שדה בכל כרטיס"""
+    driver = FakeDriver(html)
+    products = []
+    for element in driver.find_elements(None, PRODUCT_CARD_SELECTOR)[:max_results]:
+        product = scraper._extract_product_from_element(element, driver)
+        if product:
+            products.append(product)
+    return products
+
+
+@pytest.mark.parametrize('max_results', [20, 2])
+def test_page_source_extraction_matches_selenium(scraper, fixture_html, max_results):
+    html = fixture_html('ksp_search.html')
+
+    fast = scraper.extract_products_from_html(html, max_results)
+    slow = _selenium_search_results(scraper, html, max_results)
+
+    assert _without_timestamp(fast) == _without_timestamp(slow)
+
+
+def test_page_source_extraction_fields(scraper, fixture_html):
+    products = scraper.extract_products_from_html(fixture_html('ksp_search.html'))
+
+    # כרטיס ללא מחיר וכרטיס ללא שם מדולגים
+    assert len(products) == 4
+
+    first = products[0]
+    assert first['name'] == normalize_hebrew_text('אייפון 15 128GB שחור')
+    assert first['price'] == 3499
+    assert first['url'] == 'https://ksp.co.il/web/item/101'
+    assert first['image_url'] == 'https://ksp.co.il/img/101.jpg'
+    assert first['availability'] == 'במלאי'
+    assert first['store'] == 'KSP'
+
+    assert products[1]['image_url'] == 'https://cdn.ksp.co.il/102.jpg'
+    assert products[1]['availability'] == 'אזל מהמלאי'
+    assert products[2]['url'] is None and products[2]['image_url'] is None
+    assert products[2]['availability'] == 'הזמנה מראש'
+    assert len(products[3]['description']) == 200
+
+
+def test_extraction_mode_dom_uses_selenium_path(scraper, fixture_html):
+    html = fixture_html('ksp_search.html')
+    scraper.extraction_mode = 'dom'
+    dom = scraper._extract_results(FakeDriver(html), 20)
+    scraper.extraction_mode = 'page_source'
+    page_source = scraper._extract_results(FakeDriver(html), 20)
+
+    assert _without_timestamp(dom) == _without_timestamp(page_source)
+
+
+@pytest.mark.parametrize('page', PRODUCT_PAGES)
+def test_static_price_matches_selenium(scraper, fixture_html, page):
+    html = fixture_html(page)
+
+    static = scraper._parse_price_from_html(html)
+    scraper.driver_pool = FakePool(FakeDriver(html))
+    selenium = scraper._fetch_price_selenium('https://ksp.co.il/web/item/1')
+
+    assert static is not None and selenium is not None
+    assert (static['price'], static['availability']) == (selenium['price'], selenium['availability'])
+
+
+@pytest.mark.parametrize('page, price, availability', [
+    ('ksp_product_jsonld.html', 3499, 'במלאי'),
+    ('ksp_product_out_of_stock.html', 899, 'אזל מהמלאי'),
+    ('ksp_product_selectors.html', 79.9, 'הזמנה מראש'),
+    ('ksp_product_meta.html', 1249, 'במלאי'),
+])
+def test_static_price_extraction(scraper, fixture_html, page, price, availability):
+    result = scraper._parse_price_from_html(fixture_html(page))
+
+    assert result == {'price': pytest.approx(price), 'availability': availability}
+
+
+def test_static_price_missing(scraper):
+    assert scraper._parse_price_from_html('<html><body><h1>אין מחיר</h1></body></html>') is None
+
+
+@pytest.mark.parametrize('data, expected', [
+    ({'@type': 'Product', 'offers': {'price': '10'}}, {'price': '10'}),
+    ({'@type': 'Product', 'offers': [{'price': '11'}, {'price': '12'}]}, {'price': '11'}),
+    ({'@type': 'Product', 'offers': {'lowPrice': '9', 'highPrice': '15'}},
+     {'lowPrice': '9', 'highPrice': '15', 'price': '9'}),
+    ({'@graph': [{'@type': 'WebPage'}, {'@type': 'Product', 'offers': {'price': '13'}}]}, {'price': '13'}),
+    ([{'@type': 'Organization'}], None),
+    ({'@type': 'Product', 'offers': []}, None),
+])
+def test_find_json_ld_offer(scraper, data, expected):
+    assert scraper._find_json_ld_offer(data) == expected
+
+
+def test_static_fetch_result_carries_source(scraper, fixture_html, monkeypatch):
+    html = fixture_html('ksp_product_jsonld.html')
+
+    class Response:
+        status_code = 200
+        text = html
+        headers = {'ETag': '"v1"'}
+
+    monkeypatch.setattr('scrapers.ksp_scraper.conditional_fetch', lambda *args, **kwargs: Response())
+    monkeypatch.setattr('scrapers.ksp_scraper.get_page_state', lambda url: {})
+
+    result = scraper._fetch_price_static('https://ksp.co.il/web/item/fixture-jsonld')
+
+    assert result['source'] == STRATEGY_STATIC
+    assert result['price'] == 3499
+    # מצב העמוד נשמר רק אחרי כתיבת המחיר - כאן הוא רק מצורף לתוצאה
+    assert result['page_state']['etag'] == '"v1"'
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+NotificationDispatcher מול שרת SMTP מקומי (aiosmtpd) - digest אחד לכל נמען,
+וניסיון חוזר רק למה שנכשל
+"""
+
+import socket
+from collections import deque
+from contextlib import contextmanager
+from email import message_from_bytes, policy
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('aiosmtpd')
+
+from aiosmtpd.controller import Controller
+
+from services import notification_dispatcher
+from services.notification_dispatcher import (
+    CHANNEL_EMAIL, CHANNEL_SMS, KIND_PRICE_ALERT, KIND_TRACKING_STARTED, KIND_TRACKING_STOPPED,
+    NotificationDispatcher, SMTPConnection
+)
+
+FLAKY_RECIPIENT = 'flaky@example.com'
+PRODUCT_NAMES = {1: 'אייפון 15', 2: 'מקלדת מכנית'}
+
+
+class RecordingHandler:
+    """שומר כל הודעה שהתקבלה; דוחה את FLAKY_RECIPIENT בפעמים הראשונות"""
+
+    def __init__(self):
+        self.failures = 0
+        self.messages = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == FLAKY_RECIPIENT and self.failures > 0:
+            self.failures -= 1
+            return '450 Mailbox temporarily unavailable'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(message_from_bytes(envelope.content, policy=policy.default))
+        return '250 Message accepted'
+
+
+class FakeApp:
+    @contextmanager
+    def app_context(self):
+        yield
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *criteria):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeDB:
+    """שמות המוצרים ל-digest - ללא מסד נתונים"""
+
+    def __init__(self, product_names):
+        self.session = SimpleNamespace(query=lambda *columns: FakeQuery(list(product_names.items())))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _user(user_id, email=None, phone=None):
+    return SimpleNamespace(id=user_id, email=email, phone=phone)
+
+
+def _alert(alert_id, product_id):
+    return SimpleNamespace(id=alert_id, product_id=product_id)
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=_free_port())
+    controller.start()
+    yield handler, controller
+    controller.stop()
+
+
+@pytest.fixture
+def dispatcher(smtp_server, monkeypatch):
+    _, controller = smtp_server
+    # תור מקומי בלבד, בלי ה-thread שמרוקן אותו ברקע
+    monkeypatch.setattr(notification_dispatcher, 'get_redis', lambda: None)
+    monkeypatch.setattr(NotificationDispatcher, '_local_queue', deque())
+    monkeypatch.setattr(NotificationDispatcher, '_local_retry', [])
+    monkeypatch.setattr(NotificationDispatcher, '_ensure_local_flusher', lambda self: None)
+
+    connection = SMTPConnection(controller.hostname, controller.port, use_tls=False)
+    monkeypatch.setattr(notification_dispatcher, '_smtp_connection', connection)
+
+    yield NotificationDispatcher(FakeApp(), FakeDB(PRODUCT_NAMES), base_delay=0)
+    connection.close()
+
+
+def test_one_digest_per_recipient(dispatcher, smtp_server):
+    handler, _ = smtp_server
+    alice, bob = _user(1, 'alice@example.com'), _user(2, 'bob@example.com')
+
+    dispatcher.enqueue(KIND_TRACKING_STARTED, alice, _alert(10, 1))
+    dispatcher.enqueue(KIND_PRICE_ALERT, alice, _alert(10, 1), old_price=3999.0, new_price=3499.0)
+    dispatcher.enqueue(KIND_TRACKING_STOPPED, alice, _alert(11, 2))
+    dispatcher.enqueue(KIND_TRACKING_STARTED, bob, _alert(12, 2))
+
+    summary = dispatcher.dispatch()
+
+    assert summary == {'items': 4, 'messages': 2, 'retried': 0, 'dead': 0}
+    by_recipient = {message['To']: message for message in handler.messages}
+    assert sorted(by_recipient) == ['alice@example.com', 'bob@example.com']
+
+    digest = by_recipient['alice@example.com']
+    assert digest['Subject'] == 'מעקב מחירים - 3 עדכונים'
+    body = digest.get_content()
+    assert 'אייפון 15' in body and 'מקלדת מכנית' in body and '₪3,499' in body
+    assert by_recipient['bob@example.com']['Subject'] == 'מעקב מחירים - עדכון'
+
+
+def test_failed_send_is_retried(dispatcher, smtp_server):
+    handler, _ = smtp_server
+    handler.failures = 1
+
+    dispatcher.enqueue(KIND_TRACKING_STARTED, _user(1, FLAKY_RECIPIENT), _alert(10, 1))
+    dispatcher.enqueue(KIND_TRACKING_STARTED, _user(2, 'bob@example.com'), _alert(11, 2))
+
+    first = dispatcher.dispatch()
+
+    assert first == {'items': 2, 'messages': 1, 'retried': 1, 'dead': 0}
+    assert [message['To'] for message in handler.messages] == ['bob@example.com']
+    [pending] = NotificationDispatcher._local_retry
+    assert (pending['attempts'], pending['channel']) == (1, CHANNEL_EMAIL)
+
+    # base_delay=0 - הניסיון החוזר כבר בשל
+    second = dispatcher.dispatch()
+
+    assert second == {'items': 1, 'messages': 1, 'retried': 0, 'dead': 0}
+    assert [message['To'] for message in handler.messages] == ['bob@example.com', FLAKY_RECIPIENT]
+    assert NotificationDispatcher._local_retry == []
+
+
+def test_sms_failure_retries_only_failed_items(dispatcher, smtp_server, monkeypatch):
+    handler, _ = smtp_server
+    user = _user(1, 'alice@example.com', phone='0501234567')
+    alerts = {10: _alert(10, 1), 11: _alert(11, 2)}
+    failures = {11: 1}
+    sent = []
+
+    class FlakyNotificationService:
+        def send_tracking_confirmation(self, user, alert):
+            if failures.get(alert.id):
+                failures[alert.id] -= 1
+                raise RuntimeError('SMS gateway timeout')
+            sent.append(alert.id)
+
+    monkeypatch.setattr(notification_dispatcher, 'NotificationService', FlakyNotificationService)
+    monkeypatch.setattr(NotificationDispatcher, '_sms_targets', staticmethod(lambda items: ({1: user}, alerts)))
+
+    dispatcher.enqueue(KIND_TRACKING_STARTED, user, alerts[10])
+    dispatcher.enqueue(KIND_TRACKING_STARTED, user, alerts[11])
+
+    first = dispatcher.dispatch()
+
+    # digest אחד באימייל, SMS אחד שנשלח ואחד שנכשל
+    assert first == {'items': 2, 'messages': 2, 'retried': 1, 'dead': 0}
+    assert [message['To'] for message in handler.messages] == ['alice@example.com']
+    [pending] = NotificationDispatcher._local_retry
+    assert (pending['alert_id'], pending['channel']) == (11, CHANNEL_SMS)
+
+    second = dispatcher.dispatch()
+
+    # רק ה-SMS שנכשל נשלח שוב; האימייל וה-SMS שהצליח לא חוזרים
+    assert second == {'items': 1, 'messages': 1, 'retried': 0, 'dead': 0}
+    assert sent == [10, 11]
+    assert len(handler.messages) == 1
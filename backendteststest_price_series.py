@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+PriceSeries - סינון מחירים שלא השתנו וצבירת דליים שעתיים/יומיים
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.price_series import (
+    RESOLUTION_DAY, RESOLUTION_HOUR, PriceSeries, filter_changed_prices, floor_time
+)
+
+BASE = datetime(2024, 5, 1, 10, 0)
+
+
+def test_filter_changed_prices():
+    rows = [
+        {'product_id': 1, 'price': 100.0},
+        {'product_id': 2, 'price': 250.0},
+        {'product_id': 3, 'price': 80.0},
+        {'product_id': 4, 'price': 40.0},
+    ]
+    previous = {1: 100.0, 2: 240.0, 3: None}
+
+    changed = filter_changed_prices(rows, previous)
+
+    # 1 זהה למחיר האחרון; 3 ללא היסטוריה ו-4 לא מוכר - נשמרים
+    assert [row['product_id'] for row in changed] == [2, 3, 4]
+
+
+def test_filter_changed_prices_empty():
+    assert filter_changed_prices([], {1: 10.0}) == []
+
+
+@pytest.mark.parametrize('resolution, expected', [
+    (RESOLUTION_HOUR, datetime(2024, 5, 1, 10, 0)),
+    (RESOLUTION_DAY, datetime(2024, 5, 1, 0, 0)),
+])
+def test_floor_time(resolution, expected):
+    assert floor_time(datetime(2024, 5, 1, 10, 47, 31, 120), resolution) == expected
+
+
+def _raw(product_id, minutes, price):
+    created_at = BASE + timedelta(minutes=minutes)
+    return product_id, created_at, price, price, price, 1
+
+
+def test_aggregate_raw_to_hourly():
+    rows = [
+        _raw(1, 5, 100.0), _raw(1, 20, 90.0), _raw(1, 50, 95.0),
+        _raw(1, 70, 99.0),
+        _raw(2, 10, 500.0),
+    ]
+
+    buckets = {
+        (bucket['product_id'], bucket['bucket_start']): bucket
+        for bucket in PriceSeries._aggregate(rows, RESOLUTION_HOUR, BASE, BASE + timedelta(hours=2))
+    }
+
+    assert len(buckets) == 4
+    first = buckets[(1, BASE)]
+    assert (first['min_price'], first['max_price'], first['last_price'], first['samples']) == (90.0, 100.0, 95.0, 3)
+    assert buckets[(1, BASE + timedelta(hours=1))]['last_price'] == 99.0
+    assert buckets[(2, BASE)]['samples'] == 1
+    # שעה ללא שינוי - המחיר נמשך מהשעה הקודמת
+    carried = buckets[(2, BASE + timedelta(hours=1))]
+    assert (carried['min_price'], carried['max_price'], carried['last_price'], carried['samples']) == (500.0, 500.0, 500.0, 0)
+    assert all(bucket['resolution'] == RESOLUTION_HOUR for bucket in buckets.values())
+
+
+def test_hourly_then_daily_matches_direct_daily():
+    rows = [
+        _raw(product_id, minutes, price)
+        for product_id in (1, 2)
+        for minutes, price in ((0, 120.0), (45, 110.0), (130, 130.0), (300, 105.0), (600, 115.0))
+    ]
+
+    day = floor_time(BASE, RESOLUTION_DAY)
+    next_day = day + timedelta(days=1)
+
+    hourly = PriceSeries._aggregate(rows, RESOLUTION_HOUR, day, next_day)
+    hourly_rows = sorted(
+        (b['product_id'], b['bucket_start'], b['min_price'], b['max_price'], b['last_price'], b['samples'])
+        for b in hourly
+    )
+    via_hourly = PriceSeries._aggregate(hourly_rows, RESOLUTION_DAY, day, next_day)
+    direct = PriceSeries._aggregate(rows, RESOLUTION_DAY, day, next_day)
+
+    def by_key(buckets):
+        return sorted(buckets, key=lambda bucket: (bucket['product_id'], bucket['bucket_start']))
+
+    assert by_key(via_hourly) == by_key(direct)
+    assert by_key(direct)[0]['min_price'] == 105.0
+    assert by_key(direct)[0]['last_price'] == 115.0
+    assert by_key(direct)[0]['samples'] == 5
+
+
+def _bucket_values(buckets):
+    return [
+        (bucket['bucket_start'], bucket['min_price'], bucket['max_price'], bucket['last_price'], bucket['samples'])
+        for bucket in buckets
+    ]
+
+
+def test_change_inside_bucket_keeps_carried_price():
+    # המחיר 100 מלפני 10:00 וירד ל-80 ב-10:30: הדלי של 10:00 הוא 100/80,
+    # והשעות הבאות (ללא שינוי) נמשכות ב-80
+    rows = [_raw(1, 30, 80.0)]
+
+    buckets = PriceSeries._aggregate(rows, RESOLUTION_HOUR, BASE, BASE + timedelta(hours=3), {1: 100.0})
+
+    assert _bucket_values(buckets) == [
+        (BASE, 80.0, 100.0, 80.0, 1),
+        (BASE + timedelta(hours=1), 80.0, 80.0, 80.0, 0),
+        (BASE + timedelta(hours=2), 80.0, 80.0, 80.0, 0),
+    ]
+
+
+def test_carried_price_without_changes_fills_every_bucket():
+    day = floor_time(BASE, RESOLUTION_DAY)
+
+    buckets = PriceSeries._aggregate([], RESOLUTION_DAY, day, day + timedelta(days=2), {7: 42.0})
+
+    assert _bucket_values(buckets) == [
+        (day, 42.0, 42.0, 42.0, 0),
+        (day + timedelta(days=1), 42.0, 42.0, 42.0, 0),
+    ]
+
+
+def test_product_without_history_starts_at_first_change():
+    rows = [_raw(3, 90, 15.0)]
+
+    buckets = PriceSeries._aggregate(rows, RESOLUTION_HOUR, BASE, BASE + timedelta(hours=3))
+
+    assert _bucket_values(buckets) == [
+        (BASE + timedelta(hours=1), 15.0, 15.0, 15.0, 1),
+        (BASE + timedelta(hours=2), 15.0, 15.0, 15.0, 0),
+    ]
+
+
+def test_daily_from_carried_hourly_matches_direct_daily():
+    # שינוי באמצע שעה, ושעות שלמות בלי שינוי בין השינויים
+    rows = [_raw(1, 30, 80.0), _raw(1, 245, 95.0)]
+    carried = {1: 100.0}
+    day = floor_time(BASE, RESOLUTION_DAY)
+    next_day = day + timedelta(days=1)
+
+    hourly = PriceSeries._aggregate(rows, RESOLUTION_HOUR, day, next_day, carried)
+    hourly_rows = [
+        (b['product_id'], b['bucket_start'], b['min_price'], b['max_price'], b['last_price'], b['samples'])
+        for b in hourly
+    ]
+
+    assert len(hourly) == 24
+    assert PriceSeries._aggregate(hourly_rows, RESOLUTION_DAY, day, next_day, carried) == \
+        PriceSeries._aggregate(rows, RESOLUTION_DAY, day, next_day, carried)
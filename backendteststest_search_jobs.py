@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+SearchJobQueue - משימות נשלחות לאפליקציית ה-Celery המוגדרת, זו שה-worker צורך
+"""
+
+from conftest import run_in_backend
+
+DISPATCH_CHECK = '''
+import wsgi
+from services import search_jobs
+
+sent = []
+search_jobs.celery_app.send_task = lambda name, args=None, **kwargs: sent.append((name, args))
+
+queue = search_jobs.SearchJobQueue(wsgi.app, None)
+queue.mode = 'celery'
+queue._dispatch('job-1')
+assert sent == [('tasks.run_search_job', ['job-1'])], sent
+assert queue._executor is None, 'dispatch fell back to the local executor'
+
+import services.tasks
+assert services.tasks.celery is search_jobs.celery_app, 'API and worker use different Celery apps'
+assert search_jobs.celery_app.conf.broker_url, 'no broker configured'
+'''
+
+
+def test_dispatch_uses_configured_celery_app(tmp_path):
+    # תהליך ה-API טוען רק את wsgi - services.tasks נטען בבדיקה רק אחרי השליחה
+    result = run_in_backend(DISPATCH_CHECK, tmp_path)
+    assert result.returncode == 0, result.stderr
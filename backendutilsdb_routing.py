@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DB Routing - הגדרות מאגר החיבורים וניתוב קריאות ל-read replica
+
+נתיבים שמסומנים ב-@read_only קוראים מה-replica (DATABASE_REPLICA_URL)
+כשהוא מוגדר; כתיבות (flush של ה-session ופקודות INSERT/UPDATE/DELETE)
+תמיד נשלחות ל-primary. ללא replica כל הבקשות הולכות ל-primary.
+
+הגדרות המאגר נקראות ממשתני סביבה: DB_POOL_SIZE, DB_MAX_OVERFLOW,
+DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+"""
+
+import os
+import time
+import logging
+import threading
+from functools import wraps
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+from flask_sqlalchemy.session import Session
+
+from utils.metrics import observe_pool_checkout, set_db_pool_stats
+
+logger = logging.getLogger(__name__)
+
+POOL_PRIMARY = 'primary'
+POOL_REPLICA = 'replica'
+
+# האם הבקשה הנוכחית (thread / greenlet) מסומנת לקריאה בלבד
+_routing = threading.local()
+
+_replica_engine = None
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool שמודד כמה זמן חיכתה כל בקשה לחיבור פנוי"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            observe_pool_checkout(self.logging_name or POOL_PRIMARY, time.perf_counter() - started)
+
+
+def engine_options(uri: str, pool_name: str = POOL_PRIMARY) -> Dict:
+    """
+    אפשרויות create_engine / SQLALCHEMY_ENGINE_OPTIONS לפי משתני הסביבה
+    """
+    options = {
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    }
+
+    # ל-SQLite אין מאגר חיבורים אמיתי
+    if not uri.startswith('sqlite'):
+        options.update({
+            'poolclass': TimedQueuePool,
+            'pool_logging_name': pool_name,
+            'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+            'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        })
+    return options
+
+
+def configure_replica(url: Optional[str]):
+    """יצירת ה-engine של ה-replica (None מבטל את הניתוב)"""
+    global _replica_engine
+
+    _replica_engine = create_engine(url, **engine_options(url, POOL_REPLICA)) if url else None
+    if url:
+        logger.info("Read-only routes are routed to the database replica")
+    return _replica_engine
+
+
+def get_replica_engine():
+    return _replica_engine
+
+
+def read_only(view):
+    """
+    סימון נתיב כקריאה בלבד - השאילתות שלו נשלחות ל-replica
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        _routing.read_only = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _routing.read_only = False
+    return wrapper
+
+
+class RoutingSession(Session):
+    """
+    Session שבוחר replica לקריאות בנתיבי @read_only
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None and _replica_engine is not None
+            and getattr(_routing, 'read_only', False)
+            and not self._flushing
+            and not getattr(clause, 'is_dml', False)
+        ):
+            return _replica_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def refresh_pool_stats(primary_engine):
+    """עדכון gauges של החיבורים התפוסים בכל מאגר"""
+    engines = {POOL_PRIMARY: primary_engine, POOL_REPLICA: _replica_engine}
+    for name, engine in engines.items():
+        pool = getattr(engine, 'pool', None)
+        if isinstance(pool, QueuePool):
+            set_db_pool_stats(name, pool.checkedout(), pool.overflow())
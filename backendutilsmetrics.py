@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Metrics - מדדי Prometheus לנתיבי ה-API, המסד, המטמון וה-scrapers
+
+ב-worker של celery (prefork) כל תהליך בן כותב מדדים משלו; כאשר מוגדר
+PROMETHEUS_MULTIPROC_DIR המדדים של כל התהליכים מאוחדים בחשיפה.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Tuple
+
+# תיקיית המדדים המשותפת חייבת להתקיים לפני ייבוא prometheus_client
+if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    os.makedirs(os.getenv('PROMETHEUS_MULTIPROC_DIR'), exist_ok=True)
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Gauge, Histogram, REGISTRY,
+        generate_latest, start_http_server
+    )
+    from prometheus_client import multiprocess
+except ImportError:  # prometheus_client הוא רכיב אופציונלי
+    CONTENT_TYPE_LATEST = 'text/plain; charset=utf-8'
+    Gauge = Histogram = None
+
+logger = logging.getLogger(__name__)
+
+# זמני scraping נעים בין עשרות מילישניות (HTTP) לעשרות שניות (Selenium)
+SCRAPER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 15, 30, 60)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 5, 30)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+class _NoopMetric:
+    """מדד ריק כאשר prometheus_client אינו מותקן"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, *args):
+        pass
+
+    def set(self, *args):
+        pass
+
+    def inc(self, *args):
+        pass
+
+
+def _histogram(name: str, documentation: str, labels: List[str], buckets: Tuple):
+    if Histogram is None:
+        return _NoopMetric()
+    return Histogram(name, documentation, labels, buckets=buckets)
+
+
+def _gauge(name: str, documentation: str, labels: Tuple = ()):
+    if Gauge is None:
+        return _NoopMetric()
+    return Gauge(name, documentation, labels, multiprocess_mode='livemax')
+
+
+REQUEST_LATENCY = _histogram(
+    'http_request_duration_seconds', 'API request latency',
+    ['endpoint', 'method', 'status'],
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+DB_QUERY_LATENCY = _histogram(
+    'db_query_duration_seconds', 'SQL statement execution time', ['operation'], DB_BUCKETS
+)
+DB_POOL_CHECKOUT_WAIT = _histogram(
+    'db_pool_checkout_wait_seconds', 'Time waiting for a connection from the pool', ['pool'], POOL_WAIT_BUCKETS
+)
+SCRAPER_DURATION = _histogram(
+    'scraper_duration_seconds', 'Scraper time by store and phase', ['store', 'phase'], SCRAPER_BUCKETS
+)
+SEARCH_CACHE_HIT_RATIO = _gauge('search_cache_hit_ratio', 'Search cache hit ratio (hits + stale hits / lookups)')
+DRIVER_POOL_IN_USE = _gauge('driver_pool_in_use', 'WebDriver sessions currently borrowed')
+DRIVER_POOL_SIZE = _gauge('driver_pool_size', 'WebDriver sessions currently open')
+DRIVER_POOL_UTILIZATION = _gauge('driver_pool_utilization', 'Borrowed sessions / pool max size')
+DB_POOL_CHECKED_OUT = _gauge('db_pool_checked_out', 'Connections currently checked out', ('pool',))
+DB_POOL_OVERFLOW = _gauge('db_pool_overflow', 'Connections open beyond pool_size', ('pool',))
+QUEUE_DEPTH = _gauge('queue_depth', 'Pending messages per Redis-backed queue', ('queue',))
+
+# פונקציות שמעדכנות gauges לפני כל חשיפה
+_refreshers: List[Callable[[], None]] = []
+_refreshers_lock = threading.Lock()
+
+
+def register_refresh(callback: Callable[[], None]):
+    """רישום פונקציה שתרוץ לפני כל קריאה ל-/metrics"""
+    with _refreshers_lock:
+        _refreshers.append(callback)
+
+
+def observe_scraper_phase(store: str, phase: str, seconds: float):
+    SCRAPER_DURATION.labels(store=store, phase=phase).observe(seconds)
+
+
+def set_driver_pool_stats(stats: Dict):
+    DRIVER_POOL_IN_USE.set(stats['in_use'])
+    DRIVER_POOL_SIZE.set(stats['total'])
+    DRIVER_POOL_UTILIZATION.set(stats['in_use'] / stats['max_size'] if stats['max_size'] else 0)
+
+
+def observe_pool_checkout(pool: str, seconds: float):
+    DB_POOL_CHECKOUT_WAIT.labels(pool=pool).observe(seconds)
+
+
+def set_db_pool_stats(pool: str, checked_out: int, overflow: int):
+    DB_POOL_CHECKED_OUT.labels(pool=pool).set(checked_out)
+    DB_POOL_OVERFLOW.labels(pool=pool).set(max(overflow, 0))
+
+
+def instrument_engine(engine):
+    """מדידת זמן כל פקודת SQL דרך אירועי SQLAlchemy"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'UNKNOWN'
+        DB_QUERY_LATENCY.labels(operation=operation).observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, 'handle_error')
+    def _handle_error(context):
+        if context.connection is not None and context.connection.info.get('query_started'):
+            context.connection.info['query_started'].pop()
+
+
+def metrics_response() -> Tuple[bytes, str]:
+    """
+    גוף התשובה ל-/metrics ו-Content-Type
+    """
+    if Histogram is None:
+        return b'# prometheus_client is not installed\n', CONTENT_TYPE_LATEST
+
+    with _refreshers_lock:
+        refreshers = list(_refreshers)
+    for refresh in refreshers:
+        try:
+            refresh()
+        except Exception as e:
+            logger.debug(f"Metrics refresh failed: {e}")
+
+    return generate_latest(_exposition_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int):
+    """שרת /metrics נפרד (עבור ה-worker של celery)"""
+    if Histogram is None:
+        logger.warning("prometheus_client is not installed, worker metrics disabled")
+        return
+    start_http_server(port, registry=_exposition_registry())
+    logger.info(f"Metrics server listening on port {port}")
+
+
+def _exposition_registry():
+    if not os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Request Profiler - פרופיילינג לבקשות בודדות לפי דרישה או בדגימה
+
+בקשה נבחרת לפרופיילינג כאשר נשלחת הכותרת X-Profile עם הטוקן שהוגדר
+(PROFILER_TOKEN), או לפי שיעור דגימה (PROFILER_SAMPLE_RATE). לכל בקשה
+כזו נשמרים פרופיל cProfile (או pyinstrument אם מותקן ונבחר) ורשימת
+שאילתות ה-SQL עם זמניהן. נשמרות רק N הבקשות האיטיות ביותר.
+
+כשהפרופיילר כבוי, העלות לבקשה היא בדיקת כותרת אחת.
+
+תחת workers של gevent נאספים רק זמן הבקשה ושאילתות ה-SQL (threading.local
+הופך ל-greenlet-local אחרי ה-monkey patching). פרופיל cProfile/pyinstrument
+מודד את כל ה-thread, ושם הוא היה כולל את כל הבקשות שרצו במקביל, ולכן הוא
+מושמט. לפרופיל מלא מריצים worker מסוג gthread - ראו gunicorn.conf.py.
+"""
+
+import os
+import io
+import json
+import time
+import uuid
+import heapq
+import pstats
+import random
+import cProfile
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from flask import abort, g, jsonify, request
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:  # pyinstrument הוא רכיב אופציונלי
+    PyinstrumentProfiler = None
+
+try:
+    from gevent import monkey as gevent_monkey
+except ImportError:  # gevent קיים רק ב-worker של gunicorn
+    gevent_monkey = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+TOKEN_HEADER = 'X-Profiler-Token'
+
+# השאילתות של הבקשה שנמצאת כעת בפרופיילינג (לכל thread)
+_active = threading.local()
+
+
+class RequestProfiler:
+    """
+    פרופיילר לבקשות Flask עם שמירת N הבקשות האיטיות ביותר
+    """
+
+    def __init__(self, app=None, engine=None, token: Optional[str] = None, sample_rate: float = 0.0,
+                 keep: int = 20, directory: Optional[str] = None, engine_name: str = 'cprofile'):
+        self.token = token
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.directory = directory
+        self.use_pyinstrument = engine_name == 'pyinstrument' and PyinstrumentProfiler is not None
+
+        self.capture_profile = True
+
+        self._traces: List = []  # min-heap לפי משך
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app, engine)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token) or self.sample_rate > 0
+
+    def init_app(self, app, engine=None):
+        if not self.enabled:
+            return
+
+        # תחת gevent נשמרים רק זמני הבקשה והשאילתות, בלי פרופיל קוד
+        self.capture_profile = not (gevent_monkey is not None and gevent_monkey.is_module_patched('threading'))
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        app.add_url_rule('/api/debug/profiles', 'list_profiles', self._list_view)
+        app.add_url_rule('/api/debug/profiles/<trace_id>', 'get_profile', self._get_view)
+
+        if engine is not None:
+            self._instrument_engine(engine)
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+        logger.info(
+            f"Request profiler enabled (sample_rate={self.sample_rate}, keep={self.keep}, "
+            f"code_profile={self.capture_profile})"
+        )
+
+    def traces(self) -> List[Dict]:
+        """הבקשות האיטיות ביותר, מהאיטית לזריזה (ללא הפרופיל המלא)"""
+        with self._lock:
+            traces = [trace for _, _, trace in self._traces]
+        return [
+            {key: value for key, value in trace.items() if key != 'profile'}
+            for trace in sorted(traces, key=lambda trace: trace['duration_ms'], reverse=True)
+        ]
+
+    def get(self, trace_id: str) -> Optional[Dict]:
+        with self._lock:
+            for _, _, trace in self._traces:
+                if trace['id'] == trace_id:
+                    return trace
+        return None
+
+    def _should_profile(self) -> bool:
+        header = request.headers.get(PROFILE_HEADER)
+        if header is not None:
+            return bool(self.token) and header == self.token
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _start(self):
+        if not self._should_profile():
+            return
+
+        profiler = None
+        if self.capture_profile:
+            try:
+                if self.use_pyinstrument:
+                    profiler = PyinstrumentProfiler()
+                    profiler.start()
+                else:
+                    profiler = cProfile.Profile()
+                    profiler.enable()
+            except ValueError as e:
+                # פרופיילר אחר כבר פעיל בתהליך (Python 3.12+)
+                logger.debug(f"Skipping request profile: {e}")
+                return
+
+        _active.queries = []
+        g.profiler = profiler
+        g.profile_started = time.perf_counter()
+
+    def _finish(self, response):
+        started = g.pop('profile_started', None)
+        if started is None:
+            return response
+
+        profiler = g.pop('profiler', None)
+        profile = None
+        if profiler is not None and self.use_pyinstrument:
+            profiler.stop()
+            profile = profiler.output_text(unicode=True, color=False)
+        elif profiler is not None:
+            profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(40)
+            profile = output.getvalue()
+
+        queries = getattr(_active, 'queries', None) or []
+        _active.queries = None
+
+        trace = {
+            'id': uuid.uuid4().hex[:12],
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+            'timestamp': datetime.utcnow().isoformat(),
+            'query_count': len(queries),
+            'query_time_ms': round(sum(query['duration_ms'] for query in queries), 2),
+            'queries': queries,
+            'profile': profile,
+        }
+        self._store(trace)
+        return response
+
+    def _teardown(self, exception=None):
+        # בקשה שנכשלה לפני after_request - עוצרים את הפרופיילר ואת איסוף השאילתות
+        _active.queries = None
+        g.pop('profile_started', None)
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            if self.use_pyinstrument:
+                profiler.stop()
+            else:
+                profiler.disable()
+
+    def _store(self, trace: Dict):
+        with self._lock:
+            entry = (trace['duration_ms'], trace['id'], trace)
+            if len(self._traces) < self.keep:
+                heapq.heappush(self._traces, entry)
+            elif entry[0] > self._traces[0][0]:
+                heapq.heapreplace(self._traces, entry)
+            else:
+                return
+
+        if self.directory:
+            path = os.path.join(self.directory, f"{trace['timestamp'][:19].replace(':', '')}_{trace['id']}.json")
+            try:
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(trace, f, ensure_ascii=False, indent=2)
+            except OSError as e:
+                logger.warning(f"Failed to write profile {trace['id']}: {e}")
+
+    def _instrument_engine(self, engine):
+        from sqlalchemy import event
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if getattr(_active, 'queries', None) is not None:
+                conn.info.setdefault('profile_query_started', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            queries = getattr(_active, 'queries', None)
+            started = conn.info.get('profile_query_started')
+            if queries is None or not started:
+                return
+            queries.append({
+                'sql': statement,
+                'duration_ms': round((time.perf_counter() - started.pop()) * 1000, 3),
+                'executemany': executemany,
+            })
+
+    def _authorize(self):
+        # ללא טוקן מוגדר הנתיבים אינם חשופים
+        if not self.token or request.headers.get(TOKEN_HEADER) != self.token:
+            abort(404)
+
+    def _list_view(self):
+        self._authorize()
+        return jsonify({'profiles': self.traces()})
+
+    def _get_view(self, trace_id):
+        self._authorize()
+        trace = self.get(trace_id)
+        if not trace:
+            abort(404)
+        return jsonify(trace)
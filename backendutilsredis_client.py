@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis Client - חיבור משותף ל-Redis עם נפילה חיננית כשאינו זמין
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Optional
+
+try:
+    import redis
+except ImportError:  # Redis הוא רכיב אופציונלי
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# כמה זמן לחכות לפני ניסיון חיבור חוזר אחרי כישלון
+RECONNECT_INTERVAL = 30
+
+_client = None
+_last_failure = 0.0
+_lock = threading.Lock()
+
+
+def get_redis() -> Optional["redis.Redis"]:
+    """
+    לקוח Redis משותף לפי REDIS_URL, או None אם Redis לא מוגדר / לא זמין
+    """
+    global _client, _last_failure
+
+    url = os.getenv('REDIS_URL')
+    if redis is None or not url:
+        return None
+
+    with _lock:
+        if _client is not None:
+            return _client
+
+        if time.monotonic() - _last_failure < RECONNECT_INTERVAL:
+            return None
+
+        try:
+            client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+            client.ping()
+            _client = client
+            return _client
+        except Exception as e:
+            _last_failure = time.monotonic()
+            logger.warning(f"Redis unavailable, using in-process fallback: {e}")
+            return None
+
+
+def reset_redis():
+    """ניתוק הלקוח המשותף - החיבור ייפתח מחדש בקריאה הבאה"""
+    global _client, _last_failure
+
+    with _lock:
+        _client = None
+        _last_failure = time.monotonic()
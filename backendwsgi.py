@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WSGI entry point - נטען ע"י gunicorn (ראו gunicorn.conf.py)
+
+    gunicorn --chdir backend -c backend/gunicorn.conf.py wsgi:app
+
+הטבלאות אינן נוצרות כאן (כל worker היה מנסה ליצור אותן במקביל);
+יש להריץ flask --app app init-db פעם אחת לפני ההפעלה.
+"""
+
+from app import app  # noqa: F401
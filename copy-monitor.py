@@ -3,17 +3,331 @@
 """
 מעקב אחר העתקות של Price Tracker
 Copy Detection Monitor
+
+שימוש:
+    python copy-monitor.py                 # מעקב רציף
+    python copy-monitor.py --once          # סבב בדיקה אחד
+    python copy-monitor.py --once --domains http://127.0.0.1:8000 http://127.0.0.1:8001
+    python copy-monitor.py --once --github-api http://127.0.0.1:9000 --state /tmp/state.db
 """
 
+import os
+import re
+import random
 import requests
 import time
 import hashlib
 import json
+import base64
+import codecs
+import sqlite3
+import asyncio
+import argparse
 from datetime import datetime
+from collections import deque
+from urllib.parse import urlparse
 from bs4 import BeautifulSoup
 import smtplib
 from email.mime.text import MIMEText
 
+try:
+    import aiohttp
+except ImportError:  # ללא aiohttp - סריקה סדרתית עם requests
+    aiohttp = None
+
+TEXT_PHRASE_SCORE = 30
+CODE_PATTERN_SCORE = 40
+REPORT_THRESHOLD = 50
+HIGH_SEVERITY_THRESHOLD = 80
+
+# העמודים שלנו שמהם נבנות טביעות האצבע לזיהוי העתקה עם שינויים קלים
+REFERENCE_PAGES = ['index.html', 'results.html', 'script.js']
+ORIGINAL_REPO_URL = 'https://github.com/rlsite/PriceTracker'
+GITHUB_COPY_THRESHOLD = 70
+NEAR_DUPLICATE_THRESHOLD = 0.3
+
+# "Near-duplicate: index.html (64%)" - אחוז הדמיון אינו חלק מזהות הממצא
+NEAR_DUPLICATE_SCORE = re.compile(r' \(\d+%\)$')
+
+
+class AhoCorasick:
+    """
+    אוטומט Aho-Corasick: כל הביטויים נבדקים במעבר אחד על הטקסט,
+    בלי קשר למספר הביטויים. search מקבל ומחזיר מצב כך שאפשר להזין
+    את הטקסט במקטעים (גם כשביטוי מתפצל בין מקטעים).
+    """
+    
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+    
+    def add(self, pattern, payload):
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][char] = next_state
+            state = next_state
+        self.output[state].append(payload)
+    
+    def build(self):
+        """חישוב קישורי הכישלון (BFS) - אחרי הוספת כל הביטויים"""
+        # ילדי השורש נכשלים תמיד לשורש
+        queue = deque()
+        for state in self.goto[0].values():
+            self.fail[state] = 0
+            queue.append(state)
+        
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+        return self
+    
+    def search(self, text, state=0):
+        """
+        Returns:
+            (רשימת ה-payloads שנמצאו, המצב להמשך הסריקה)
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+        found = []
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.extend(output[state])
+        return found, state
+
+
+class MinHasher:
+    """
+    טביעות MinHash על shingles של מילים - הערכת דמיון Jaccard בין
+    מסמכים גם כשהטקסט שונה מעט (שינוי ניסוח, הוספה/מחיקה של קטעים)
+    """
+    
+    PRIME = (1 << 61) - 1
+    
+    def __init__(self, num_perm=64, shingle_size=5, seed=2025):
+        rng = random.Random(seed)
+        self.shingle_size = shingle_size
+        self.permutations = [(rng.randrange(1, self.PRIME), rng.randrange(0, self.PRIME)) for _ in range(num_perm)]
+    
+    def shingles(self, text):
+        tokens = re.findall(r'\w+', text.lower())
+        size = self.shingle_size
+        return {' '.join(tokens[i:i + size]) for i in range(max(len(tokens) - size + 1, 1))} if tokens else set()
+    
+    def signature(self, text):
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+            for shingle in self.shingles(text)
+        ]
+        if not hashes:
+            return None
+        prime = self.PRIME
+        return [min((a * value + b) % prime for value in hashes) for a, b in self.permutations]
+    
+    @staticmethod
+    def similarity(first, second):
+        if not first or not second:
+            return 0.0
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class SignatureMatcher:
+    """
+    חתימות מדויקות (ביטויים ודפוסי קוד) באוטומט אחד, וטביעות MinHash
+    של העמודים שלנו לניקוד העתקות עם שינויים
+    """
+    
+    def __init__(self, signatures, reference_texts=None, hasher=None):
+        self.automaton = AhoCorasick()
+        for signature, score, label in signatures:
+            self.automaton.add(signature, (score, label))
+        self.automaton.build()
+        self.signature_count = len(signatures)
+        
+        self.hasher = hasher or MinHasher()
+        self.references = {
+            name: self.hasher.signature(text) for name, text in (reference_texts or {}).items()
+        }
+    
+    def scan(self, text, state=0):
+        """
+        Returns:
+            (dict של label -> score שנמצאו, המצב להמשך הסריקה)
+        """
+        found, state = self.automaton.search(text, state)
+        return {label: score for score, label in found}, state
+    
+    def near_duplicate(self, text):
+        """
+        Returns:
+            (שם העמוד הדומה ביותר, דמיון Jaccard משוער 0-1)
+        """
+        if not self.references:
+            return None, 0.0
+        signature = self.hasher.signature(text)
+        return max(
+            ((name, self.hasher.similarity(signature, reference)) for name, reference in self.references.items()),
+            key=lambda match: match[1]
+        )
+
+
+class CopyStateStore:
+    """
+    מצב מתמשך בין סבבים (SQLite): README שכבר נבדק לכל repo (לפי SHA),
+    ETag/Last-Modified לבקשות GitHub, ודיווחים שכבר נשלחו
+    """
+    
+    def __init__(self, path='copy_monitor_state.db'):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS repos (
+                full_name TEXT PRIMARY KEY,
+                html_url TEXT,
+                readme_sha TEXT,
+                score INTEGER,
+                checked_at TEXT,
+                reported_sha TEXT
+            );
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body TEXT
+            );
+            CREATE TABLE IF NOT EXISTS reports (
+                report_key TEXT PRIMARY KEY,
+                target TEXT,
+                created_at TEXT
+            );
+        """)
+        self.conn.commit()
+    
+    def get_repo(self, full_name):
+        row = self.conn.execute(
+            "SELECT readme_sha, score, reported_sha FROM repos WHERE full_name = ?", (full_name,)
+        ).fetchone()
+        return {'readme_sha': row[0], 'score': row[1], 'reported_sha': row[2]} if row else None
+    
+    def save_repo(self, full_name, html_url, readme_sha, score):
+        self.conn.execute(
+            """
+            INSERT INTO repos (full_name, html_url, readme_sha, score, checked_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(full_name) DO UPDATE SET
+                html_url = excluded.html_url, readme_sha = excluded.readme_sha,
+                score = excluded.score, checked_at = excluded.checked_at
+            """,
+            (full_name, html_url, readme_sha, score, datetime.now().isoformat())
+        )
+        self.conn.commit()
+    
+    def mark_repo_reported(self, full_name, readme_sha):
+        self.conn.execute("UPDATE repos SET reported_sha = ? WHERE full_name = ?", (readme_sha, full_name))
+        self.conn.commit()
+    
+    def get_cached_response(self, url):
+        row = self.conn.execute(
+            "SELECT etag, last_modified, body FROM http_cache WHERE url = ?", (url,)
+        ).fetchone()
+        return {'etag': row[0], 'last_modified': row[1], 'body': row[2]} if row else None
+    
+    def save_cached_response(self, url, etag, last_modified, body):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO http_cache (url, etag, last_modified, body) VALUES (?, ?, ?, ?)",
+            (url, etag, last_modified, body)
+        )
+        self.conn.commit()
+    
+    def claim_report(self, report_key, target):
+        """True אם הדיווח חדש (ונרשם כעת), False אם כבר דווח"""
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO reports (report_key, target, created_at) VALUES (?, ?, ?)",
+            (report_key, target, datetime.now().isoformat())
+        )
+        self.conn.commit()
+        return cursor.rowcount == 1
+
+
+class GitHubClient:
+    """
+    בקשות ל-GitHub API עם בקשות מותנות (ETag / Last-Modified - תשובת 304
+    אינה נספרת במכסה) וכיבוד כותרות ה-rate limit
+    """
+    
+    def __init__(self, state, api_url=None, token=None, max_rate_limit_wait=900):
+        self.state = state
+        self.api_url = (api_url or os.getenv('GITHUB_API_URL', 'https://api.github.com')).rstrip('/')
+        self.session = requests.Session()
+        self.session.headers['Accept'] = 'application/vnd.github+json'
+        token = token or os.getenv('GITHUB_TOKEN')
+        if token:
+            self.session.headers['Authorization'] = f"Bearer {token}"
+        self.max_rate_limit_wait = max_rate_limit_wait
+        self.rate_limited_until = 0
+    
+    def get_json(self, path, params=None):
+        """
+        GET ל-API; מחזיר את ה-JSON (מהמטמון אם התשובה 304), או None
+        """
+        if time.time() < self.rate_limited_until:
+            return None
+        
+        request = requests.Request('GET', f"{self.api_url}{path}", params=params).prepare()
+        url = request.url
+        cached = self.state.get_cached_response(url)
+        headers = {}
+        if cached and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+        
+        response = self.session.get(url, headers=headers, timeout=15)
+        self._respect_rate_limit(response)
+        
+        if response.status_code == 304 and cached:
+            return json.loads(cached['body'])
+        if response.status_code != 200:
+            return None
+        
+        self.state.save_cached_response(
+            url, response.headers.get('ETag'), response.headers.get('Last-Modified'), response.text
+        )
+        return response.json()
+    
+    def _respect_rate_limit(self, response):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        retry_after = response.headers.get('Retry-After')
+        
+        if retry_after and response.status_code in (403, 429):
+            wait = float(retry_after)
+        elif remaining is not None and int(remaining) == 0 and reset:
+            wait = max(float(reset) - time.time(), 0) + 1
+        else:
+            return
+        
+        if wait <= self.max_rate_limit_wait:
+            print(f"⏳ GitHub rate limit reached, waiting {wait:.0f}s")
+            time.sleep(wait)
+        else:
+            # המתנה ארוכה מדי - דילוג על שאר הבקשות עד האיפוס
+            print(f"⏳ GitHub rate limit reached, skipping GitHub requests for {wait:.0f}s")
+            self.rate_limited_until = time.time() + wait
+
+
 class CopyDetectionMonitor:
     def __init__(self):
         self.original_signatures = {
@@ -36,37 +350,178 @@ class CopyDetectionMonitor:
             'deal-finder.co.il',
             'price-tracker.co.il'
         ]
+        
+        # הגדרות סריקה מקבילית
+        self.scan_concurrency = 8
+        self.politeness_delay = 5  # שניות בין בקשות לאותו שרת
+        self.request_timeout = 10
+        self.max_scan_bytes = 512 * 1024
+        
+        self.matcher = SignatureMatcher(self.signatures(), self.load_reference_pages())
+        
+        self.state = CopyStateStore(os.getenv('COPY_MONITOR_STATE', 'copy_monitor_state.db'))
+        self.github = GitHubClient(self.state)
+    
+    @staticmethod
+    def load_reference_pages():
+        """העמודים המקוריים שלנו (לצד הסקריפט)"""
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        pages = {}
+        for name in REFERENCE_PAGES:
+            try:
+                with open(os.path.join(base_dir, name), encoding='utf-8') as f:
+                    pages[name] = f.read()
+            except OSError as e:
+                print(f"Reference page {name} unavailable: {e}")
+        return pages
     
     def check_domain_for_copies(self, domain):
         """בדיקת דומיין לאיתור העתקות"""
         try:
-            response = requests.get(f"https://{domain}", timeout=10)
+            response = requests.get(self.domain_url(domain), timeout=self.request_timeout)
             content = response.text
             
-            similarity_score = 0
-            found_patterns = []
+            similarity_score, found_patterns = self.score_content(content)
             
-            # בדיקת ביטויים ייחודיים
-            for phrase in self.original_signatures['unique_phrases']:
-                if phrase in content:
-                    similarity_score += 30
-                    found_patterns.append(f"Text: {phrase}")
+            if similarity_score > REPORT_THRESHOLD:
+                self.report_potential_copy(domain, similarity_score, found_patterns)
+                
+            return similarity_score, found_patterns
             
-            # בדיקת קוד
-            for pattern in self.original_signatures['code_patterns']:
-                if pattern in content:
-                    similarity_score += 40
-                    found_patterns.append(f"Code: {pattern}")
+        except Exception as e:
+            print(f"Error checking {domain}: {e}")
+            return 0, []
+    
+    @staticmethod
+    def domain_url(domain):
+        """דומיין או כתובת מלאה (למשל שרת בדיקה מקומי)"""
+        return domain if domain.startswith(('http://', 'https://')) else f"https://{domain}"
+    
+    def signatures(self):
+        """כל החתימות עם הניקוד והתווית שלהן"""
+        return (
+            [(phrase, TEXT_PHRASE_SCORE, f"Text: {phrase}") for phrase in self.original_signatures['unique_phrases']] +
+            [(pattern, CODE_PATTERN_SCORE, f"Code: {pattern}") for pattern in self.original_signatures['code_patterns']]
+        )
+    
+    def score_content(self, content):
+        """ניקוד תוכן לפי הביטויים הייחודיים, דפוסי הקוד ודמיון לעמודים שלנו"""
+        found, _ = self.matcher.scan(content)
+        similarity_score = sum(found.values())
+        found_patterns = list(found)
+        
+        near_score, near_pattern = self._near_duplicate_score(content)
+        if near_pattern:
+            similarity_score += near_score
+            found_patterns.append(near_pattern)
+        
+        return similarity_score, found_patterns
+    
+    def _near_duplicate_score(self, content):
+        name, similarity = self.matcher.near_duplicate(content)
+        if similarity < NEAR_DUPLICATE_THRESHOLD:
+            return 0, None
+        return round(similarity * 100), f"Near-duplicate: {name} ({similarity:.0%})"
+    
+    async def scan_domains_async(self, domains=None):
+        """
+        סריקה מקבילית של הדומיינים: עד scan_concurrency בקשות בו-זמנית,
+        מאגר חיבורים משותף והשהיה של politeness_delay בין בקשות לאותו שרת
+        
+        Returns:
+            dict של domain -> (score, patterns)
+        """
+        domains = domains or self.monitored_domains
+        semaphore = asyncio.Semaphore(self.scan_concurrency)
+        host_locks = {}
+        last_request = {}
+        
+        async def polite_scan(session, domain):
+            host = urlparse(self.domain_url(domain)).netloc
+            lock = host_locks.setdefault(host, asyncio.Lock())
             
-            if similarity_score > 50:
-                self.report_potential_copy(domain, similarity_score, found_patterns)
+            # בקשה אחת בכל פעם לכל שרת, עם השהיה מהבקשה הקודמת אליו
+            async with lock:
+                wait = last_request.get(host, 0) + self.politeness_delay - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                async with semaphore:
+                    try:
+                        return domain, await self._scan_domain_async(session, domain)
+                    finally:
+                        last_request[host] = time.monotonic()
+        
+        connector = aiohttp.TCPConnector(limit=self.scan_concurrency, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            results = await asyncio.gather(*(polite_scan(session, domain) for domain in domains))
+        
+        return dict(results)
+    
+    async def _scan_domain_async(self, session, domain):
+        """
+        קריאת העמוד בהזרמה ועצירה ברגע שההחלטה ידועה: כל החתימות נמצאו,
+        הניקוד עבר את סף החומרה הגבוהה, או שנקראו max_scan_bytes
+        """
+        found = {}
+        decided = False
+        
+        try:
+            async with session.get(self.domain_url(domain)) as response:
+                decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='ignore')
+                state = 0
+                read = 0
+                text_parts = []
                 
+                async for chunk in response.content.iter_chunked(16 * 1024):
+                    read += len(chunk)
+                    text = decoder.decode(chunk)
+                    text_parts.append(text)
+                    
+                    # מצב האוטומט נשמר בין מקטעים - חתימה יכולה להתפצל ביניהם
+                    matches, state = self.matcher.scan(text, state)
+                    found.update(matches)
+                    
+                    decided = len(found) == self.matcher.signature_count or sum(found.values()) > HIGH_SEVERITY_THRESHOLD
+                    if decided or read >= self.max_scan_bytes:
+                        break
+            
+            similarity_score = sum(found.values())
+            found_patterns = list(found)
+            
+            # דמיון לעמודים שלנו - רק כשהחתימות המדויקות לא הכריעו.
+            # MinHash הוא חישוב סינכרוני כבד - רץ ב-thread כדי לא לעצור סריקות אחרות
+            if not decided:
+                near_score, near_pattern = await asyncio.get_running_loop().run_in_executor(
+                    None, self._near_duplicate_score, ''.join(text_parts)
+                )
+                if near_pattern:
+                    similarity_score += near_score
+                    found_patterns.append(near_pattern)
+            
+            if similarity_score > REPORT_THRESHOLD:
+                self.report_potential_copy(domain, similarity_score, found_patterns)
+            
             return similarity_score, found_patterns
             
         except Exception as e:
             print(f"Error checking {domain}: {e}")
             return 0, []
     
+    def scan_domains(self, domains=None):
+        """סבב בדיקת דומיינים - מקבילי עם aiohttp, אחרת סדרתי"""
+        domains = domains or self.monitored_domains
+        
+        if aiohttp is not None:
+            return asyncio.run(self.scan_domains_async(domains))
+        
+        results = {}
+        for index, domain in enumerate(domains):
+            if index:
+                time.sleep(self.politeness_delay)  # דחיה בין בדיקות
+            results[domain] = self.check_domain_for_copies(domain)
+        return results
+    
     def search_github_for_copies(self):
         """חיפוש העתקות ב-GitHub"""
         try:
@@ -76,15 +531,15 @@ class CopyDetectionMonitor:
                 '"המחיר הטוב ביותר"'
             ]
             
+            seen = set()
             for query in search_queries:
-                url = f"https://api.github.com/search/repositories?q={query}"
-                response = requests.get(url)
+                data = self.github.get_json('/search/repositories', params={'q': query})
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    for repo in data.get('items', []):
-                        if repo['html_url'] != 'https://github.com/rlsite/PriceTracker':
-                            self.analyze_github_repo(repo)
+                for repo in (data or {}).get('items', []):
+                    # אותו repo יכול לחזור בכמה חיפושים
+                    if repo['html_url'] != ORIGINAL_REPO_URL and repo['full_name'] not in seen:
+                        seen.add(repo['full_name'])
+                        self.analyze_github_repo(repo)
                             
         except Exception as e:
             print(f"GitHub search error: {e}")
@@ -92,35 +547,36 @@ class CopyDetectionMonitor:
     def analyze_github_repo(self, repo_data):
         """ניתוח repository חשוד"""
         try:
+            # בדיקת תוכן הREADME (בקשה מותנית - 304 כשלא השתנה)
+            readme = self.github.get_json(f"/repos/{repo_data['full_name']}/readme")
+            if not readme:
+                return
+            
+            # README שכבר נבדק באותה גרסה - אין צורך לנתח שוב
+            known = self.state.get_repo(repo_data['full_name'])
+            if known and known['readme_sha'] == readme['sha']:
+                return
+            
             print(f"Analyzing suspicious repo: {repo_data['html_url']}")
+            readme_content = base64.b64decode(readme['content']).decode('utf-8')
             
-            # בדיקת תוכן הREADME
-            readme_url = f"https://api.github.com/repos/{repo_data['full_name']}/readme"
-            response = requests.get(readme_url)
+            similarity = self.calculate_similarity(readme_content)
+            self.state.save_repo(repo_data['full_name'], repo_data['html_url'], readme['sha'], similarity)
             
-            if response.status_code == 200:
-                import base64
-                readme_content = base64.b64decode(
-                    response.json()['content']
-                ).decode('utf-8')
-                
-                similarity = self.calculate_similarity(readme_content)
-                
-                if similarity > 70:
-                    self.report_github_copy(repo_data, similarity)
+            if similarity > GITHUB_COPY_THRESHOLD:
+                self.report_github_copy(repo_data, similarity, readme['sha'])
                     
         except Exception as e:
             print(f"Error analyzing repo: {e}")
     
     def calculate_similarity(self, content):
         """חישוב דמיון תוכן"""
-        similarity = 0
-        
-        for phrase in self.original_signatures['unique_phrases']:
-            if phrase in content:
-                similarity += 25
+        found, _ = self.matcher.scan(content)
+        similarity = 25 * sum(1 for label in found if label.startswith('Text: '))
         
-        return similarity
+        # README שמעתיק את הטקסט שלנו עם שינויים קלים
+        _, near_similarity = self.matcher.near_duplicate(content)
+        return max(similarity, round(near_similarity * 100))
     
     def report_potential_copy(self, domain, score, patterns):
         """דיווח על העתקה פוטנציאלית"""
@@ -132,6 +588,11 @@ class CopyDetectionMonitor:
             'severity': 'HIGH' if score > 80 else 'MEDIUM'
         }
         
+        # אותו דומיין עם אותם ממצאים כבר דווח
+        report_key = self.report_key(domain, patterns)
+        if not self.state.claim_report(report_key, domain):
+            return
+        
         print(f"🚨 POTENTIAL COPY DETECTED: {domain} (Score: {score})")
         
         # שמירה לקובץ
@@ -141,8 +602,18 @@ class CopyDetectionMonitor:
         # שליחת התראה באימייל
         self.send_email_alert(report)
     
-    def report_github_copy(self, repo_data, score):
-        """דיווח על העתקה ב-GitHub"""
+    @staticmethod
+    def report_key(domain, patterns):
+        """מפתח הדיווח - הדומיין ושמות החתימות שנמצאו, בלי הניקוד שמשתנה בין סבבים"""
+        findings = sorted({NEAR_DUPLICATE_SCORE.sub('', pattern) for pattern in patterns})
+        return hashlib.sha1(json.dumps([domain, findings], ensure_ascii=False).encode('utf-8')).hexdigest()
+    
+    def report_github_copy(self, repo_data, score, readme_sha=None):
+        """דיווח על העתקה ב-GitHub - פעם אחת לכל גרסת README"""
+        known = self.state.get_repo(repo_data['full_name'])
+        if readme_sha and known and known['reported_sha'] == readme_sha:
+            return
+        
         print(f"🚨 GITHUB COPY DETECTED: {repo_data['html_url']} (Score: {score})")
         
         # הכנת DMCA notice
@@ -167,6 +638,9 @@ Date: {datetime.now().strftime('%Y-%m-%d')}
         
         with open(f"dmca_{int(time.time())}.txt", 'w', encoding='utf-8') as f:
             f.write(dmca_notice)
+        
+        if readme_sha:
+            self.state.mark_repo_reported(repo_data['full_name'], readme_sha)
     
     def send_email_alert(self, report):
         """שליחת התראה באימייל"""
@@ -206,15 +680,7 @@ Please take immediate action.
         
         while True:
             try:
-                # בדיקת דומיינים חשודים
-                for domain in self.monitored_domains:
-                    score, patterns = self.check_domain_for_copies(domain)
-                    if score > 0:
-                        print(f"Checked {domain}: Score {score}")
-                        time.sleep(5)  # דחיה בין בדיקות
-                
-                # בדיקת GitHub
-                self.search_github_for_copies()
+                self.run_once()
                 
                 print(f"💤 Sleeping for 6 hours...")
                 time.sleep(6 * 3600)  # המתנה של 6 שעות
@@ -225,7 +691,45 @@ Please take immediate action.
             except Exception as e:
                 print(f"❌ Monitoring error: {e}")
                 time.sleep(300)
+    
+    def run_once(self, domains=None, include_github=True):
+        """סבב בדיקה אחד"""
+        # בדיקת דומיינים חשודים
+        started = time.monotonic()
+        for domain, (score, patterns) in self.scan_domains(domains).items():
+            if score > 0:
+                print(f"Checked {domain}: Score {score}")
+        print(f"⏱️ Domain scan took {time.monotonic() - started:.1f}s")
+        
+        # בדיקת GitHub
+        if include_github:
+            self.search_github_for_copies()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='PriceTracker copy detection monitor')
+    parser.add_argument('--once', action='store_true', help='run a single scan and exit')
+    parser.add_argument('--domains', nargs='+', help='domains or URLs to scan instead of the monitored list')
+    parser.add_argument('--concurrency', type=int, help='max concurrent requests')
+    parser.add_argument('--delay', type=float, help='politeness delay per host, in seconds')
+    parser.add_argument('--no-github', action='store_true', help='skip the GitHub search')
+    parser.add_argument('--github-api', help='GitHub API base URL (default: GITHUB_API_URL or api.github.com)')
+    parser.add_argument('--state', help='SQLite state file (default: COPY_MONITOR_STATE or copy_monitor_state.db)')
+    args = parser.parse_args()
+    
+    if args.github_api:
+        os.environ['GITHUB_API_URL'] = args.github_api
+    if args.state:
+        os.environ['COPY_MONITOR_STATE'] = args.state
+    
     monitor = CopyDetectionMonitor()
-    monitor.continuous_monitoring()
\ No newline at end of file
+    if args.concurrency:
+        monitor.scan_concurrency = args.concurrency
+    if args.delay is not None:
+        monitor.politeness_delay = args.delay
+    if args.domains:
+        monitor.monitored_domains = args.domains
+    
+    if args.once:
+        monitor.run_once(include_github=not args.no_github)
+    else:
+        monitor.continuous_monitoring()
\ No newline at end of file
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+חישובים משותפים לסקריפטי המדידה (benchmark_scrapers.py, load_test.py)
+"""
+
+import statistics
+
+
+def percentile(samples, fraction: float) -> float:
+    """
+    אחוזון (למשל 0.95) מתוך רשימת מדידות, באינטרפולציה בין הדגימות
+    """
+    if not samples:
+        return 0.0
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[round(fraction * 100) - 1]
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scraper Benchmark - מדידת ביצועי KSPScraper מול עמודים מוקלטים, ללא גישה לאתר
+
+עמודי KSP מוקלטים (חיפוש + עמודי מוצר) מוגשים משרת HTTP מקומי, וכל
+הפעולות של ה-scraper רצות מולו בכל אחד מהמצבים:
+
+    selenium - דרייבר חדש לכל פעולה (ללא שימוש חוזר)
+    pooled   - דרייברים מהמאגר המשותף
+    static   - HTTP בלבד (requests + פענוח מקומי)
+
+הפלט הוא JSON (p50/p95 לכל פעולה, products/sec ו-peak RSS). עם
+--baseline הוא מושווה להרצה קודמת, וכל p50/p95 שגדל ביותר מ-
+--max-regression מדווח ומכשיל את הריצה. כשמריצים כמה מצבים, כל מצב רץ
+בתהליך נפרד - ru_maxrss הוא שיא לכל חיי התהליך, ובתהליך משותף המצב
+השני היה יורש את השיא של הראשון. מצב שדורש דפדפן מדולג כשאין Chrome.
+
+שימוש:
+    python scripts/benchmark_scrapers.py --modes static,pooled --output benchmark.json
+    python scripts/benchmark_scrapers.py --modes static,pooled --baseline main-benchmark.json
+    python scripts/benchmark_scrapers.py --pages recordings/ksp --iterations 20
+    KSP_SEARCH_URL='<search URL with {query}>' python scripts/benchmark_scrapers.py --record recordings/ksp --query "iphone 15"
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import statistics
+import threading
+import subprocess
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import quote, urljoin, urlparse
+
+# ה-scrapers מייבאים את utils כחבילה עליונה, כמו ב-worker (cwd = backend/)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+
+# השרת המקומי אינו צריך הגבלת קצב
+os.environ.setdefault('SCRAPER_RATE_PER_SECOND', '0')
+
+from scrapers.ksp_scraper import KSPScraper, NAVIGATION_DIRECT, STRATEGY_SELENIUM, STRATEGY_STATIC
+from scrapers.driver_pool import WebDriverPool
+from scrapers.http_client import fetch
+from selenium.common.exceptions import WebDriverException
+
+from bench_stats import percentile
+
+MODES = ('selenium', 'pooled', 'static')
+BROWSER_MODES = ('selenium', 'pooled')
+COMPARED_METRICS = ('p50_ms', 'p95_ms')
+SEARCH_PAGE = 'search.html'
+PRODUCT_PAGE = 'product_{index}.html'
+
+
+def build_synthetic_pages(directory: str, products: int = 20):
+    """
+    עמודים במבנה של KSP (כרטיסי מוצר + JSON-LD בעמוד המוצר), כשאין הקלטה
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    cards = []
+    for index in range(products):
+        price = 999 + index * 37
+        cards.append(
+            f'<div class="product-item">'
+            f'<a href="/product/{index}"><img src="/img/{index}.jpg"></a>'
+            f'<h3 class="product-title">מוצר בדיקה {index}</h3>'
+            f'<span class="price">₪{price:,}</span>'
+            f'<span class="availability">במלאי</span>'
+            f'<p class="description">תיאור קצר של מוצר {index}</p>'
+            f'</div>'
+        )
+        offer = {
+            '@context': 'https://schema.org', '@type': 'Product', 'name': f'מוצר בדיקה {index}',
+            'offers': {'@type': 'Offer', 'price': str(price), 'priceCurrency': 'ILS',
+                       'availability': 'https://schema.org/InStock'},
+        }
+        with open(os.path.join(directory, PRODUCT_PAGE.format(index=index)), 'w', encoding='utf-8') as f:
+            f.write(
+                f'<html><head><script type="application/ld+json">{json.dumps(offer, ensure_ascii=False)}</script>'
+                f'</head><body><h1>מוצר בדיקה {index}</h1><div class="current-price">₪{price:,}</div>'
+                f'<div class="original-price">₪{price + 200:,}</div>'
+                f'<ul class="specifications"><li>מפרט א</li><li>מפרט ב</li></ul>'
+                f'<div class="rating" title="4.5"></div><span class="reviews-count">12 ביקורות</span>'
+                f'</body></html>'
+            )
+
+    with open(os.path.join(directory, SEARCH_PAGE), 'w', encoding='utf-8') as f:
+        f.write(
+            '<html><body><form action="/web/cat/"><input name="keyword" placeholder="חיפוש">'
+            '<button type="submit">חיפוש</button></form>'
+            f'<div class="results">{"".join(cards)}</div></body></html>'
+        )
+
+
+def record_pages(directory: str, query: str, products: int):
+    """
+    הקלטת דף חיפוש ועמודי מוצר מהאתר החי; הקישורים בדף החיפוש
+    משוכתבים כך שיצביעו על העמודים המוקלטים
+    """
+    os.makedirs(directory, exist_ok=True)
+    scraper = KSPScraper()
+    if not scraper.search_url:
+        sys.exit("--record needs KSP_SEARCH_URL (a search URL template with {query})")
+
+    response = fetch(scraper.search_url.format(query=quote(query)), headers=scraper.headers)
+    response.raise_for_status()
+    html = response.text
+
+    links = []
+    for href in re.findall(r'href="([^"]*/web/item/[^"]*)"', html):
+        if href not in links:
+            links.append(href)
+
+    for index, href in enumerate(links[:products]):
+        page = fetch(urljoin(scraper.base_url, href), headers=scraper.headers)
+        with open(os.path.join(directory, PRODUCT_PAGE.format(index=index)), 'w', encoding='utf-8') as f:
+            f.write(page.text)
+        html = html.replace(f'href="{href}"', f'href="/product/{index}"')
+
+    with open(os.path.join(directory, SEARCH_PAGE), 'w', encoding='utf-8') as f:
+        f.write(html)
+    print(f"Recorded search page and {min(len(links), products)} product pages to {directory}")
+
+
+class RecordedPagesHandler(SimpleHTTPRequestHandler):
+    """
+    /web/cat/... ו-/ -> דף החיפוש, /product/<n> -> עמוד מוצר מוקלט
+    """
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        match = re.match(r'^/product/(\d+)', path)
+        if match:
+            self.path = '/' + PRODUCT_PAGE.format(index=match.group(1))
+        elif path == '/' or path.startswith('/web/cat'):
+            self.path = '/' + SEARCH_PAGE
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_pages(directory: str, host: str):
+    server = ThreadingHTTPServer((host, 0), partial(RecordedPagesHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_scraper(mode: str, base_url: str) -> KSPScraper:
+    scraper = KSPScraper()
+    scraper.base_url = base_url
+    scraper.search_url = f"{base_url}/web/cat/?search={{query}}"
+    scraper.navigation_mode = NAVIGATION_DIRECT
+
+    if mode == 'selenium':
+        # דרייבר חדש לכל פעולה - כמו לפני מאגר הדרייברים
+        scraper.driver_pool = WebDriverPool(
+            scraper.chrome_options, max_size=1, max_uses=1,
+            remote_url=os.getenv('SELENIUM_REMOTE_URL') or None
+        )
+    elif mode == 'pooled':
+        scraper.driver_pool = WebDriverPool(
+            scraper.chrome_options, max_size=1, max_uses=1000,
+            remote_url=os.getenv('SELENIUM_REMOTE_URL') or None
+        )
+    return scraper
+
+
+def static_search(scraper: KSPScraper, query: str, max_results: int):
+    """חיפוש ב-HTTP בלבד - אותו פענוח כמו מצב page_source"""
+    response = fetch(scraper.search_url.format(query=quote(query)), headers=scraper.headers)
+    return scraper.extract_products_from_html(response.text, max_results)
+
+
+def measure(operation, iterations: int):
+    latencies = []
+    items = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        mark = time.perf_counter()
+        result = operation()
+        latencies.append(time.perf_counter() - mark)
+        if isinstance(result, list):
+            items += len(result)
+        elif result:
+            items += 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'products_per_sec': round(items / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def browser_unavailable(scraper: KSPScraper):
+    """
+    סיבה לדילוג על מצב שדורש דפדפן (אין Chrome מקומי ואין Grid), או None.
+    הדרייבר שנפתח כאן חוזר למאגר - במצב pooled המדידה היא של מאגר חם
+    """
+    try:
+        with scraper.driver_pool.driver():
+            return None
+    except WebDriverException as e:
+        return (e.msg or str(e)).splitlines()[0]
+
+
+def run_mode(mode: str, base_url: str, product_urls, iterations: int, max_results: int, query: str):
+    scraper = make_scraper(mode, base_url)
+    if mode in BROWSER_MODES:
+        reason = browser_unavailable(scraper)
+        if reason:
+            scraper.driver_pool.close()
+            print(f"Skipping {mode} benchmark, no browser: {reason}", file=sys.stderr)
+            return {'skipped': reason}
+
+    strategy = STRATEGY_STATIC if mode == 'static' else STRATEGY_SELENIUM
+    for url in product_urls:
+        scraper._remember_price_strategy(url, strategy)
+
+    def next_product():
+        next_product.index = (next_product.index + 1) % len(product_urls)
+        return product_urls[next_product.index]
+    next_product.index = -1
+
+    results = {}
+    try:
+        if mode == 'static':
+            results['search_product'] = measure(lambda: static_search(scraper, query, max_results), iterations)
+            results['get_product_details'] = None  # דורש דפדפן
+        else:
+            results['search_product'] = measure(lambda: scraper.search_product(query, max_results), iterations)
+            results['get_product_details'] = measure(lambda: scraper.get_product_details(next_product()), iterations)
+        results['check_price_update'] = measure(lambda: scraper.check_price_update(next_product()), iterations)
+    finally:
+        if mode != 'static':
+            scraper.driver_pool.close()
+
+    results['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results['peak_children_rss_kb'] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return results
+
+
+def find_regressions(report, baseline, max_regression: float):
+    """
+    p50/p95 שגדלו ביותר מ-max_regression (יחסית) מול ה-baseline.
+    מצבים ופעולות שלא נמדדו באחת ההרצות (למשל מצב שדולג) אינם מושווים
+    """
+    regressions = []
+    for mode, operations in report['modes'].items():
+        previous = baseline.get('modes', {}).get(mode) or {}
+        for operation, metrics in operations.items():
+            before = previous.get(operation)
+            if not isinstance(metrics, dict) or not isinstance(before, dict):
+                continue
+            for metric in COMPARED_METRICS:
+                if before[metric] and metrics[metric] > before[metric] * (1 + max_regression):
+                    regressions.append(
+                        f"{mode}/{operation} {metric}: {before[metric]} -> {metrics[metric]} "
+                        f"(+{metrics[metric] / before[metric] - 1:.0%})"
+                    )
+    return regressions
+
+
+def run_mode_isolated(mode: str, args, pages: str):
+    """הרצת מצב יחיד בתהליך-בן, כך שמדידת ה-RSS שייכת למצב הזה בלבד"""
+    command = [
+        sys.executable, os.path.abspath(__file__),
+        '--modes', mode,
+        '--pages', pages,
+        '--query', args.query,
+        '--products', str(args.products),
+        '--iterations', str(args.iterations),
+        '--host', args.host,
+    ]
+    completed = subprocess.run(command, stdout=subprocess.PIPE, check=True)
+    return json.loads(completed.stdout)['modes'][mode]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline KSPScraper benchmark against recorded pages')
+    parser.add_argument('--modes', default=','.join(MODES), help='comma separated: selenium,pooled,static')
+    parser.add_argument('--pages', help='directory with recorded pages (default: synthetic pages)')
+    parser.add_argument('--record', metavar='DIR', help='record live KSP pages into DIR and exit')
+    parser.add_argument('--query', default='iphone')
+    parser.add_argument('--products', type=int, default=20)
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--host', default='127.0.0.1', help='address the browser uses to reach the page server')
+    parser.add_argument('--output', help='write JSON results to this file (default: stdout)')
+    parser.add_argument('--baseline', help='previous JSON results to compare against (skipped if missing)')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='allowed relative p50/p95 increase over the baseline (default: 0.25)')
+    args = parser.parse_args()
+
+    if args.record:
+        record_pages(args.record, args.query, args.products)
+        return
+
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    for mode in modes:
+        if mode not in MODES:
+            parser.error(f"Unknown mode: {mode}")
+
+    pages = args.pages
+    if not pages:
+        pages = os.path.join(os.getenv('TMPDIR', '/tmp'), 'ksp_benchmark_pages')
+        build_synthetic_pages(pages, args.products)
+
+    product_count = len([name for name in os.listdir(pages) if name.startswith('product_')])
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'pages': 'synthetic' if not args.pages else os.path.abspath(args.pages),
+        'products': product_count,
+        'iterations': args.iterations,
+        'modes': {},
+    }
+    if len(modes) > 1:
+        for mode in modes:
+            report['modes'][mode] = run_mode_isolated(mode, args, pages)
+    elif modes:
+        mode = modes[0]
+        server = serve_pages(pages, args.host)
+        base_url = f"http://{args.host}:{server.server_address[1]}"
+        product_urls = [f"{base_url}/product/{index}" for index in range(product_count)]
+        try:
+            print(f"Running {mode} benchmark...", file=sys.stderr)
+            report['modes'][mode] = run_mode(
+                mode, base_url, product_urls, args.iterations, args.products, args.query
+            )
+        finally:
+            server.shutdown()
+
+    regressions = []
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = find_regressions(report, json.load(f), args.max_regression)
+        report['regressions'] = regressions
+    elif args.baseline:
+        print(f"No baseline at {args.baseline}, skipping comparison", file=sys.stderr)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load Test - מדידת תפוקה והשהייה של ה-API ברמות מקביליות שונות
+
+מריץ N בקשות לכל רמת מקביליות מול כתובת אחת או יותר, כך שאפשר להשוות
+את שרת הפיתוח (python app.py) מול gunicorn עם workers של gevent.
+
+שימוש:
+    python scripts/load_test.py --target dev=http://127.0.0.1:5000 \\
+        --target gevent=http://127.0.0.1:8000 --concurrency 1,10,50,200
+    python scripts/load_test.py --target http://127.0.0.1:8000 --path /api/search \\
+        --method POST --json '{"query": "iphone"}' --output load.json
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_stats import percentile
+
+
+def send(url: str, method: str, body, timeout: float):
+    """בקשה אחת - (משך בשניות, קוד סטטוס או None בשגיאת רשת)"""
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method)
+    if data is not None:
+        request.add_header('Content-Type', 'application/json')
+
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = None
+    return time.perf_counter() - started, status
+
+
+def run_level(url: str, method: str, body, concurrency: int, total: int, timeout: float):
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker(_):
+        elapsed, status = send(url, method, body, timeout)
+        with lock:
+            latencies.append(elapsed)
+            key = str(status) if status is not None else 'error'
+            statuses[key] = statuses.get(key, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(total)))
+    wall = time.perf_counter() - started
+
+    failed = sum(count for key, count in statuses.items() if key == 'error' or int(key) >= 500)
+    return {
+        'concurrency': concurrency,
+        'requests': total,
+        'requests_per_sec': round(total / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'max_ms': round(max(latencies) * 1000, 2) if latencies else 0.0,
+        'failed': failed,
+        'statuses': statuses,
+    }
+
+
+def parse_target(value: str):
+    label, separator, url = value.partition('=')
+    if not separator:
+        return value, value
+    return label, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrency load test for the Price Tracker API')
+    parser.add_argument('--target', action='append', required=True,
+                        help='[label=]base URL, may be repeated to compare servers')
+    parser.add_argument('--path', default='/api/health')
+    parser.add_argument('--method', default='GET')
+    parser.add_argument('--json', help='JSON request body')
+    parser.add_argument('--concurrency', default='1,10,50,200', help='comma separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=0,
+                        help='requests per level (default: 5 x concurrency, at least 50)')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--output', help='write JSON results to this file (default: stdout)')
+    args = parser.parse_args()
+
+    body = json.loads(args.json) if args.json else None
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'path': args.path,
+        'method': args.method,
+        'targets': {},
+    }
+    for label, base_url in map(parse_target, args.target):
+        url = base_url.rstrip('/') + args.path
+        report['targets'][label] = []
+        for concurrency in levels:
+            total = args.requests or max(concurrency * 5, 50)
+            print(f"{label}: {total} requests at concurrency {concurrency}...", file=sys.stderr)
+            report['targets'][label].append(
+                run_level(url, args.method.upper(), body, concurrency, total, args.timeout)
+            )
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
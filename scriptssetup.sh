@@ -304,7 +304,7 @@ Type=simple
 User=$USER
 WorkingDirectory=$PROJECT_DIR
 Environment=PATH=$PROJECT_DIR/venv/bin
-ExecStart=$PROJECT_DIR/venv/bin/gunicorn --bind 0.0.0.0:5000 --workers 4 app:app
+ExecStart=$PROJECT_DIR/venv/bin/gunicorn --chdir $PROJECT_DIR/backend -c $PROJECT_DIR/backend/gunicorn.conf.py wsgi:app
 ExecReload=/bin/kill -s HUP \$MAINPID
 Restart=always
 
@@ -323,7 +323,7 @@ Type=simple
 User=$USER
 WorkingDirectory=$PROJECT_DIR/backend
 Environment=PATH=$PROJECT_DIR/venv/bin
-ExecStart=$PROJECT_DIR/venv/bin/celery -A services.price_monitor worker --loglevel=info
+ExecStart=$PROJECT_DIR/venv/bin/celery -A services.tasks worker --loglevel=info
 Restart=always
 
 [Install]
@@ -341,7 +341,7 @@ Type=simple
 User=$USER
 WorkingDirectory=$PROJECT_DIR/backend
 Environment=PATH=$PROJECT_DIR/venv/bin
-ExecStart=$PROJECT_DIR/venv/bin/celery -A services.price_monitor beat --loglevel=info
+ExecStart=$PROJECT_DIR/venv/bin/celery -A services.tasks beat --loglevel=info
 Restart=always
 
 [Install]
@@ -404,8 +404,8 @@ show_post_install_instructions() {
     echo -e "   ${BLUE}cd backend && python app.py${NC}"
     echo ""
     echo -e "3. להרצת workers ברקע:"
-    echo -e "   ${BLUE}celery -A backend.services.price_monitor worker --loglevel=info${NC}"
-    echo -e "   ${BLUE}celery -A backend.services.price_monitor beat --loglevel=info${NC}"
+    echo -e "   ${BLUE}celery --workdir=backend -A services.tasks worker --loglevel=info${NC}"
+    echo -e "   ${BLUE}celery --workdir=backend -A services.tasks beat --loglevel=info${NC}"
     echo ""
     echo -e "4. להרצה עם Docker:"
     echo -e "   ${BLUE}docker-compose up -d${NC}"